@@ -0,0 +1,272 @@
+"""Eligibility and remaining cost for many transcripts at once. The prerequisite expressions are compiled into a
+sequence of NumPy reductions over a (students x nodes) matrix, one reduction per level of the expressions, so a
+batch costs a few array operations per level instead of one Python evaluation per student and course."""
+from typing import Optional
+
+import numpy as np
+
+from proj_objects import CourseGraph
+
+# kinds of compiled nodes: all of the children (a tuple), any one of them (a list), and a course, whose value in a
+# cost program is 0 if it was taken and its own cost plus the value of its prerequisites otherwise
+ALL, ANY, COURSE = 0, 1, 2
+# grade of a course that is not in a transcript
+NO_GRADE = -1.0
+
+
+class Program:
+    """
+    Prerequisite expressions compiled into levels of reductions.
+
+    The value of every node for every student is a column of a (students x columns) matrix. The first n_inputs
+    columns are filled in before running the program. Every other node is computed by a step, and all the nodes of
+    one step are of the same kind and have their children in earlier columns, so that one reduceat call computes
+    them all.
+
+    columns: the number of columns of the matrix.
+    steps: (kind, first column, children, starts, courses) for each step, which computes the columns first column
+        to first column + len(starts), the node at first column + i reducing the columns
+        children[starts[i]:starts[i + 1]]. For a COURSE step, courses holds the course ids of the nodes and
+        each node has exactly one child, its prerequisites.
+    """
+    n_inputs: int
+    columns: int
+    steps: list[tuple[int, int, np.ndarray, np.ndarray, Optional[np.ndarray]]]
+
+    def __init__(self, n_inputs: int, kinds: list[int], children: list[list[int]], courses: list[int]) -> None:
+        """compile the nodes n_inputs, n_inputs + 1, ..., where node n_inputs + j is of kind kinds[j], has the
+        children children[j] and is about the course courses[j] if it is a COURSE node. The children of a node
+        must come before it."""
+        self.n_inputs = n_inputs
+        height = [0] * n_inputs
+        for child_list in children:
+            height.append(1 + max(height[child] for child in child_list))
+        # the final column of node n_inputs + j is n_inputs + position of j in the order below
+        order = sorted(range(len(kinds)), key=lambda j: (height[n_inputs + j], kinds[j], j))
+        column = list(range(n_inputs)) + [0] * len(kinds)
+        for position, j in enumerate(order):
+            column[n_inputs + j] = n_inputs + position
+        self.columns = n_inputs + len(kinds)
+
+        self.steps = []
+        start = 0
+        while start < len(order):
+            key = (height[n_inputs + order[start]], kinds[order[start]])
+            end = start
+            while end < len(order) and (height[n_inputs + order[end]], kinds[order[end]]) == key:
+                end += 1
+            group = order[start:end]
+            flat = [column[child] for j in group for child in children[j]]
+            starts = np.cumsum([0] + [len(children[j]) for j in group[:-1]])
+            step_courses = np.array([courses[j] for j in group]) if key[1] == COURSE else None
+            self.steps.append((key[1], n_inputs + start, np.array(flat, dtype=np.intp), starts, step_courses))
+            start = end
+        self._column = column
+
+    def column(self, node: int) -> int:
+        """return the column of the matrix holding node."""
+        return self._column[node]
+
+
+class BatchEvaluator:
+    """
+    Eligibility and remaining cost of many transcripts at once, for one CourseGraph.
+
+    The eligibility program is compiled once for the whole graph, and the cost program once per target course. The
+    graph must not change while the evaluator is in use.
+
+    courses: the courses of the graph, the column of each course in the grade matrices being its index.
+    ids: the inverse of courses.
+
+    >>> g = CourseGraph()
+    >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}, {'CSC111H1': 50}])
+    >>> g.add_edge('CSC207H1', [({'CSC148H1': 60}, {'CSC108H1': 50})])
+    >>> g.add_edge('CSC111H1', [{'CSC110Y1': 70}])
+    >>> batch = BatchEvaluator(g)
+    >>> transcripts = [{}, {'CSC108H1': 75}, {'CSC108H1': 75, 'CSC148H1': 80}, {'CSC110Y1': 90}]
+    >>> batch.eligible(transcripts)
+    [[], ['CSC148H1'], ['CSC207H1'], ['CSC111H1']]
+    >>> batch.remaining_cost(transcripts, 'CSC207H1').tolist()
+    [2.0, 1.0, 0.5, 2.0]
+    """
+    courses: list[str]
+    ids: dict[str, int]
+    _graph: CourseGraph
+    _eligibility: Program
+    # (course id, minimum grade) of each leaf of the eligibility program, leaf i being in column 2 + i
+    _leaf_courses: np.ndarray
+    _leaf_grades: np.ndarray
+    # the ids of the courses with prerequisites, and the column of their prerequisites in the eligibility program
+    _with_prereq: np.ndarray
+    _roots: np.ndarray
+    # the cost program of each target course computed so far, with the column of the target
+    _cost_programs: dict[str, tuple[Program, int]]
+
+    def __init__(self, graph: CourseGraph) -> None:
+        self._graph = graph
+        self.courses = list(graph.courses)
+        self.ids = {name: i for i, name in enumerate(self.courses)}
+        self._cost_programs = {}
+
+        # columns 0 and 1 are the constants True and False, then come the leaves
+        leaves = {}
+        for course in graph.courses.values():
+            for name, grade in _leaf_items(course.prereq):
+                leaves.setdefault((self.ids[name], grade), 2 + len(leaves))
+        n_inputs = 2 + len(leaves)
+        self._leaf_courses = np.array([key[0] for key in leaves], dtype=np.intp)
+        self._leaf_grades = np.array([key[1] for key in leaves], dtype=float)
+
+        kinds, children = [], []
+
+        def add(item: list | tuple) -> int:
+            """add the nodes of the expression item and return its node."""
+            if isinstance(item, dict):
+                child_nodes = [leaves[(self.ids[name], grade)] for name, grade in item.items()]
+                if len(child_nodes) == 1:
+                    return child_nodes[0]
+            else:
+                child_nodes = [add(child) for child in item]
+            if not child_nodes:
+                return 1 if isinstance(item, list) else 0
+            kinds.append(ANY if isinstance(item, list) else ALL)
+            children.append(child_nodes)
+            return n_inputs + len(kinds) - 1
+
+        with_prereq, roots = [], []
+        for i, course in enumerate(graph.courses.values()):
+            if course.prereq:
+                with_prereq.append(i)
+                roots.append(add(course.prereq))
+        self._eligibility = Program(n_inputs, kinds, children, [0] * len(kinds))
+        self._with_prereq = np.array(with_prereq, dtype=np.intp)
+        self._roots = np.array([self._eligibility.column(node) for node in roots], dtype=np.intp)
+
+    def grade_matrix(self, transcripts: list[dict[str, float]]) -> np.ndarray:
+        """return the (students x courses) matrix of the grades of transcripts, with NO_GRADE for the courses not
+        taken. Courses that are not in the graph are ignored."""
+        rows, cols, values = [], [], []
+        for row, transcript in enumerate(transcripts):
+            for name, grade in transcript.items():
+                if name in self.ids:
+                    rows.append(row)
+                    cols.append(self.ids[name])
+                    values.append(grade)
+        grades = np.full((len(transcripts), len(self.courses)), NO_GRADE)
+        grades[rows, cols] = values
+        return grades
+
+    def eligible_matrix(self, grades: np.ndarray) -> np.ndarray:
+        """return the (students x courses) boolean matrix telling whether each student, whose grades are a row of
+        the matrix grades, can take each course next, as proj_eligibility.EligibilityEngine defines it."""
+        program = self._eligibility
+        values = np.empty((grades.shape[0], program.columns), dtype=bool)
+        values[:, 0] = True
+        values[:, 1] = False
+        values[:, 2:program.n_inputs] = grades[:, self._leaf_courses] >= self._leaf_grades
+        for kind, first, flat, starts, _ in program.steps:
+            reduce = np.logical_and if kind == ALL else np.logical_or
+            values[:, first:first + len(starts)] = reduce.reduceat(values[:, flat], starts, axis=1)
+        eligible = np.zeros(grades.shape, dtype=bool)
+        eligible[:, self._with_prereq] = values[:, self._roots]
+        eligible &= grades == NO_GRADE
+        return eligible
+
+    def eligible(self, transcripts: list[dict[str, float]]) -> list[list[str]]:
+        """return the courses each transcript makes eligible, in alphabetical order."""
+        eligible = self.eligible_matrix(self.grade_matrix(transcripts))
+        rows, cols = np.nonzero(eligible)
+        lst = [[] for _ in transcripts]
+        for row, col in zip(rows.tolist(), cols.tolist()):
+            lst[row].append(self.courses[col])
+        return [sorted(names) for names in lst]
+
+    def _cost_program(self, target: str) -> tuple[Program, int]:
+        """return the cost program of target and the column of target in it, compiling it on the first call."""
+        if target not in self._cost_programs:
+            # column 0 is the constant 0, the cost of an empty expression
+            kinds, children, courses = [], [], []
+            course_node = {}
+
+            def add(item: dict | list | tuple) -> int:
+                """add the nodes of the expression item and return its node."""
+                if isinstance(item, dict):
+                    nodes = [course_node[name] for name in item]
+                    if len(nodes) == 1:
+                        return nodes[0]
+                    kinds.append(ALL)
+                    children.append(nodes)
+                    courses.append(0)
+                    return len(kinds)
+                child_nodes = [add(child) for child in item]
+                if not child_nodes:
+                    return 0
+                kinds.append(ANY if isinstance(item, list) else ALL)
+                children.append(child_nodes)
+                courses.append(0)
+                return len(kinds)
+
+            for name in self._graph.topological_order([target]):
+                prereq = add(self._graph.courses[name].prereq)
+                kinds.append(COURSE)
+                children.append([prereq])
+                courses.append(self.ids[name])
+                course_node[name] = len(kinds)
+            program = Program(1, kinds, children, courses)
+            self._cost_programs[target] = (program, program.column(course_node[target]))
+        return self._cost_programs[target]
+
+    def remaining_cost_matrix(self, grades: np.ndarray, target: str) -> np.ndarray:
+        """return, for each student whose grades are a row of the matrix grades, the smallest opportunity cost of
+        the courses still to take to finish target, as in CourseGraph.compute_cost but with every course already
+        taken, whatever the grade, costing nothing. Raise PrerequisiteCycleError if the prerequisites of target
+        contain a cycle."""
+        program, target_column = self._cost_program(target)
+        own = np.array([1.0 if self._graph.is_year_course(name) else 0.5 for name in self.courses])
+        values = np.empty((grades.shape[0], program.columns))
+        values[:, 0] = 0.0
+        for kind, first, flat, starts, courses in program.steps:
+            if kind == COURSE:
+                values[:, first:first + len(starts)] = np.where(grades[:, courses] != NO_GRADE, 0.0,
+                                                                own[courses] + values[:, flat])
+            else:
+                reduce = np.add if kind == ALL else np.minimum
+                values[:, first:first + len(starts)] = reduce.reduceat(values[:, flat], starts, axis=1)
+        return values[:, target_column]
+
+    def remaining_cost(self, transcripts: list[dict[str, float]], target: str) -> np.ndarray:
+        """return the remaining cost of target for each transcript, see self.remaining_cost_matrix."""
+        return self.remaining_cost_matrix(self.grade_matrix(transcripts), target)
+
+    def evaluate(self, transcripts: list[dict[str, float]], target: str) -> list[tuple[list[str], float]]:
+        """return (eligible courses in alphabetical order, remaining cost of target) for each transcript."""
+        grades = self.grade_matrix(transcripts)
+        eligible = self.eligible_matrix(grades)
+        costs = self.remaining_cost_matrix(grades, target).tolist()
+        return [(sorted(self.courses[col] for col in np.flatnonzero(row).tolist()), cost)
+                for row, cost in zip(eligible, costs)]
+
+
+def _leaf_items(prereq: dict | list | tuple) -> list[tuple[str, float]]:
+    """return the (course, minimum grade) of every leaf of the expression prereq, in order."""
+    if isinstance(prereq, dict):
+        return list(prereq.items())
+    return [pair for item in prereq for pair in _leaf_items(item)]
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['numpy', 'proj_objects'],
+        'disable': ['E9969', 'R1702', 'R1701', 'R0912', 'R0914']
+    })
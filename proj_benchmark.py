@@ -0,0 +1,450 @@
+"""Micro-benchmarks for the performance-sensitive parts of the project. Run this file to print the results.
+
+These are measurements, not tests: the numbers depend on the machine, so nothing here fails on a slow result, with
+one exception. `python proj_benchmark.py imports` checks that starting the program stays fast: it exits with status 1
+if a module imports networkx, matplotlib or tkinter before they are needed, or takes longer than its budget to import.
+"""
+import csv
+import os
+import random
+import string
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from typing import Callable
+
+from proj_batch import BatchEvaluator
+from proj_compact import CompactCourseGraph
+from proj_diff import diff_graphs
+from proj_eligibility import EligibilityEngine, eligible_courses
+from proj_generate_graph import read_csv, read_csv_with_graph
+from proj_kbest import PlanEnumerator
+from proj_layout import LayoutEngine
+from proj_loader import XLS_FILES, load_catalogs
+from proj_objects import CourseGraph
+from proj_prereq_parser import PARSE_CACHE, parse_prereq
+from proj_query_cache import QueryCache
+from proj_scheduler import schedule_courses
+from proj_server import run_load_test
+from proj_snapshot import load_snapshot, save_snapshot
+
+CATALOG_FILES = ['combined_math_cs_sta.csv', 'modified_cs.csv', 'modified_math.csv', 'modified_sta.csv']
+# the packages that take long to import, and that only drawing the graph or opening a window needs
+HEAVY_MODULES = ['matplotlib', 'networkx', 'numpy', 'PIL', 'tkinter']
+# the longest each module of the program may take to import in a new interpreter, in milliseconds; a few times what
+# it takes on a laptop, since importing any of HEAVY_MODULES alone takes longer
+IMPORT_BUDGET_MS = {'proj_objects': 100, 'proj_generate_graph': 100, 'proj_loader': 200, 'main': 250}
+
+
+def read_prereq_strings(filenames: list[str]) -> list[str]:
+    """return the prerequisite column of every row of the given csv files."""
+    lst = []
+    for filename in filenames:
+        with open(filename, encoding='utf-8-sig') as file:
+            for line in csv.reader(file):
+                if len(line) > 1:
+                    lst.append(line[1])
+    return lst
+
+
+def split_compute_prereq(prereq_str: str) -> list:
+    """
+    The split/replace based version of proj_generate_graph.compute_prereq that the parser replaced, kept as the
+    baseline of benchmark_parser.
+
+    preconditions:
+    - prerequisite should be in the right format that contains only the exact courses and the minimum grade requirement
+    of the courses(if any).
+    """
+    if len(prereq_str) < 5:
+        return []
+    prereqs = []
+    prereq_options = prereq_str.split('/ ')
+    for option in prereq_options:
+        course_reqs = []
+        for req in option.split(','):
+            if '(' in req:
+                req = req.replace("(", "")
+            if ')' in req:
+                req = req.replace(")", "")
+            req = req.strip()
+            if '/' not in req:
+                if '%' in req:
+                    parts = req.split(' or higher in ')
+                    course_code = parts[-1]
+                    required_grade = int(parts[0].replace('%', ''))
+                    course_reqs.append({course_code: required_grade})
+                else:
+                    course_reqs.append({req: 50})
+            else:
+                req_option = req.split('/')
+                lst_option = []
+                parts = req_option[0].split(' or higher in ')
+                required_grade = int(parts[0].replace('%', ''))
+                req_option.pop(0)
+                req_option.append(parts[-1])
+                for r in req_option:
+                    lst_option.append({r: required_grade})
+                course_reqs.append(tuple(lst_option))
+        if len(course_reqs) > 1:
+            course_reqs = tuple(course_reqs)
+        else:
+            while not (isinstance(course_reqs, dict) or isinstance(course_reqs, tuple)):
+                course_reqs = course_reqs.pop()
+        prereqs.append(course_reqs)
+    return prereqs
+
+
+def benchmark_parser(filenames: list[str] = None, repeat: int = 5) -> dict[str, float]:
+    """return the throughput, in prerequisite strings per second, of parse_prereq and of the old split based parser
+    on the prerequisite strings of the bundled csv files. Each figure is the best of repeat runs."""
+    strings = read_prereq_strings(filenames or CATALOG_FILES)
+    results = {}
+    for name, function in [('split_compute_prereq', split_compute_prereq), ('parse_prereq', parse_prereq)]:
+        best = min(timeit.repeat(lambda f=function: [f(s) for s in strings], number=20, repeat=repeat))
+        results[name] = 20 * len(strings) / best
+    return results
+
+
+def benchmark_catalog_load(filename: str = 'combined_math_cs_sta.csv') -> dict[str, float]:
+    """return the time in milliseconds read_csv takes on filename with an empty parse cache, and when loading the
+    same file again, together with the hit rate of the cache in the second load."""
+    PARSE_CACHE.clear()
+    start = time.perf_counter()
+    read_csv(filename)
+    cold = time.perf_counter() - start
+    PARSE_CACHE.hits = PARSE_CACHE.misses = 0
+    start = time.perf_counter()
+    read_csv(filename)
+    warm = time.perf_counter() - start
+    return {'cold load (ms)': cold * 1000, 'reload (ms)': warm * 1000, 'reload cache hit rate': PARSE_CACHE.hit_rate()}
+
+
+def benchmark_snapshot(filename: str = 'combined_math_cs_sta.csv', repeat: int = 5) -> dict[str, float]:
+    """return the best time in milliseconds of building the graph of filename from the csv file with an empty
+    parse cache, and of loading it from a snapshot, together with the size of the snapshot in bytes."""
+    def from_csv() -> None:
+        PARSE_CACHE.clear()
+        read_csv(filename)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'graph.cgsnap')
+        save_snapshot(read_csv(filename), path)
+        results = {'csv (ms)': min(timeit.repeat(from_csv, number=1, repeat=repeat)) * 1000,
+                   'snapshot (ms)': min(timeit.repeat(lambda: load_snapshot(path), number=1, repeat=repeat)) * 1000,
+                   'snapshot size (bytes)': os.path.getsize(path)}
+    return results
+
+
+def replicate_graph(graph: CourseGraph, copies: int) -> CourseGraph:
+    """return a graph made of copies disjoint copies of graph, where every department code of each copy is replaced
+    by a new three-letter code, to benchmark catalogs larger than the bundled one."""
+    departments = {}
+
+    def rename(name: str, copy: int) -> str:
+        key = (name[:3], copy)
+        if key not in departments:
+            n = len(departments)
+            departments[key] = ''.join(string.ascii_uppercase[n // 26 ** i % 26] for i in (2, 1, 0))
+        return departments[key] + name[3:]
+
+    def rename_prereq(prereq: list | tuple, copy: int) -> list | tuple:
+        return type(prereq)({rename(key, copy): value for key, value in item.items()} if isinstance(item, dict)
+                            else rename_prereq(item, copy) for item in prereq)
+
+    big = CourseGraph()
+    for copy in range(copies):
+        for name, course in graph.courses.items():
+            big.add_course(rename(name, copy), course.key_words)
+        for name, course in graph.courses.items():
+            big.add_edge(rename(name, copy), rename_prereq(course.prereq, copy), check_cycles=False)
+    return big
+
+
+def measure_memory(build: Callable[[], object]) -> tuple[object, int]:
+    """return the object built by build and the number of bytes allocated for it that are still in use."""
+    tracemalloc.start()
+    try:
+        obj = build()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return obj, size
+
+
+def benchmark_compact(copies: int = 50) -> dict[str, float]:
+    """compare the object form of CourseGraph with CompactCourseGraph on copies copies of the bundled catalog:
+    the memory held by the courses and prerequisites (without the keyword index of CourseGraph), the time to
+    compute the cost of every course from an empty cost table, and the time to find all prerequisites of every
+    course."""
+    graph = replicate_graph(read_csv('combined_math_cs_sta.csv'), copies)
+    names = list(graph.courses)
+    _, object_bytes = measure_memory(lambda: CompactCourseGraph(graph).to_graph().courses)
+    compact, compact_bytes = measure_memory(lambda: CompactCourseGraph(graph))
+
+    def all_costs(g: CourseGraph | CompactCourseGraph) -> None:
+        g._cost_table = {}
+        for name in names:
+            g.compute_cost(name)
+
+    results = {'courses': len(names), 'object form (KiB)': object_bytes / 1024,
+               'compact form (KiB)': compact_bytes / 1024}
+    for label, g in [('object', graph), ('compact', compact)]:
+        results[f'{label} all costs (ms)'] = min(timeit.repeat(lambda: all_costs(g), number=1, repeat=3)) * 1000
+        results[f'{label} all prerequisites (ms)'] = min(timeit.repeat(
+            lambda: [g.find_all_prereq(name) for name in names], number=1, repeat=3)) * 1000
+    return results
+
+
+def benchmark_loader(filenames: list[str] = None, workers: int = None) -> dict[str, float]:
+    """return the time in milliseconds to load all of filenames into one graph by chaining read_csv_with_graph, and
+    by load_catalogs in this process and with a pool of workers, each with an empty parse cache in this process."""
+    filenames = filenames or CATALOG_FILES
+
+    def chained() -> None:
+        PARSE_CACHE.clear()
+        graph = read_csv(filenames[0])
+        for filename in filenames[1:]:
+            read_csv_with_graph(filename, graph)
+
+    def loader(n: int) -> None:
+        PARSE_CACHE.clear()
+        load_catalogs(filenames, workers=n)
+
+    return {'read_csv_with_graph (ms)': min(timeit.repeat(chained, number=1, repeat=3)) * 1000,
+            'load_catalogs inline (ms)': min(timeit.repeat(lambda: loader(1), number=1, repeat=3)) * 1000,
+            'load_catalogs pool (ms)': min(timeit.repeat(lambda: loader(workers or os.cpu_count()),
+                                                         number=1, repeat=3)) * 1000}
+
+
+def benchmark_eligibility(filename: str = 'combined_math_cs_sta.csv', students: int = 2000,
+                          taken: int = 12) -> dict[str, float]:
+    """return how many random transcripts of taken courses per second eligible_courses answers on filename, and how
+    many prerequisite expressions one added grade re-evaluates on average, against the size of the catalog."""
+    graph = read_csv(filename)
+    names = list(graph.courses)
+    rng = random.Random(0)
+    transcripts = [{name: rng.randint(50, 100) for name in rng.sample(names, taken)} for _ in range(students)]
+    best = min(timeit.repeat(lambda: [eligible_courses(graph, t) for t in transcripts], number=1, repeat=3))
+    engine = EligibilityEngine(graph, transcripts[0])
+    engine.evaluations = 0
+    for name in names:
+        engine.set_grade(name, 100)
+    return {'students/s': students / best, 'evaluations per added grade': engine.evaluations / len(names),
+            'courses': len(names)}
+
+
+def benchmark_batch(filename: str = 'combined_math_cs_sta.csv', students: int = 10000, taken: int = 12,
+                    target: str = 'CSC373H1') -> dict[str, float]:
+    """return the time in milliseconds BatchEvaluator takes to find the eligible courses and the remaining cost of
+    target for a batch of random transcripts, against answering the same students one at a time with
+    eligible_courses."""
+    graph = read_csv(filename)
+    names = list(graph.courses)
+    rng = random.Random(0)
+    transcripts = [{name: rng.randint(50, 100) for name in rng.sample(names, taken)} for _ in range(students)]
+    batch = BatchEvaluator(graph)
+    batch.evaluate(transcripts[:1], target)
+    return {'students': students,
+            'batch evaluate (ms)': min(timeit.repeat(lambda: batch.evaluate(transcripts, target),
+                                                     number=1, repeat=3)) * 1000,
+            'one at a time eligibility (ms)': min(timeit.repeat(
+                lambda: [eligible_courses(graph, t) for t in transcripts], number=1, repeat=3)) * 1000}
+
+
+def benchmark_scheduler(copies: int = 3) -> dict[str, float]:
+    """return the time in milliseconds schedule_courses takes to schedule every course of copies copies of the
+    bundled catalog, with every course offered in the fall only, as a stress test far larger than any plan."""
+    graph = replicate_graph(read_csv('combined_math_cs_sta.csv'), copies)
+    courses = graph.topological_order()
+    offerings = {course: ['Fall'] for course in courses[::2]}
+    terms = schedule_courses(graph, courses, offerings=offerings)
+    best = min(timeit.repeat(lambda: schedule_courses(graph, courses, offerings=offerings), number=1, repeat=3))
+    return {'courses': len(courses), 'terms': len(terms), 'schedule (ms)': best * 1000}
+
+
+def benchmark_kbest(filename: str = 'combined_math_cs_sta.csv', k: int = 10) -> dict[str, float]:
+    """return the time in milliseconds to find the k cheapest plans of every course of filename with one
+    PlanEnumerator, against computing the single cheapest plan of every course."""
+    graph = read_csv(filename)
+    names = list(graph.courses)
+
+    def cheapest() -> None:
+        graph._cost_table = {}
+        graph.compute_all_costs()
+
+    def k_cheapest() -> None:
+        plans = PlanEnumerator(graph)
+        for name in names:
+            plans.k_cheapest(name, k)
+
+    return {f'{k} cheapest plans of all courses (ms)': min(timeit.repeat(k_cheapest, number=1, repeat=3)) * 1000,
+            'cheapest plan of all courses (ms)': min(timeit.repeat(cheapest, number=1, repeat=3)) * 1000}
+
+
+def benchmark_remaining_cost(filename: str = 'combined_math_cs_sta.csv', completed: int = 30) -> dict[str, float]:
+    """return the time in microseconds per course of compute_remaining_cost for one random set of completed courses,
+    when the costs for that set are not known yet and when they were computed by an earlier query."""
+    graph = read_csv(filename)
+    names = list(graph.courses)
+    done = set(random.Random(0).sample(names, completed))
+
+    def all_courses() -> float:
+        start = time.perf_counter()
+        for name in names:
+            graph.compute_remaining_cost(name, done)
+        return (time.perf_counter() - start) / len(names) * 10 ** 6
+
+    return {'first query (us/course)': all_courses(), 'repeated query (us/course)': all_courses()}
+
+
+def benchmark_diff(copies: int = 20, edits: int = 10) -> dict[str, float]:
+    """return the time in milliseconds to diff copies of the catalog against themselves with a few prerequisites
+    replaced, with the number of courses whose cost or prerequisite set changed."""
+    old = replicate_graph(read_csv('combined_math_cs_sta.csv'), copies)
+    new = replicate_graph(read_csv('combined_math_cs_sta.csv'), copies)
+    rng = random.Random(0)
+    names = list(new.courses)
+    for course in rng.sample(names, edits):
+        new.replace_prereq(course, [])
+    start = time.perf_counter()
+    diff = diff_graphs(old, new)
+    return {'courses': len(names), 'diff (ms)': (time.perf_counter() - start) * 1000,
+            'stale courses': len(diff.stale_courses())}
+
+
+def benchmark_server(requests: int = 5000, concurrency: int = 16) -> dict[str, float]:
+    """return the latency and throughput of a local proj_server instance under load, see proj_server.run_load_test."""
+    return run_load_test(requests=requests, concurrency=concurrency)
+
+
+def benchmark_query_cache(filename: str = 'combined_math_cs_sta.csv', queries: int = 20000,
+                          max_entries: int = 256) -> dict[str, float]:
+    """return the time in microseconds per query of find_all_prereq asked directly and through a QueryCache of
+    max_entries results, for queries drawn from a skewed distribution where a few courses are asked most often,
+    with the hit rate and the memory size of the cache."""
+    graph = read_csv(filename)
+    names = list(graph.courses)
+    rng = random.Random(0)
+    workload = [names[min(len(names) - 1, int(rng.expovariate(1 / 20)))] for _ in range(queries)]
+    cache = QueryCache(graph, max_entries)
+    direct = timeit.timeit(lambda: [graph.find_all_prereq(name) for name in workload], number=1)
+    cached = timeit.timeit(lambda: [cache.find_all_prereq(name) for name in workload], number=1)
+    return {'direct (us/query)': direct / queries * 10 ** 6, 'cached (us/query)': cached / queries * 10 ** 6,
+            'hit rate': cache.hit_rate(), 'memory (bytes)': cache.memory_size()}
+
+
+def benchmark_layout(filename: str = 'combined_math_cs_sta.csv', course: str = 'CSC373H1') -> dict[str, float]:
+    """return the time in milliseconds of the layered layout of the whole catalog, computed and read back from its
+    file, and of the positions of the prerequisites of course taken from it, against a spring layout of the same
+    courses."""
+    import networkx as nx
+
+    graph = read_csv(filename)
+    nodes = graph.find_all_prereq(course) + [course]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'layout.json')
+        computed = timeit.timeit(lambda: LayoutEngine(graph, path).positions(), number=1)
+        read = timeit.timeit(lambda: LayoutEngine(graph, path).positions(), number=1)
+        engine = LayoutEngine(graph, path)
+        engine.positions()
+        subgraph = timeit.timeit(lambda: engine.subgraph(nodes), number=10) / 10
+    spring = timeit.timeit(lambda: nx.spring_layout(graph_of(graph, nodes)), number=10) / 10
+    return {'whole catalog, computed (ms)': computed * 1000, 'whole catalog, read (ms)': read * 1000,
+            'subgraph from layout (ms)': subgraph * 1000, 'subgraph spring layout (ms)': spring * 1000}
+
+
+def graph_of(graph: CourseGraph, nodes: list[str]) -> 'nx.DiGraph':
+    """return the networkx graph of the prerequisite links between nodes."""
+    import networkx as nx
+
+    g = nx.DiGraph()
+    g.add_nodes_from(nodes)
+    g.add_edges_from((name, higher) for name in nodes for higher in graph.courses[name].higher_courses
+                     if higher in g)
+    return g
+
+
+def measure_import(module: str) -> tuple[float, list[str]]:
+    """return the time in milliseconds to import module in a new interpreter, as measured by python -X importtime,
+    and the sorted HEAVY_MODULES this import loaded."""
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], capture_output=True,
+                             text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    # each line reads "import time: <self us> | <cumulative us> | <indented module name>"
+    elapsed, loaded = 0.0, set()
+    for line in process.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        name = fields[2].strip()
+        if name == module:
+            elapsed = int(fields[1]) / 1000
+        if name.split('.')[0] in HEAVY_MODULES:
+            loaded.add(name.split('.')[0])
+    return elapsed, sorted(loaded)
+
+
+def heavy_imports(module: str) -> list[str]:
+    """return the sorted HEAVY_MODULES loaded by importing module in a new interpreter.
+
+    >>> heavy_imports('main'), heavy_imports('proj_interaction_visualization'), heavy_imports('proj_tk_tasks')
+    ([], [], [])
+    """
+    return measure_import(module)[1]
+
+
+def benchmark_import_time(modules: list[str] = None, repeat: int = 3) -> dict[str, float]:
+    """return the best time in milliseconds of repeat imports of each of modules (the modules of IMPORT_BUDGET_MS by
+    default), each in a new interpreter."""
+    return {module: min(measure_import(module)[0] for _ in range(repeat))
+            for module in modules or list(IMPORT_BUDGET_MS)}
+
+
+def check_imports(budgets: dict[str, float] = None) -> list[str]:
+    """return a description of every module of budgets (IMPORT_BUDGET_MS by default) that imports one of
+    HEAVY_MODULES or takes longer than its budget to import, in milliseconds."""
+    budgets = budgets or IMPORT_BUDGET_MS
+    problems = [f'{module} imports {", ".join(heavy)}' for module in budgets if (heavy := heavy_imports(module))]
+    for module, elapsed in benchmark_import_time(list(budgets)).items():
+        if elapsed > budgets[module]:
+            problems.append(f'{module} takes {elapsed:.1f} ms to import, over its budget of {budgets[module]} ms')
+    return problems
+
+
+def print_results(title: str, results: dict[str, float], unit: str) -> None:
+    """print one benchmark result per line."""
+    print(title)
+    for name, value in results.items():
+        print(f'  {name:<30} {value:>14,.1f} {unit}')
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['imports']:
+        print_results('import time', benchmark_import_time(), 'ms')
+        failures = check_imports()
+        for failure in failures:
+            print(f'FAIL {failure}')
+        sys.exit(1 if failures else 0)
+    print_results('import time', benchmark_import_time(), 'ms')
+    print_results('prerequisite parsing', benchmark_parser(), 'strings/s')
+    print_results('catalog loading', benchmark_catalog_load(), '')
+    print_results('startup', benchmark_snapshot(), '')
+    print_results('object vs compact graph', benchmark_compact(), '')
+    print_results('eligibility', benchmark_eligibility(), '')
+    print_results('batch evaluation', benchmark_batch(), '')
+    print_results('scheduling', benchmark_scheduler(), '')
+    print_results('k cheapest plans', benchmark_kbest(), '')
+    print_results('remaining cost', benchmark_remaining_cost(), '')
+    print_results('catalog diff', benchmark_diff(), '')
+    print_results('query cache', benchmark_query_cache(), '')
+    print_results('layout', benchmark_layout(), '')
+    print_results('query server', benchmark_server(), '')
+    print_results('multi-file loading', benchmark_loader(), '')
+    for file_stats in load_catalogs(CATALOG_FILES)[1]:
+        print(f'  {file_stats}')
+    print('.xls loading')
+    for file_stats in load_catalogs(XLS_FILES)[1]:
+        print(f'  {file_stats}')
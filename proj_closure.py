@@ -0,0 +1,224 @@
+"""Transitive closure of the prerequisite relation of a CourseGraph, stored as one bitset per course, so that
+questions like "is A a (direct or indirect) prerequisite of B" do not need to walk the graph."""
+from proj_objects import COURSE_ADDED, KEYWORDS_CHANGED, PREREQ_CHANGED, CourseGraph, GraphChange, \
+    PrerequisiteCycleError
+
+
+class PrereqClosure:
+    """
+    A snapshot of all direct and indirect prerequisite relations of a CourseGraph.
+
+    names: all courses of the graph, in topological order (every course comes after its prerequisites).
+    ids: the inverse of names, mapping each course to its index, which is also its bit in the bitsets.
+
+    The bitsets are plain python ints: bit i of self._ancestors[j] is set if and only if names[i] is a direct or
+    indirect prerequisite of names[j], and bit i of self._descendants[j] is set if and only if names[j] is a direct
+    or indirect prerequisite of names[i]. The closure only follows later changes to the graph after self.watch.
+
+    >>> g = CourseGraph()
+    >>> g.add_edge('CSC236H1', [({'CSC148H1': 50}, {'CSC165H1': 50})])
+    >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}, {'CSC111H1': 70}])
+    >>> g.add_edge('CSC165H1', [{'CSC108H1': 50}])
+    >>> closure = PrereqClosure(g)
+    >>> closure.ancestors('CSC236H1')
+    ['CSC108H1', 'CSC111H1', 'CSC148H1', 'CSC165H1']
+    >>> closure.descendants('CSC108H1')
+    ['CSC148H1', 'CSC165H1', 'CSC236H1']
+    >>> closure.is_prereq('CSC108H1', 'CSC236H1'), closure.is_prereq('CSC236H1', 'CSC108H1')
+    (True, False)
+    """
+    names: list[str]
+    ids: dict[str, int]
+    _ancestors: list[int]
+    _descendants: list[int]
+    # whether a change made while watching left the graph with a cycle, so that the closure must be computed again
+    # before the next query
+    _stale: bool
+
+    def __init__(self, graph: CourseGraph) -> None:
+        self._graph = graph
+        self._stale = False
+        self._build()
+
+    def _build(self) -> None:
+        """compute the closure of the whole graph."""
+        graph = self._graph
+        self.names = graph.topological_order()
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        ids = self.ids
+
+        # every prerequisite comes before the course itself, so one forward sweep finds all ancestors...
+        self._ancestors = [0] * len(self.names)
+        for i, name in enumerate(self.names):
+            mask = 0
+            for pre in graph._prereq_names(graph.courses[name].prereq):
+                j = ids[pre]
+                mask |= self._ancestors[j] | (1 << j)
+            self._ancestors[i] = mask
+
+        # ...and one sweep in reverse topological order finds all descendants.
+        self._descendants = [0] * len(self.names)
+        for i in range(len(self.names) - 1, -1, -1):
+            mask = 0
+            for higher in graph.courses[self.names[i]].higher_courses:
+                j = ids[higher]
+                mask |= self._descendants[j] | (1 << j)
+            self._descendants[i] = mask
+
+    def watch(self) -> None:
+        """keep the closure up to date with the changes made to the graph from now on. A change of the
+        prerequisites of a course only recomputes the ancestors of the course and of the courses depending on it,
+        and the descendants of its old and new prerequisites. The whole closure is only computed again when a
+        course is removed or given a prerequisite that was added to the graph after it.
+
+        A change giving the graph a prerequisite cycle (see CourseGraph.add_edge with check_cycles=False) does not
+        raise from the listener: the closure is computed again at the next query instead, which raises
+        PrerequisiteCycleError while the cycle remains.
+
+        >>> g = CourseGraph()
+        >>> g.add_edge('CSC236H1', [{'CSC148H1': 50}])
+        >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}])
+        >>> g.add_course('CSC165H1')
+        >>> closure = PrereqClosure(g)
+        >>> closure.watch()
+        >>> g.replace_prereq('CSC148H1', [{'CSC165H1': 60}])
+        >>> closure.ancestors('CSC236H1'), closure.descendants('CSC108H1'), closure.descendants('CSC165H1')
+        (['CSC165H1', 'CSC148H1'], [], ['CSC148H1', 'CSC236H1'])
+        >>> g.add_edge('CSC165H1', [{'CSC236H1': 50}], check_cycles=False)
+        >>> closure.ancestors('CSC236H1')
+        Traceback (most recent call last):
+        ...
+        proj_objects.PrerequisiteCycleError: prerequisite cycle: CSC236H1 -> CSC148H1 -> CSC165H1 -> CSC236H1
+        >>> g.replace_prereq('CSC165H1', [])
+        >>> closure.ancestors('CSC236H1')
+        ['CSC165H1', 'CSC148H1']
+        """
+        self._graph.subscribe(self._update)
+
+    def unwatch(self) -> None:
+        """stop following the changes to the graph."""
+        self._graph.unsubscribe(self._update)
+
+    def _update(self, change: GraphChange) -> None:
+        """update the closure after change, or mark it stale if change made a cycle."""
+        if self._stale:
+            return
+        try:
+            self._apply(change)
+        except PrerequisiteCycleError:
+            self._stale = True
+
+    def _check(self) -> None:
+        """compute the closure again if it is stale, raising PrerequisiteCycleError if the graph has a cycle."""
+        if self._stale:
+            self._build()
+            self._stale = False
+
+    def _apply(self, change: GraphChange) -> None:
+        """the body of self._update."""
+        graph = self._graph
+        if change.kind == COURSE_ADDED:
+            self.ids[change.course] = len(self.names)
+            self.names.append(change.course)
+            self._ancestors.append(0)
+            self._descendants.append(0)
+        elif change.kind == PREREQ_CHANGED:
+            i = self.ids[change.course]
+            if any(self.ids[pre] > i for pre in graph._prereq_names(graph.courses[change.course].prereq)):
+                # the ids would no longer be in topological order
+                self._build()
+                return
+            old = self._ancestors[i]
+            # ids are in topological order, so going up in ids recomputes prerequisites first
+            for j in sorted(self.ids[name] for name in graph.dependants(change.course)):
+                mask = 0
+                for pre in graph._prereq_names(graph.courses[self.names[j]].prereq):
+                    k = self.ids[pre]
+                    mask |= self._ancestors[k] | (1 << k)
+                self._ancestors[j] = mask
+            changed = old | self._ancestors[i]
+            for j in sorted((k for k in range(changed.bit_length()) if changed >> k & 1), reverse=True):
+                mask = 0
+                for higher in graph.courses[self.names[j]].higher_courses:
+                    k = self.ids[higher]
+                    mask |= self._descendants[k] | (1 << k)
+                self._descendants[j] = mask
+        elif change.kind != KEYWORDS_CHANGED:
+            self._build()
+
+    def ancestor_mask(self, course: str) -> int:
+        """return the bitset of all direct and indirect prerequisites of course."""
+        self._check()
+        return self._ancestors[self.ids[course]]
+
+    def descendant_mask(self, course: str) -> int:
+        """return the bitset of all courses that have course as a direct or indirect prerequisite."""
+        self._check()
+        return self._descendants[self.ids[course]]
+
+    def ancestors(self, course: str) -> list[str]:
+        """return all direct and indirect prerequisites of course, in topological order."""
+        self._check()
+        return self.decode(self._ancestors[self.ids[course]])
+
+    def descendants(self, course: str) -> list[str]:
+        """return all courses that have course as a direct or indirect prerequisite, in topological order."""
+        self._check()
+        return self.decode(self._descendants[self.ids[course]])
+
+    def is_prereq(self, course1: str, course2: str) -> bool:
+        """return whether course1 is a direct or indirect prerequisite of course2."""
+        self._check()
+        return bool(self._ancestors[self.ids[course2]] >> self.ids[course1] & 1)
+
+    def decode(self, mask: int) -> list[str]:
+        """return the courses whose bits are set in mask, in topological order."""
+        self._check()
+        bits = bin(mask)[:1:-1]
+        return [self.names[i] for i, bit in enumerate(bits) if bit == '1']
+
+    def find_all_prereq(self, course: str) -> list:
+        """return the same courses as CourseGraph.find_all_prereq, in the same order: every direct or indirect
+        prerequisite of course exactly once, ordered by its first appearance in a depth-first walk of the
+        prerequisites. The walk stops as soon as every prerequisite recorded in the closure has been found.
+
+        >>> g = CourseGraph()
+        >>> g.add_edge('CSC236H1', [({'CSC148H1': 50}, {'CSC165H1': 50})])
+        >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}])
+        >>> g.add_edge('CSC165H1', [{'CSC108H1': 50}])
+        >>> PrereqClosure(g).find_all_prereq('CSC236H1')
+        ['CSC148H1', 'CSC108H1', 'CSC165H1']
+        """
+        self._check()
+        remaining = self._ancestors[self.ids[course]]
+        ids = self.ids
+        courses = self._graph.courses
+        lst = []
+        stack = [self._graph._prereq_names(courses[course].prereq)]
+        while stack and remaining:
+            name = next(stack[-1], None)
+            if name is None:
+                stack.pop()
+            elif remaining >> ids[name] & 1:
+                remaining &= ~(1 << ids[name])
+                lst.append(name)
+                stack.append(self._graph._prereq_names(courses[name].prereq))
+        return lst
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['proj_objects'],
+        'disable': ['E9969', 'R1702', 'R1701', 'R0912', 'W0212']
+    })
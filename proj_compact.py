@@ -0,0 +1,258 @@
+"""A compact, array-backed form of CourseGraph for large catalogs: course codes are interned to integer ids, and
+the higher courses and prerequisite expressions are stored in flat typed arrays instead of one Course object with
+its own list, set and dicts per course."""
+from array import array
+from typing import Iterator
+
+from proj_objects import Course, CourseGraph, PrerequisiteCycleError
+
+# kinds of prerequisite expression nodes: a {course: grade} dict, a list (any one of the children) or a tuple (all
+# of the children)
+LEAF, ANY, ALL = 0, 1, 2
+
+
+class CompactCourseGraph:
+    """
+    A read-only CourseGraph stored in flat arrays.
+
+    names: the course codes, where the id of a course is its index.
+    ids: the inverse of names.
+    keywords: the keywords of each course.
+    is_year: 1 for each year course and 0 for each half year course.
+
+    higher_offsets, higher_ids: the higher courses of the course with id i are
+        higher_ids[higher_offsets[i]:higher_offsets[i + 1]] (CSR, compressed sparse row form).
+    node_kind, node_course, node_grade: the kind of each prerequisite expression node, and the course id and minimum
+        grade of each LEAF node (-1 and 0 for the other nodes).
+    child_offsets, child_ids: the children of node j are child_ids[child_offsets[j]:child_offsets[j + 1]].
+    root: the node holding Course.prereq of each course, which is always an ANY node.
+    leaf_offsets, leaf_ids: the ids of the courses mentioned in the prerequisites of the course with id i are
+        leaf_ids[leaf_offsets[i]:leaf_offsets[i + 1]], in order, so that traversals need not walk the expressions.
+
+    >>> g = CourseGraph()
+    >>> g.add_course('CSC148H1', 'introduction to computer science')
+    >>> g.add_edge('CSC148H1', [({'CSC108H1': 60}, [{'MAT137Y1': 50}, {'MAT157Y1': 50}]), {'CSC111H1': 70}])
+    >>> compact = CompactCourseGraph(g)
+    >>> compact.compute_cost('CSC148H1') == g.compute_cost('CSC148H1')
+    True
+    >>> compact.find_all_prereq('CSC148H1')
+    ['CSC108H1', 'MAT137Y1', 'MAT157Y1', 'CSC111H1']
+    >>> compact.to_graph().courses['CSC148H1'].prereq == g.courses['CSC148H1'].prereq
+    True
+    """
+    names: list[str]
+    ids: dict[str, int]
+    keywords: list[str]
+    is_year: array
+    higher_offsets: array
+    higher_ids: array
+    node_kind: array
+    node_course: array
+    node_grade: array
+    child_offsets: array
+    child_ids: array
+    root: array
+    leaf_offsets: array
+    leaf_ids: array
+    # the (cost, plan) of each course id computed so far by self.compute_cost
+    _cost_table: dict[int, tuple[float, tuple[int, ...]]]
+
+    def __init__(self, graph: CourseGraph) -> None:
+        self.names = list(graph.courses)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        self.keywords = [course.key_words for course in graph.courses.values()]
+        self.is_year = array('b', (graph.is_year_course(name) for name in self.names))
+
+        self.higher_offsets = array('I', [0])
+        self.higher_ids = array('I')
+        for course in graph.courses.values():
+            self.higher_ids.extend(sorted(self.ids[name] for name in course.higher_courses))
+            self.higher_offsets.append(len(self.higher_ids))
+
+        self.node_kind, self.node_course, self.node_grade = array('b'), array('i'), array('H')
+        self.child_offsets, self.child_ids = array('I', [0]), array('I')
+        self.root = array('I', (self._add_node(course.prereq) for course in graph.courses.values()))
+
+        self.leaf_offsets, self.leaf_ids = array('I', [0]), array('I')
+        for node in self.root:
+            self.leaf_ids.extend(self._leaf_courses(node))
+            self.leaf_offsets.append(len(self.leaf_ids))
+        self._cost_table = {}
+
+    def _add_node(self, item: dict | list | tuple) -> int:
+        """add the nodes of the prerequisite expression item, children first, and return the id of its node."""
+        if isinstance(item, dict):
+            name, grade = next(iter(item.items()))
+            self.node_kind.append(LEAF)
+            self.node_course.append(self.ids[name])
+            self.node_grade.append(grade)
+        else:
+            children = [self._add_node(child) for child in item]
+            self.node_kind.append(ANY if isinstance(item, list) else ALL)
+            self.node_course.append(-1)
+            self.node_grade.append(0)
+            self.child_ids.extend(children)
+        self.child_offsets.append(len(self.child_ids))
+        return len(self.node_kind) - 1
+
+    def to_graph(self) -> CourseGraph:
+        """return the same graph in the object form of CourseGraph."""
+        graph = CourseGraph()
+        for i, name in enumerate(self.names):
+            graph.add_course(name, self.keywords[i])
+        for i, name in enumerate(self.names):
+            course = graph.courses[name]
+            course.prereq = self._to_prereq(self.root[i])
+            course.higher_courses = {self.names[j] for j in self.higher(i)}
+        return graph
+
+    def _to_prereq(self, node: int) -> dict | list | tuple:
+        """return the object form of the prerequisite expression at node."""
+        if self.node_kind[node] == LEAF:
+            return {self.names[self.node_course[node]]: self.node_grade[node]}
+        children = [self._to_prereq(child) for child in self.children(node)]
+        return children if self.node_kind[node] == ANY else tuple(children)
+
+    def children(self, node: int) -> array:
+        """return the child nodes of node."""
+        return self.child_ids[self.child_offsets[node]:self.child_offsets[node + 1]]
+
+    def higher(self, course_id: int) -> array:
+        """return the ids of the higher courses of the course with id course_id."""
+        return self.higher_ids[self.higher_offsets[course_id]:self.higher_offsets[course_id + 1]]
+
+    def _leaf_courses(self, node: int) -> Iterator[int]:
+        """yield the course id of every leaf under node, in order."""
+        for child in self.children(node):
+            if self.node_kind[child] == LEAF:
+                yield self.node_course[child]
+            else:
+                yield from self._leaf_courses(child)
+
+    def prereq_ids(self, course_id: int) -> array:
+        """return the ids of the courses mentioned in the prerequisites of the course with id course_id, in
+        order."""
+        return self.leaf_ids[self.leaf_offsets[course_id]:self.leaf_offsets[course_id + 1]]
+
+    def compute_cost(self, course: str) -> tuple[float, list[str]]:
+        """return what CourseGraph.compute_cost returns for course, computed on the arrays."""
+        course_id = self.ids[course]
+        if course_id not in self._cost_table:
+            self._fill_cost_table(course_id)
+        cost, plan = self._cost_table[course_id]
+        return (cost, [self.names[i] for i in plan])
+
+    def _fill_cost_table(self, start: int) -> None:
+        """compute the cost of start and every prerequisite missing from the cost table, prerequisites first. Raise
+        PrerequisiteCycleError if a cycle is found."""
+        table = self._cost_table
+        stack = [(start, iter(self.prereq_ids(start)))]
+        on_stack = {start}
+        while stack:
+            course_id, pending = stack[-1]
+            pre = next(pending, None)
+            if pre is None:
+                stack.pop()
+                on_stack.discard(course_id)
+                cost = 0
+                cost += 1 if self.is_year[course_id] else 0.5
+                if not len(self.children(self.root[course_id])):
+                    table[course_id] = (cost, ())
+                else:
+                    min_courses = self._cost_of(self.root[course_id])
+                    cost += min_courses[0]
+                    table[course_id] = (cost, tuple(min_courses[1]))
+            elif pre in on_stack:
+                path = [self.names[c] for c, _ in stack]
+                raise PrerequisiteCycleError(path[path.index(self.names[pre]):] + [self.names[pre]])
+            elif pre not in table:
+                on_stack.add(pre)
+                stack.append((pre, iter(self.prereq_ids(pre))))
+
+    def _cost_of(self, node: int) -> tuple[float, list[int]]:
+        """return the cost and plan of the expression at node, like CourseGraph.compute_list for an ANY node and
+        CourseGraph.compute_tuple for an ALL node."""
+        children = self.children(node)
+        if not children:
+            return (0.0, [])
+        if self.node_kind[node] == ALL:
+            cost = 0
+            lst = []
+            for child in children:
+                if self.node_kind[child] == LEAF:
+                    new = self._cost_table[self.node_course[child]]
+                else:
+                    new = self._cost_of(child)
+                lst.extend(new[1])
+                cost += new[0]
+            return (cost, lst)
+        best = None
+        for child in children:
+            cost = 0
+            lst = []
+            if self.node_kind[child] == LEAF:
+                lst.append(self.node_course[child])
+                new = self._cost_table[self.node_course[child]]
+            else:
+                new = self._cost_of(child)
+            lst.extend(new[1])
+            cost += new[0]
+            if best is None or cost < best[0]:
+                best = (cost, lst)
+        return best
+
+    def find_all_prereq(self, course: str) -> list:
+        """return what CourseGraph.find_all_prereq returns for course, computed on the arrays."""
+        seen = set()
+        lst = []
+        stack = [iter(self.prereq_ids(self.ids[course]))]
+        while stack:
+            pre = next(stack[-1], None)
+            if pre is None:
+                stack.pop()
+            elif pre not in seen:
+                seen.add(pre)
+                lst.append(self.names[pre])
+                stack.append(iter(self.prereq_ids(pre)))
+        return lst
+
+    def find_higher_courses(self, courses: list) -> list:
+        """return what CourseGraph.find_higher_courses returns for courses, computed on the arrays."""
+        lst = []
+        seen = set()
+        for course in courses:
+            for higher in sorted(self.names[i] for i in self.higher(self.ids[course])):
+                if higher not in seen:
+                    seen.add(higher)
+                    lst.append(higher)
+        return lst
+
+    def course_with_keywords(self, keywords: str) -> list:
+        """return all courses in the graph with the input keywords, scanning the keywords of every course."""
+        return [self.names[i] for i, text in enumerate(self.keywords) if keywords in text]
+
+    def to_course(self, course: str) -> Course:
+        """return a Course object for course, as it is stored in the object form."""
+        course_id = self.ids[course]
+        obj = Course(course, self.keywords[course_id])
+        obj.prereq = self._to_prereq(self.root[course_id])
+        obj.higher_courses = {self.names[j] for j in self.higher(course_id)}
+        return obj
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['array', 'proj_objects'],
+        'disable': ['E9969', 'R1702', 'R1701', 'R0912', 'R0902']
+    })
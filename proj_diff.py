@@ -0,0 +1,201 @@
+"""Differences between two versions of a catalog, each loaded into a CourseGraph: the courses added and removed, the
+courses whose prerequisites or keywords changed, and the courses whose cost (CourseGraph.compute_cost) or set of
+prerequisites (CourseGraph.find_all_prereq) changed as a consequence, which are the only cached results to recompute
+after a reload.
+
+Prerequisites are compared by structure, not as strings or nested lists: the order of the alternatives of a list and
+of the requirements of a tuple does not matter, and neither does a group holding a single item.
+
+Run this file with the old and the new catalog file as arguments to print their differences as JSON."""
+import json
+import sys
+from typing import Hashable, Iterable, Optional
+
+from proj_objects import CourseGraph, PrerequisiteCycleError
+
+# tags of the nodes of canonical_prereq
+ALL, ANY, COURSE = 'all', 'any', 'course'
+
+
+def canonical_prereq(prereq: dict | list | tuple) -> Hashable:
+    """return a hashable form of the prerequisite expression prereq, equal for two expressions exactly when they
+    require the same thing. A course is (COURSE, code, minimum grade), and a list or tuple is (ANY or ALL, frozenset
+    of its items), where items of the same kind are merged into it and a group of a single item is that item.
+
+    >>> canonical_prereq([{'CSC108H1': 60}, ({'CSC110Y1': 60}, [{'CSC111H1': 60}])]) \\
+    ...     == canonical_prereq([({'CSC111H1': 60}, {'CSC110Y1': 60}), [{'CSC108H1': 60}]])
+    True
+    >>> canonical_prereq([{'CSC108H1': 60}]) == canonical_prereq([{'CSC108H1': 70}])
+    False
+    >>> canonical_prereq([{'CSC108H1': 60}])
+    ('course', 'CSC108H1', 60.0)
+    """
+    if isinstance(prereq, dict):
+        if len(prereq) == 1:
+            name, grade = next(iter(prereq.items()))
+            return (COURSE, name, float(grade))
+        kind, items = ALL, [canonical_prereq({name: grade}) for name, grade in prereq.items()]
+    else:
+        kind, items = ANY if isinstance(prereq, list) else ALL, [canonical_prereq(item) for item in prereq]
+    merged = set()
+    for item in items:
+        if item[0] == kind:
+            merged.update(item[1])
+        else:
+            merged.add(item)
+    if len(merged) == 1:
+        return merged.pop()
+    return (kind, frozenset(merged))
+
+
+class CatalogDiff:
+    """
+    The differences between an old and a new CourseGraph. Every attribute is a sorted list of course codes.
+
+    added: the courses only in the new graph.
+    removed: the courses only in the old graph.
+    prereq_changed: the courses in both graphs whose prerequisites are different, see canonical_prereq.
+    keywords_changed: the courses in both graphs whose keywords are different.
+    cost_changed: the courses in both graphs for which CourseGraph.compute_cost returns a different minimum cost, or
+        which can be computed in one graph only because of a prerequisite cycle in the other. The plan alone is not
+        compared: among plans of the same cost, compute_cost takes the first one, which depends on the order of the
+        alternatives.
+    closure_changed: the courses in both graphs for which CourseGraph.find_all_prereq finds a different set of
+        courses.
+    """
+    added: list[str]
+    removed: list[str]
+    prereq_changed: list[str]
+    keywords_changed: list[str]
+    cost_changed: list[str]
+    closure_changed: list[str]
+
+    def __init__(self, added: list[str], removed: list[str], prereq_changed: list[str], keywords_changed: list[str],
+                 cost_changed: list[str], closure_changed: list[str]) -> None:
+        self.added = added
+        self.removed = removed
+        self.prereq_changed = prereq_changed
+        self.keywords_changed = keywords_changed
+        self.cost_changed = cost_changed
+        self.closure_changed = closure_changed
+
+    def is_empty(self) -> bool:
+        """return whether the two graphs describe the same catalog."""
+        return not (self.added or self.removed or self.prereq_changed or self.keywords_changed)
+
+    def stale_courses(self) -> list[str]:
+        """return the courses of the new graph whose cached costs or prerequisite sets must be recomputed: the added
+        courses and the courses whose cost or prerequisite set changed, sorted."""
+        return sorted(set(self.added) | set(self.cost_changed) | set(self.closure_changed))
+
+    def summary(self) -> str:
+        """return a one line description of the differences."""
+        return (f'{len(self.added)} added, {len(self.removed)} removed, {len(self.prereq_changed)} prerequisites '
+                f'changed, {len(self.keywords_changed)} keywords changed, {len(self.cost_changed)} costs changed, '
+                f'{len(self.closure_changed)} prerequisite sets changed')
+
+    def to_dict(self) -> dict:
+        """return the differences as a dictionary of JSON types."""
+        return {'added': self.added, 'removed': self.removed, 'prereq_changed': self.prereq_changed,
+                'keywords_changed': self.keywords_changed, 'cost_changed': self.cost_changed,
+                'closure_changed': self.closure_changed}
+
+    def to_json(self) -> str:
+        """return the differences as a JSON document."""
+        return json.dumps(self.to_dict(), indent=2)
+
+
+def _dependants(graph: CourseGraph, courses: Iterable[str]) -> set[str]:
+    """return courses and every course of graph that has one of them as a direct or indirect prerequisite, like
+    CourseGraph.dependants for several courses at once, visiting each course once."""
+    found = set(courses)
+    stack = list(found)
+    while stack:
+        for higher in graph.courses[stack.pop()].higher_courses:
+            if higher not in found:
+                found.add(higher)
+                stack.append(higher)
+    return found
+
+
+def _cost(graph: CourseGraph, course: str) -> Optional[float]:
+    """return the cost of course found by graph.compute_cost, or None if its prerequisites contain a cycle."""
+    try:
+        return graph.compute_cost(course)[0]
+    except PrerequisiteCycleError:
+        return None
+
+
+def diff_graphs(old: CourseGraph, new: CourseGraph) -> CatalogDiff:
+    """return the differences between the catalogs loaded into old and new.
+
+    Courses, prerequisites and keywords are compared in one pass over both graphs. A course whose prerequisites are
+    unchanged can only get a new cost or prerequisite set through one of its prerequisites, so costs are only
+    compared for the courses depending on a course whose prerequisites changed, and prerequisite sets only for those
+    depending on a course whose direct prerequisites are different courses. Both are found in the new graph, since
+    the unchanged courses link them in the same way in both graphs. The costs computed stay cached in the graphs.
+
+    >>> old = CourseGraph()
+    >>> old.add_edge('CSC148H1', [{'CSC108H1': 60}, {'CSC111H1': 60}])
+    >>> old.add_edge('CSC207H1', [{'CSC148H1': 60}])
+    >>> old.add_edge('CSC236H1', [({'CSC148H1': 60}, {'CSC165H1': 60})])
+    >>> old.add_course('CSC165H1', 'mathematical expression')
+    >>> new = CourseGraph()
+    >>> new.add_edge('CSC148H1', [{'CSC111H1': 60}, {'CSC108H1': 60}])
+    >>> new.add_edge('CSC207H1', [{'CSC148H1': 60}])
+    >>> new.add_edge('CSC236H1', [({'CSC165H1': 60}, {'CSC148H1': 60}), {'CSC240H1': 80}])
+    >>> new.add_course('CSC165H1', 'mathematical expression and reasoning')
+    >>> diff_graphs(old, new).to_dict()
+    {'added': ['CSC240H1'], 'removed': [], 'prereq_changed': ['CSC236H1'], 'keywords_changed': ['CSC165H1'], \
+'cost_changed': ['CSC236H1'], 'closure_changed': ['CSC236H1']}
+    >>> new.replace_prereq('CSC111H1', [{'CSC110Y1': 60}])
+    >>> diff_graphs(old, new).to_dict()
+    {'added': ['CSC110Y1', 'CSC240H1'], 'removed': [], 'prereq_changed': ['CSC111H1', 'CSC236H1'], \
+'keywords_changed': ['CSC165H1'], 'cost_changed': ['CSC111H1', 'CSC236H1'], \
+'closure_changed': ['CSC111H1', 'CSC148H1', 'CSC207H1', 'CSC236H1']}
+    """
+    added = sorted(name for name in new.courses if name not in old.courses)
+    removed = sorted(name for name in old.courses if name not in new.courses)
+    prereq_changed, names_changed, keywords_changed = [], [], []
+    for name, course in new.courses.items():
+        if name not in old.courses:
+            continue
+        old_course = old.courses[name]
+        if old_course.key_words != course.key_words:
+            keywords_changed.append(name)
+        if canonical_prereq(old_course.prereq) != canonical_prereq(course.prereq):
+            prereq_changed.append(name)
+            if set(old._prereq_names(old_course.prereq)) != set(new._prereq_names(course.prereq)):
+                names_changed.append(name)
+
+    cost_changed = sorted(name for name in _dependants(new, prereq_changed)
+                          if name in old.courses and _cost(old, name) != _cost(new, name))
+    closure_changed = sorted(name for name in _dependants(new, names_changed) if name in old.courses
+                             and set(old.find_all_prereq(name)) != set(new.find_all_prereq(name)))
+    return CatalogDiff(added, removed, sorted(prereq_changed), sorted(keywords_changed), cost_changed, closure_changed)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3:
+        from proj_loader import load_catalogs
+
+        print(diff_graphs(load_catalogs([sys.argv[1]], workers=1)[0],
+                          load_catalogs([sys.argv[2]], workers=1)[0]).to_json())
+        sys.exit()
+
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['json', 'sys', 'proj_objects', 'proj_loader'],
+        'allowed-io': [],
+        'disable': ['E9969', 'R1702', 'R1701', 'R0912', 'W0212', 'R0913', 'R0914']
+    })
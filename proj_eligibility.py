@@ -0,0 +1,132 @@
+"""Which courses a student can take next, given the grades they got: a course is eligible when its prerequisite
+expression (see Course) is satisfied by the grades, with the grade thresholds of the expression."""
+from typing import Iterable, Optional
+
+from proj_objects import CourseGraph
+
+
+def is_satisfied(prereq: list | tuple, transcript: dict[str, float], any_of: bool = True) -> bool:
+    """return whether the grades of transcript satisfy the prerequisite expression prereq. A list needs any one of
+    its items, and a tuple all of them, except that the items of the top level list of Course.prereq are
+    alternatives (any_of=True). An empty expression is satisfied.
+
+    >>> prereq = [({'CSC148H1': 60}, [{'CSC165H1': 60}, {'CSC240H1': 60}]), {'CSC111H1': 70}]
+    >>> is_satisfied(prereq, {'CSC148H1': 65, 'CSC240H1': 90})
+    True
+    >>> is_satisfied(prereq, {'CSC148H1': 55, 'CSC240H1': 90, 'CSC111H1': 69})
+    False
+    """
+    if not prereq:
+        return True
+    for item in prereq:
+        if isinstance(item, dict):
+            met = all(transcript.get(course, -1) >= grade for course, grade in item.items())
+        else:
+            met = is_satisfied(item, transcript, isinstance(item, list))
+        if met == any_of:
+            return any_of
+    return not any_of
+
+
+class EligibilityEngine:
+    """
+    The courses a student is eligible for, kept up to date as grades are added, changed or removed.
+
+    A course is eligible when it has prerequisites, the student has no grade in it yet, and its prerequisite
+    expression is satisfied by the transcript. Courses without prerequisites are open to everybody and are not
+    reported. Changing the grade of a course only re-evaluates the courses in its higher_courses, since no other
+    prerequisite expression mentions it.
+
+    transcript: the grade of every course the student took.
+
+    >>> g = CourseGraph()
+    >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}, {'CSC111H1': 50}])
+    >>> g.add_edge('CSC207H1', [({'CSC148H1': 60}, {'CSC108H1': 50})])
+    >>> engine = EligibilityEngine(g, {'CSC108H1': 55})
+    >>> engine.eligible()
+    []
+    >>> engine.set_grade('CSC108H1', 75)
+    >>> engine.eligible()
+    ['CSC148H1']
+    >>> engine.set_grade('CSC148H1', 80)
+    >>> engine.eligible()
+    ['CSC207H1']
+    >>> engine.remove_grade('CSC148H1')
+    >>> engine.eligible()
+    ['CSC148H1']
+    """
+    transcript: dict[str, float]
+    _graph: CourseGraph
+    # the courses with prerequisites that the transcript satisfies, whether or not they were taken
+    _satisfied: set[str]
+    # the number of prerequisite expressions evaluated so far, to measure how much work the updates do
+    evaluations: int
+
+    def __init__(self, graph: CourseGraph, transcript: Optional[dict[str, float]] = None) -> None:
+        self._graph = graph
+        self.transcript = {}
+        self._satisfied = set()
+        self.evaluations = 0
+        self.update(transcript or {})
+
+    def set_grade(self, course: str, grade: float) -> None:
+        """record grade as the grade of course and re-evaluate the courses that have it as a prerequisite."""
+        self.update({course: grade})
+
+    def remove_grade(self, course: str) -> None:
+        """forget the grade of course, if any, and re-evaluate the courses that have it as a prerequisite."""
+        if course in self.transcript:
+            del self.transcript[course]
+            self._reevaluate([course])
+
+    def update(self, grades: dict[str, float]) -> None:
+        """record all of grades, re-evaluating every affected course once."""
+        changed = [course for course, grade in grades.items() if self.transcript.get(course) != grade]
+        self.transcript.update(grades)
+        self._reevaluate(changed)
+
+    def _reevaluate(self, changed: Iterable[str]) -> None:
+        """re-evaluate the prerequisites of the higher courses of the courses in changed."""
+        courses = self._graph.courses
+        affected = set()
+        for course in changed:
+            if course in courses:
+                affected.update(courses[course].higher_courses)
+        for course in affected:
+            self.evaluations += 1
+            if is_satisfied(courses[course].prereq, self.transcript):
+                self._satisfied.add(course)
+            else:
+                self._satisfied.discard(course)
+
+    def is_eligible(self, course: str) -> bool:
+        """return whether the student can take course next."""
+        return course in self._satisfied and course not in self.transcript
+
+    def eligible(self) -> list[str]:
+        """return the courses the student can take next, in alphabetical order."""
+        return sorted(course for course in self._satisfied if course not in self.transcript)
+
+
+def eligible_courses(graph: CourseGraph, transcript: dict[str, float]) -> list[str]:
+    """return the courses of graph a student with the grades of transcript can take next, in alphabetical order.
+    Only the courses having a course of transcript as a prerequisite are evaluated."""
+    return EligibilityEngine(graph, transcript).eligible()
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['proj_objects'],
+        'disable': ['E9969', 'R1702', 'R1701', 'R0912']
+    })
@@ -0,0 +1,159 @@
+"""Typo-tolerant lookup of course codes and keywords, used to suggest what the user probably meant when a course
+code or a keyword is not found in the CourseGraph."""
+from typing import Iterable, Optional
+
+from proj_keyword_index import tokenize
+from proj_objects import CourseGraph
+
+# key of the trie nodes under which the word ending at the node is stored. It cannot appear in a word.
+END = ''
+
+
+class WordTrie:
+    """
+    A trie over a set of words, which finds all words within a given Levenshtein (edit) distance of a query.
+
+    The search walks the trie depth first, keeping the row of the edit distance table between the query and the
+    prefix spelled by the current node. Words sharing a prefix share the work for that prefix, and a subtree is
+    skipped as soon as every entry of the row exceeds the allowed distance, so only a small part of the trie is
+    visited for a small distance. Course codes share long prefixes (the department, then the level), which keeps
+    the trie small.
+
+    >>> trie = WordTrie(['algorithm', 'algebra', 'analysis', 'algorithms'])
+    >>> trie.search('algoritm', 2)
+    [(1, 'algorithm'), (2, 'algorithms')]
+    """
+    # each node maps a character to a child node, and END to the word ending at the node, if any
+    _root: dict
+    _size: int
+
+    def __init__(self, words: Optional[Iterable[str]] = None) -> None:
+        self._root = {}
+        self._size = 0
+        for word in words or []:
+            self.add(word)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, word: str) -> None:
+        """add word to the trie, if it is not already there."""
+        node = self._root
+        for char in word:
+            node = node.setdefault(char, {})
+        if END not in node:
+            node[END] = word
+            self._size += 1
+
+    def search(self, word: str, max_distance: int) -> list[tuple[int, str]]:
+        """return (distance, match) for every word in the trie within max_distance edits of word, closest first
+        and alphabetically among the same distance."""
+        lst = []
+        stack = [(self._root, list(range(len(word) + 1)))]
+        while stack:
+            node, row = stack.pop()
+            if END in node and row[-1] <= max_distance:
+                lst.append((row[-1], node[END]))
+            for char, child in node.items():
+                if char == END:
+                    continue
+                next_row = [row[0] + 1]
+                for j, word_char in enumerate(word, 1):
+                    next_row.append(min(next_row[j - 1] + 1, row[j] + 1, row[j - 1] + (word_char != char)))
+                if min(next_row) <= max_distance:
+                    stack.append((child, next_row))
+        lst.sort()
+        return lst
+
+
+class FuzzyIndex:
+    """
+    Fuzzy lookup over the course codes and the keyword words of a CourseGraph.
+
+    >>> g = CourseGraph()
+    >>> g.add_course('MAT157Y1', 'analysis i')
+    >>> g.add_course('MAT137Y1', 'calculus with proofs')
+    >>> g.add_course('CSC373H1', 'algorithm design, analysis & complexity')
+    >>> index = FuzzyIndex(g)
+    >>> index.suggest_codes('mat157y')
+    ['MAT157Y1', 'MAT137Y1']
+    >>> index.suggest_words('algoritm')
+    ['algorithm']
+    >>> index.suggest_courses('algoritm')
+    ['CSC373H1']
+    """
+    _graph: CourseGraph
+    _codes: WordTrie
+    _words: WordTrie
+
+    def __init__(self, graph: CourseGraph) -> None:
+        self._graph = graph
+        self._codes = WordTrie(graph.courses)
+        self._words = WordTrie()
+        for course in graph.courses.values():
+            for word in tokenize(course.key_words):
+                self._words.add(word)
+
+    def suggest_codes(self, code: str, limit: int = 5, max_distance: int = 2) -> list[str]:
+        """return up to limit course codes within max_distance edits of code (ignoring case and spaces), closest
+        first. Codes one edit away are looked for first, and the wider search only runs if there are too few."""
+        code = ''.join(code.split()).upper()
+        matches = self._codes.search(code, min(1, max_distance))
+        if len(matches) < limit and max_distance > 1:
+            matches = self._codes.search(code, max_distance)
+        return [match for _, match in matches[:limit]]
+
+    def suggest_words(self, word: str, limit: int = 5) -> list[str]:
+        """return up to limit keyword words close to word, closest first. Words of up to four letters may be one
+        edit away, longer words two."""
+        word = word.strip().lower()
+        max_distance = 1 if len(word) <= 4 else 2
+        return [match for _, match in self._words.search(word, max_distance)[:limit]]
+
+    def suggest_courses(self, text: str, limit: int = 5) -> list[str]:
+        """return up to limit courses matching text despite typos, best first: courses whose code is close to text
+        if text looks like a course code, otherwise courses whose keywords contain the words closest to those of
+        text."""
+        codes = self.suggest_codes(text, limit)
+        if codes and any(char.isdigit() for char in text):
+            return codes
+        corrected = [self.suggest_words(word, 1) for word in tokenize(text)]
+        query = ' '.join(words[0] for words in corrected if words)
+        if not query:
+            return codes
+        return self._graph.search_keywords(query)[:limit] or self._graph.search_keywords(query, False)[:limit]
+
+    def correct_query(self, text: str) -> str:
+        """return text with every word replaced by the closest keyword word, or '' if some word has no close
+        keyword word.
+
+        >>> g = CourseGraph()
+        >>> g.add_course('CSC373H1', 'algorithm design, analysis & complexity')
+        >>> FuzzyIndex(g).correct_query('Algoritm desgn')
+        'algorithm design'
+        """
+        words = []
+        for word in tokenize(text):
+            matches = self.suggest_words(word, 1)
+            if not matches:
+                return ''
+            words.append(matches[0])
+        return ' '.join(words)
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['proj_keyword_index', 'proj_objects'],
+        'disable': ['E9969', 'R1702', 'R1701', 'R0912']
+    })
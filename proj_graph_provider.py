@@ -0,0 +1,228 @@
+"""One CourseGraph for the whole program. The catalog is loaded once, in a background thread, into a frozen
+CourseGraph together with what the views derive from it (the costs of every course, the FuzzyIndex and the
+ValidationReport), and every window gets that same CatalogView instead of loading the catalog again. When the catalog
+file changes, a new view is built in the background and replaces the old one; windows already open keep the view
+they got."""
+import os
+import threading
+from typing import Callable, Optional
+
+from proj_fuzzy import FuzzyIndex
+from proj_layout import LAYOUT_SUFFIX, LayoutEngine
+from proj_objects import CourseGraph
+from proj_query_cache import QueryCache
+from proj_snapshot import load_or_build
+from proj_validation import ValidationReport, validate_graph
+
+DEFAULT_CATALOG = 'combined_math_cs_sta.csv'
+# seconds between two checks of the catalog file by GraphProvider.watch
+POLL_INTERVAL = 2.0
+
+
+class CatalogView:
+    """
+    A loaded catalog: the frozen CourseGraph and the indexes derived from it. The courses and prerequisites of a
+    view never change. What its queries fill up as they are made, the cost tables of the graph and the QueryCache,
+    is guarded by their own locks, so a view can be used from several threads at once.
+
+    graph: the course graph, frozen, with the costs of all its courses computed if it has no cycle.
+    fuzzy: the FuzzyIndex of graph.
+    queries: the QueryCache of graph, through which the popular queries should be asked.
+    layout: the LayoutEngine of graph, computed when it is first drawn.
+    report: the ValidationReport of graph.
+    source: (size, modification time in nanoseconds) of the catalog file when it was read.
+    generation: 1 for the first view of a provider, increased by one at each reload.
+    """
+    graph: CourseGraph
+    fuzzy: FuzzyIndex
+    queries: QueryCache
+    layout: LayoutEngine
+    report: ValidationReport
+    source: tuple[int, int]
+    generation: int
+
+    def __init__(self, graph: CourseGraph, source: tuple[int, int], generation: int,
+                 layout_path: Optional[str] = None) -> None:
+        """layout_path is the file keeping the layout of graph between runs, if any."""
+        self.graph = graph
+        self.report = validate_graph(graph)
+        if self.report.is_dag():
+            graph.compute_all_costs()
+        graph.freeze()
+        self.fuzzy = FuzzyIndex(graph)
+        self.queries = QueryCache(graph)
+        self.layout = LayoutEngine(graph, layout_path)
+        self.source = source
+        self.generation = generation
+
+
+def file_state(path: str) -> tuple[int, int]:
+    """return the (size, modification time in nanoseconds) of the file at path."""
+    stat = os.stat(path)
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+class GraphProvider:
+    """
+    Loads the catalog at path into a CatalogView, once, and hands that view to everybody asking for it.
+
+    Nothing is read before self.start or self.get is called. self.start loads in a background thread so that the
+    program can show its first window meanwhile; self.get waits for the load to finish. self.reload_if_changed, or
+    the thread started by self.watch, builds a new view when the file changes, and the listeners of self.subscribe
+    are called with it from the thread that built it.
+
+    path: the catalog file.
+    last_error: the exception raised by the last load, or None if it succeeded. A failed reload keeps the previous
+        view.
+
+    >>> import tempfile, shutil
+    >>> directory = tempfile.mkdtemp()
+    >>> path = os.path.join(directory, 'catalog.csv')
+    >>> with open(path, 'w') as file:
+    ...     _ = file.write(' CSC148H1 - Introduction to Computer Science,60% or higher in CSC108H1\\n')
+    >>> provider = GraphProvider(path)
+    >>> view = provider.get()
+    >>> provider.get() is view, view.generation, view.graph.compute_cost('CSC148H1')
+    (True, 1, (1.0, ['CSC108H1']))
+    >>> provider.reload_if_changed()
+    False
+    >>> with open(path, 'a') as file:
+    ...     _ = file.write(' CSC207H1 - Software Design,CSC148H1\\n')
+    >>> provider.reload_if_changed(), provider.get().generation, sorted(provider.get().graph.courses)
+    (True, 2, ['CSC108H1', 'CSC148H1', 'CSC207H1'])
+    >>> shutil.rmtree(directory)
+    """
+    path: str
+    last_error: Optional[Exception]
+    _loader: Callable[[str], CourseGraph]
+    _view: Optional[CatalogView]
+    # guards _view, _thread and last_error, and is waited on by get until the first load finishes
+    _lock: threading.Condition
+    # held while a view is built, so that two reloads never run at the same time
+    _loading: threading.Lock
+    _thread: Optional[threading.Thread]
+    _stop: threading.Event
+    _listeners: list[Callable[[CatalogView], None]]
+
+    def __init__(self, path: str, loader: Callable[[str], CourseGraph] = load_or_build) -> None:
+        """loader returns the CourseGraph of a catalog file, by default from its snapshot when it is current."""
+        self.path = path
+        self.last_error = None
+        self._loader = loader
+        self._view = None
+        self._lock = threading.Condition()
+        self._loading = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._listeners = []
+
+    def start(self) -> None:
+        """start loading the catalog in a background thread, unless it is loaded or being loaded already."""
+        with self._lock:
+            if self._view is None and self._thread is None:
+                self._thread = threading.Thread(target=self._load_first, name='catalog loader', daemon=True)
+                self._thread.start()
+
+    def _load_first(self) -> None:
+        """load the first view, recording the error if it fails, and wake up the threads waiting in get."""
+        try:
+            self._load()
+        except Exception as error:  # reported to the callers of get
+            with self._lock:
+                self.last_error = error
+        finally:
+            with self._lock:
+                self._thread = None
+                self._lock.notify_all()
+
+    def _load(self) -> CatalogView:
+        """build a view from the current content of the file and make it the current view."""
+        with self._loading:
+            source = file_state(self.path)
+            graph = self._loader(self.path)
+            generation = self._view.generation + 1 if self._view is not None else 1
+            view = CatalogView(graph, source, generation, self.path + LAYOUT_SUFFIX)
+            with self._lock:
+                self._view = view
+                self.last_error = None
+                listeners = list(self._listeners)
+        for listener in listeners:
+            listener(view)
+        return view
+
+    def get(self, timeout: Optional[float] = None) -> CatalogView:
+        """return the current view, loading the catalog first (in the background thread if it is running) if it
+        was not loaded yet. Raise the error of the load if it failed, and TimeoutError if it takes more than timeout
+        seconds."""
+        self.start()
+        with self._lock:
+            if not self._lock.wait_for(lambda: self._view is not None or self._thread is None, timeout):
+                raise TimeoutError(f'{self.path} is still loading')
+            if self._view is None:
+                error, self.last_error = self.last_error, None
+                raise error
+            return self._view
+
+    def is_loaded(self) -> bool:
+        """return whether a view is available, so that self.get does not wait."""
+        with self._lock:
+            return self._view is not None
+
+    def reload_if_changed(self) -> bool:
+        """build a new view, in the calling thread, if the size or modification time of the file changed since the
+        current view was loaded. Return whether a new view was built. A failed reload records its error in
+        self.last_error and keeps the current view."""
+        view = self.get()
+        try:
+            if file_state(self.path) == view.source:
+                return False
+            self._load()
+            return True
+        except Exception as error:  # the file may be half written: keep the current view and try again later
+            with self._lock:
+                self.last_error = error
+            return False
+
+    def subscribe(self, listener: Callable[[CatalogView], None]) -> None:
+        """call listener with every new view after a reload."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def watch(self, interval: float = POLL_INTERVAL) -> None:
+        """start a background thread calling self.reload_if_changed every interval seconds, until self.stop."""
+        self._stop.clear()
+
+        def poll() -> None:
+            """reload the catalog whenever it changes."""
+            while not self._stop.wait(interval):
+                self.reload_if_changed()
+
+        threading.Thread(target=poll, name='catalog watcher', daemon=True).start()
+
+    def stop(self) -> None:
+        """stop the thread started by self.watch."""
+        self._stop.set()
+
+
+# the provider of the catalog used by the interactive views
+PROVIDER = GraphProvider(DEFAULT_CATALOG)
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['os', 'threading', 'proj_fuzzy', 'proj_layout', 'proj_objects', 'proj_query_cache',
+                          'proj_snapshot', 'proj_validation'],
+        'allowed-io': [],
+        'disable': ['E9969', 'R1702', 'R1701', 'R0912', 'W0718', 'R0902']
+    })
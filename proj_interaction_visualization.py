@@ -1,56 +1,147 @@
 """This file includes function that visualize the CourseGraph as well as specific parts of the graph.
 It also includes interactive function that ask the user to input something and generate recommended courses
-and visualization for the user."""
+and visualization for the user.
+
+networkx, matplotlib and tkinter take most of the startup time of the program, so they are only imported by the
+functions using them, the first time one of them is called: importing this file costs no more than importing the
+CourseGraph itself."""
 import random
+from typing import TYPE_CHECKING, Callable, Optional
 
-import networkx as nx
-import matplotlib.pyplot as plt
 from proj_objects import CourseGraph
-from proj_generate_graph import read_csv
-from tkinter import *
-from tkinter import messagebox, ttk
-
-
-def generate_course_graph() -> CourseGraph:
-    """generate a complete course graph from our current modified csv file"""
-    g = read_csv('combined_math_cs_sta.csv')
-    return g
-
+from proj_eligibility import eligible_courses
+from proj_graph_provider import PROVIDER, CatalogView
+from proj_layout import LayoutEngine
+from proj_scheduler import MAX_CREDITS, TERM_NAMES, schedule_courses
+from proj_tk_tasks import BackgroundTask, TaskRunner
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+
+def current_view() -> CatalogView:
+    """return the view of our current modified csv file shared by every window, loaded once by PROVIDER (from its
+    snapshot if the csv file has not changed since the snapshot was written) and reloaded when the file changes"""
+    from tkinter import messagebox
+
+    view = PROVIDER.get()
+    if not view.report.is_valid():
+        messagebox.showwarning(title='Warning',
+                               message=f'The course data has problems, some results may be wrong: '
+                                       f'{view.report.summary()}')
+    return view
+
+
+def ask_suggestion(text: str, suggestions: list[str]) -> Optional[str]:
+    """ask the user whether they meant the first of suggestions instead of text, which is not in our dataset.
+    Return the first suggestion if they did, and None if they did not or there is no suggestion."""
+    from tkinter import messagebox
+
+    if not suggestions:
+        return None
+    others = f'\n(other close matches: {", ".join(suggestions[1:])})' if len(suggestions) > 1 else ''
+    if messagebox.askyesno(title='Did you mean',
+                           message=f'Sorry, {text} is not within our dataset. Did you mean {suggestions[0]}?'
+                                   f'{others}'):
+        return suggestions[0]
+    return None
+
+
+def visualize_course_graph(course_graph: CourseGraph, layout: Optional[LayoutEngine] = None) -> None:
+    """visualize the whole course graph, with the layered layout of layout (computed for course_graph if it is
+    None)"""
+    import matplotlib.pyplot as plt
+    import networkx as nx
 
-def visualize_course_graph(course_graph: CourseGraph) -> None:
-    """visualize the whole course graph"""
     g = nx.DiGraph()
     for course_name in course_graph.courses:
         g.add_node(course_name)
     for course_name, course_obj in course_graph.courses.items():
         for higher_course_name in course_obj.higher_courses:
             g.add_edge(course_name, higher_course_name)
-    nx.draw(g, with_labels=True)
+    if layout is None:
+        layout = LayoutEngine(course_graph)
+    nx.draw(g, layout.positions(), with_labels=True)
     plt.show()
 
 
-def visualize_course_graph_node(course_graph: CourseGraph, nodes: list) -> None:
-    """visualize the interaction betwee a list of input node
+def layout_course_graph_node(course_graph: CourseGraph, nodes: list, layout: Optional[LayoutEngine] = None,
+                             task: Optional[BackgroundTask] = None) -> tuple['nx.DiGraph', dict]:
+    """return the graph of the interaction between a list of input node and the positions of its nodes, taken from
+    the layered layout of the whole graph in layout (computed for course_graph if it is None), so that the same
+    courses are always drawn the same way.
     preconditions:
     - all(node in course_graph.courses for node in nodes)
     """
+    import networkx as nx
+
+    node_set = set(nodes)
     g = nx.DiGraph()
     for course_name in nodes:
         g.add_node(course_name)
-    for course_name, course_obj in course_graph.courses.items():
-        if course_name in nodes:
-            for higher_course_name in course_obj.higher_courses:
-                if higher_course_name in nodes:
-                    g.add_edge(course_name, higher_course_name)
-    pos = nx.spring_layout(g)
+    for course_name in node_set:
+        for higher_course_name in course_graph.courses[course_name].higher_courses:
+            if higher_course_name in node_set:
+                g.add_edge(course_name, higher_course_name)
+    if task is not None:
+        task.check()
+        task.report(None, f'laying out {len(g)} courses')
+    if layout is None:
+        layout = LayoutEngine(course_graph)
+    return g, layout.subgraph(node_set)
+
+
+def visualize_course_graph_node(course_graph: CourseGraph, nodes: list, layout: Optional[LayoutEngine] = None) -> None:
+    """visualize the interaction betwee a list of input node, waiting until the window is closed
+    preconditions:
+    - all(node in course_graph.courses for node in nodes)
+    """
+    import matplotlib.pyplot as plt
+    import networkx as nx
+
+    g, pos = layout_course_graph_node(course_graph, nodes, layout)
     nx.draw(g, pos, with_labels=True)
     plt.show()
 
 
+def visualize_in_background(runner: TaskRunner, course_graph: CourseGraph, nodes: list,
+                            layout: Optional[LayoutEngine] = None, on_shown: Optional[Callable[[], None]] = None) \
+        -> None:
+    """visualize the interaction between a list of input node without blocking the windows: the layout is computed
+    by runner, then the graph is drawn in a new window and on_shown is called, unless the layout was cancelled
+    preconditions:
+    - all(node in course_graph.courses for node in nodes)
+    """
+
+    def show(result: tuple['nx.DiGraph', dict]) -> None:
+        """draw the graph once it is laid out"""
+        import matplotlib.pyplot as plt
+        import networkx as nx
+
+        plt.figure()
+        nx.draw(result[0], result[1], with_labels=True)
+        plt.show(block=False)
+        if on_shown is not None:
+            on_shown()
+
+    runner.submit(f'laying out {len(set(nodes))} courses',
+                  lambda task: layout_course_graph_node(course_graph, nodes, layout, task), show)
+
+
+def plan_course(graph: CourseGraph, course: str, task: BackgroundTask) -> tuple[float, list[str], list[list[str]]]:
+    """return the cost of course, the cheapest prerequisites to take before it, and a schedule of these and course,
+    for the worker thread of a TaskRunner"""
+    task.report(None, f'finding the cheapest prerequisites of {course}')
+    cost, courses = graph.compute_cost(course)
+    task.check()
+    task.report(None, f'scheduling {len(courses) + 1} courses')
+    return cost, courses, schedule_courses(graph, courses + [course])
+
+
 def visualize_whole_coursegraph() -> None:
     """visualize the whole graph using networkx"""
-    graph = generate_course_graph()
-    visualize_course_graph(graph)
+    view = current_view()
+    visualize_course_graph(view.graph, view.layout)
 
 
 def interactive_graph() -> None:
@@ -58,75 +149,65 @@ def interactive_graph() -> None:
     some recommended courses for this user, as well as its potential prerequisite that minimize the
     opportunity cost(a year course have opportunity cost of 1 and half year course have 0.5) for taking
     this course. Visualize the relationship between the recommended courses and its potential prerequisite. """
+    from tkinter import Label, Tk, Toplevel, messagebox, ttk
 
     def search() -> None:
-        """search the keyword"""
-
-        def yes() -> None:
-            """click the YES button"""
-            visualize_course_graph_node(graph, courses)
-            root_graph.destroy()
-
+        """search the keyword, then find the cost and schedule of one of the courses found in the background"""
         lower = entry.get().lower()
         lst = graph.course_with_keywords(lower)
+        if not lst:
+            corrected = fuzzy.correct_query(lower)
+            corrected = ask_suggestion(lower, [corrected] if corrected else [])
+            if corrected is not None:
+                lst = graph.course_with_keywords(corrected)
         if not lst:
             messagebox.showwarning(title='Warning',
                                    message='Sorry, the keyword you enter is currently not in our dataset.')
         else:
-            root_graph = Tk()
-            root_graph.geometry("700x400")
-            graph_frame = ttk.Frame(root_graph)
-            graph_frame.pack()
-
-            current_index = random.randint(0, len(lst) - 1)
-            courses = graph.compute_cost(lst[current_index])[1]
-            cost = graph.compute_cost(lst[current_index])[0]
-
-            label = Label(graph_frame,
-                          text=f'{lst[current_index]} may be a course you are interested in, which is about'
-                               f' {graph.courses[lst[current_index]].key_words}. \n In order to take this course,'
-                               f' you can take the following courses as prerequisite to minimize cost:\n'
-                               f' {courses}([] represent that you do not need any prerequisite for this course), '
-                               f'\n which include a total of {cost} credit, (including {lst[current_index]})\n')
-            label.pack()
-            courses.append(lst[current_index])
-            lst1 = []
-            lst2 = []
-            lst3 = []
-            lst4 = []
-            for course in courses:
-                if course[3] == '1':
-                    lst1.append(course)
-                elif course[3] == '2':
-                    lst2.append(course)
-                elif course[3] == '3':
-                    lst3.append(course)
-                else:
-                    lst4.append(course)
-            label_course = Label(graph_frame,
-                                 text=f'you can probably organize it in this way\n first year: {lst1} '
-                                      f'\nsecond year: {lst2},\n third year: {lst3},\n last year: {lst4} \n')
-            label_course.pack()
-
-            label_visual = Label(graph_frame,
-                                 text='Do you want an visualization? \n If you choose to visualize,'
-                                      ' you need to close the visualize window in order to continue:\n')
-            label_visual.pack()
-
-            button_yes = ttk.Button(graph_frame, text="Yes", command=yes)
-            button_yes.pack()
-
-            button_no = ttk.Button(graph_frame, text="No", command=root_graph.destroy)
-            button_no.pack()
-
-            root_graph.mainloop()
+            current = lst[random.randint(0, len(lst) - 1)]
+            runner.submit(f'finding the cheapest way to take {current}', lambda task: plan_course(graph, current, task),
+                          lambda result: show_plan(current, *result))
+
+    def show_plan(current: str, cost: float, courses: list[str], terms: list[list[str]]) -> None:
+        """show the cost and the schedule of the course current"""
+        root_graph = Toplevel(root)
+        root_graph.geometry("700x400")
+        graph_frame = ttk.Frame(root_graph)
+        graph_frame.pack()
+
+        label = Label(graph_frame,
+                      text=f'{current} may be a course you are interested in, which is about'
+                           f' {graph.courses[current].key_words}. \n In order to take this course,'
+                           f' you can take the following courses as prerequisite to minimize cost:\n'
+                           f' {courses}([] represent that you do not need any prerequisite for this course), '
+                           f'\n which include a total of {cost} credit, (including {current})\n')
+        label.pack()
+        courses.append(current)
+        schedule = '\n'.join(f'term {i + 1} ({TERM_NAMES[i % len(TERM_NAMES)]}): {term}'
+                              for i, term in enumerate(terms))
+        label_course = Label(graph_frame,
+                             text=f'you can probably organize it in this way, taking at most {MAX_CREDITS} '
+                                  f'credits per term:\n{schedule}\n')
+        label_course.pack()
+
+        label_visual = Label(graph_frame, text='Do you want an visualization?\n')
+        label_visual.pack()
+
+        button_yes = ttk.Button(graph_frame, text="Yes",
+                                command=lambda: visualize_in_background(runner, graph, courses, view.layout,
+                                                                        root_graph.destroy))
+        button_yes.pack()
+
+        button_no = ttk.Button(graph_frame, text="No", command=root_graph.destroy)
+        button_no.pack()
 
     root = Tk()
     root.geometry("600x300")
     search_frame = ttk.Frame(root)
     search_frame.pack(pady=100)
 
-    graph = generate_course_graph()
+    view = current_view()
+    graph, fuzzy = view.graph, view.fuzzy
 
     label_intro = ttk.Label(search_frame, text="please identify an area you are focusing on (choose a specific word)")
     label_intro.pack()
@@ -136,31 +217,36 @@ def interactive_graph() -> None:
 
     button_submit = ttk.Button(search_frame, text="submit", command=search)
     button_submit.pack()
+    runner = TaskRunner(root)
     root.mainloop()
+    runner.shutdown()
 
 
 def interactive_show_course() -> None:
     """Ask the user to input a specific coursecode, for example, MAT137Y1, and show all of the prerequisite
     the user can take in order to take this course. including the prerequisite of prerequisite, etc"""
+    from tkinter import Tk, messagebox, ttk
 
     def check() -> None:
         """check the prerequisite"""
         course = entry.get().upper()
+        if course not in graph.courses:
+            course = ask_suggestion(course, fuzzy.suggest_codes(course)) or course
         if course not in graph.courses:
             messagebox.showwarning(title='Warning',
                                    message='Sorry, the course code you enter is not within our dataset.')
         else:
-            pre = graph.find_all_prereq(course)
+            pre = view.queries.find_all_prereq(course)
             pre.append(course)
-            visualize_course_graph_node(graph, pre)
-            root.destroy()
+            visualize_in_background(runner, graph, pre, view.layout, root.destroy)
 
     root = Tk()
     root.geometry("600x300")
     search_frame = ttk.Frame(root)
     search_frame.pack(pady=100)
 
-    graph = generate_course_graph()
+    view = current_view()
+    graph, fuzzy = view.graph, view.fuzzy
 
     label_intro = ttk.Label(search_frame,
                             text="please identify a course that you want to see all of its prerequisite (enter a "
@@ -174,60 +260,66 @@ def interactive_show_course() -> None:
     button_submit = ttk.Button(search_frame, text="submit", command=check)
     button_submit.pack()
 
+    runner = TaskRunner(root)
     root.mainloop()
+    runner.shutdown()
 
 
 def interactive_show_future_course() -> None:
     """Ask the user to input some course he/she already took, and return the potential possible course the user could
     take in the future"""
+    from tkinter import Label, Tk, Toplevel, messagebox, ttk
 
     def find_potential() -> None:
-        """find the potential possible course"""
-
-        def yes() -> None:
-            """visualize the relationships"""
-            visualize_course_graph_node(graph, lst2)
-            root_protential.destroy()
-
+        """find the potential possible course in the background"""
         course = entry.get().upper()
-        lst = course.split(" ")
+        lst = course.split()
+        for i, item in enumerate(lst):
+            if item not in graph.courses:
+                lst[i] = ask_suggestion(item, fuzzy.suggest_codes(item)) or item
         error = [item for item in lst if item not in graph.courses]
         error_message = ", ".join(error)
         if len(error) != 0:
             messagebox.showwarning(title='Warning',
                                    message=f'The courses {error_message} are not in our dataset')
         else:
-            root_protential = Tk()
-            root_protential.geometry("700x400")
-            protential_frame = ttk.Frame(root_protential)
-            protential_frame.pack()
-
-            lst2 = graph.find_higher_courses(lst)
-
-            label_courses = Label(protential_frame,
-                                  text=f'Based on your input, here are the courses you have already token: \n{lst}, \n'
-                                       f'and here are some potential courses you could take in the future: '
-                                       f'\n{lst2[:min(5, len(lst2))]}')
-            label_courses.pack()
-            lst2.extend(lst)
-            label_visual = Label(protential_frame,
-                                 text='Do you want to visualize their relationship?')
-            label_visual.pack()
-
-            button_yes = ttk.Button(protential_frame, text="Yes", command=yes)
-            button_yes.pack()
-
-            button_no = ttk.Button(protential_frame, text="No", command=root_protential.destroy)
-            button_no.pack()
-
-            root_protential.mainloop()
+            # no grades are entered, so every course taken counts as passed with any grade required
+            runner.submit('finding the courses you can take next',
+                          lambda task: eligible_courses(graph, dict.fromkeys(lst, 100)),
+                          lambda lst2: show_potential(lst, lst2))
+
+    def show_potential(lst: list[str], lst2: list[str]) -> None:
+        """show the potential possible courses lst2 after the courses lst"""
+        root_protential = Toplevel(root)
+        root_protential.geometry("700x400")
+        protential_frame = ttk.Frame(root_protential)
+        protential_frame.pack()
+
+        label_courses = Label(protential_frame,
+                              text=f'Based on your input, here are the courses you have already token: \n{lst}, \n'
+                                   f'and here are some potential courses you could take in the future: '
+                                   f'\n{lst2[:min(5, len(lst2))]}')
+        label_courses.pack()
+        lst2.extend(lst)
+        label_visual = Label(protential_frame,
+                             text='Do you want to visualize their relationship?')
+        label_visual.pack()
+
+        button_yes = ttk.Button(protential_frame, text="Yes",
+                                command=lambda: visualize_in_background(runner, graph, lst2, view.layout,
+                                                                        root_protential.destroy))
+        button_yes.pack()
+
+        button_no = ttk.Button(protential_frame, text="No", command=root_protential.destroy)
+        button_no.pack()
 
     root = Tk()
     root.geometry("600x300")
     search_frame = ttk.Frame(root)
     search_frame.pack(pady=100)
 
-    graph = generate_course_graph()
+    view = current_view()
+    graph, fuzzy = view.graph, view.fuzzy
 
     label_intro = ttk.Label(search_frame,
                             text="Please add a course code that you've already token (use spaces to slipt courses).")
@@ -240,11 +332,18 @@ def interactive_show_future_course() -> None:
     button_submit = ttk.Button(search_frame, text="submit", command=find_potential)
     button_submit.pack()
 
+    runner = TaskRunner(root)
     root.mainloop()
+    runner.shutdown()
 
 
 def interactive_model() -> None:
-    """The final interactive model of the project, which combines the above interactive function"""
+    """The final interactive model of the project, which combines the above interactive function. The catalog starts
+    loading in the background right away, and is reloaded whenever its file changes."""
+    from tkinter import Label, StringVar, Tk, ttk
+
+    PROVIDER.start()
+    PROVIDER.watch()
     root = Tk()
     root.geometry("600x300")
     main_frame = ttk.Frame(root)
@@ -289,8 +388,7 @@ if __name__ == '__main__':
 
     python_ta.check_all(config={
         'max-line-length': 120,
-        'extra-imports': ['csv', 'proj_objects', 'random', 'matplotlib', 'networkx', 'proj_generate_graph', 'tkinter',
-                          'matplotlib.pyplot'],
-        'allowed-io': ['read_csv_with_graph', 'read_csv', 'extract_columns'],
+        'extra-imports': ['random', 'typing', 'matplotlib.pyplot', 'networkx', 'tkinter', 'proj_eligibility',
+                          'proj_graph_provider', 'proj_layout', 'proj_objects', 'proj_scheduler', 'proj_tk_tasks'],
         'disable': ['E9969', 'R1702', 'R1701', 'R0912', 'W0401', 'R0914', 'R0915', 'C0411']
     })
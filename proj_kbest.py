@@ -0,0 +1,224 @@
+"""The k cheapest prerequisite plans of a course, in the cost model of CourseGraph.compute_cost, found without
+enumerating every combination of alternatives.
+
+Every course and prerequisite expression gets a PlanStream: the list of its plans in order of cost, extended only as
+far as somebody asks for. A list (any one of) merges the streams of its items with a heap, and a tuple (all of)
+explores the combinations of the plans of its items best first, from the combination of their cheapest plans, as in
+lazy k-best parsing. The stream of a course is shared by every expression mentioning it."""
+import heapq
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from proj_objects import CourseGraph
+
+# (cost, plan) of one plan: the cost is a float or an int, as in CourseGraph.compute_cost, and the plan the courses
+# to take
+Plan = tuple[float, tuple[str, ...]]
+
+
+class PlanStream(ABC):
+    """
+    The plans of one course or expression, cheapest first. Plans taking the same set of courses are only listed
+    once, with the lowest cost.
+
+    items: the plans found so far.
+    """
+    items: list[Plan]
+    _seen: set[frozenset]
+    _exhausted: bool
+
+    def __init__(self) -> None:
+        self.items = []
+        self._seen = set()
+        self._exhausted = False
+
+    def get(self, i: int) -> Optional[Plan]:
+        """return the i-th cheapest plan (from 0), or None if there are not that many plans."""
+        while len(self.items) <= i and not self._exhausted:
+            plan = self._next_plan()
+            if plan is None:
+                self._exhausted = True
+            elif frozenset(plan[1]) not in self._seen:
+                self._seen.add(frozenset(plan[1]))
+                self.items.append(plan)
+        return self.items[i] if i < len(self.items) else None
+
+    @abstractmethod
+    def _next_plan(self) -> Optional[Plan]:
+        """return the next cheapest plan, which may take the same courses as an earlier one, or None if there are
+        no more plans."""
+
+
+class ConstantStream(PlanStream):
+    """the single plan of an empty expression or of a course without prerequisites."""
+
+    _plan: Optional[Plan]
+
+    def __init__(self, plan: Plan) -> None:
+        super().__init__()
+        self._plan = plan
+
+    def _next_plan(self) -> Optional[Plan]:
+        plan, self._plan = self._plan, None
+        return plan
+
+
+class CourseStream(PlanStream):
+    """the plans of a course: the plans of its prerequisites, with the cost of the course itself added."""
+    _own: float
+    _prereq: PlanStream
+    _next: int
+
+    def __init__(self, own: float, prereq: PlanStream) -> None:
+        super().__init__()
+        self._own = own
+        self._prereq = prereq
+        self._next = 0
+
+    def _next_plan(self) -> Optional[Plan]:
+        plan = self._prereq.get(self._next)
+        self._next += 1
+        if plan is None:
+            return None
+        return (self._own + plan[0], plan[1])
+
+
+class AnyStream(PlanStream):
+    """the plans of a list: the plans of each item merged, where the plans of a single course item start with the
+    course itself."""
+    # for each item, its stream and the course to put in front of its plans, if it is a single course
+    _children: list[tuple[PlanStream, Optional[str]]]
+    # (cost, item, rank, plan) of the next plan of each item
+    _heap: list[tuple[float, int, int, tuple[str, ...]]]
+
+    def __init__(self, children: list[tuple[PlanStream, Optional[str]]]) -> None:
+        super().__init__()
+        self._children = children
+        self._heap = []
+        for index in range(len(children)):
+            self._push(index, 0)
+
+    def _push(self, index: int, rank: int) -> None:
+        """push the rank-th plan of item index, if it has one."""
+        stream, name = self._children[index]
+        plan = stream.get(rank)
+        if plan is not None:
+            courses = plan[1] if name is None else (name,) + plan[1]
+            # among plans of the same cost, the earlier item comes first, as in CourseGraph.compute_list
+            heapq.heappush(self._heap, (plan[0], index, rank, courses))
+
+    def _next_plan(self) -> Optional[Plan]:
+        if not self._heap:
+            return None
+        cost, index, rank, courses = heapq.heappop(self._heap)
+        self._push(index, rank + 1)
+        return (cost, courses)
+
+
+class AllStream(PlanStream):
+    """the plans of a tuple: one plan of each item, for every combination, cheapest combination first."""
+    # for each item, its stream and the course to put in front of its plans, if it is a single course
+    _children: list[tuple[PlanStream, Optional[str]]]
+    # (cost, ranks, plan) of the combinations next to the ones already taken, and every combination pushed so far
+    _heap: list[tuple[float, tuple[int, ...], tuple[str, ...]]]
+    _visited: set[tuple[int, ...]]
+
+    def __init__(self, children: list[tuple[PlanStream, Optional[str]]]) -> None:
+        super().__init__()
+        self._children = children
+        self._heap = []
+        self._visited = set()
+        self._push((0,) * len(children))
+
+    def _push(self, ranks: tuple[int, ...]) -> None:
+        """push the combination of the ranks[j]-th plan of every item j, if they all exist and it is new."""
+        if ranks in self._visited:
+            return
+        self._visited.add(ranks)
+        cost = 0
+        courses = ()
+        for (stream, name), rank in zip(self._children, ranks):
+            plan = stream.get(rank)
+            if plan is None:
+                return
+            cost += plan[0]
+            courses += plan[1] if name is None else (name,) + plan[1]
+        heapq.heappush(self._heap, (cost, ranks, courses))
+
+    def _next_plan(self) -> Optional[Plan]:
+        if not self._heap:
+            return None
+        cost, ranks, courses = heapq.heappop(self._heap)
+        for j in range(len(ranks)):
+            self._push(ranks[:j] + (ranks[j] + 1,) + ranks[j + 1:])
+        return (cost, courses)
+
+
+class PlanEnumerator:
+    """
+    The plan streams of the courses of a CourseGraph, created as they are needed and kept for later queries. The
+    graph must not change while the enumerator is in use.
+
+    >>> g = CourseGraph()
+    >>> g.add_edge('MAT237Y1', [{'MAT137Y1': 60}, {'MAT157Y1': 50}, ({'MAT135H1': 60}, {'MAT136H1': 60})])
+    >>> plans = PlanEnumerator(g)
+    >>> plans.k_cheapest('MAT237Y1', 4)
+    [(2, ['MAT137Y1']), (2, ['MAT157Y1']), (2.0, [])]
+    """
+    _graph: CourseGraph
+    _streams: dict[str, PlanStream]
+
+    def __init__(self, graph: CourseGraph) -> None:
+        self._graph = graph
+        self._streams = {}
+
+    def stream(self, course: str) -> PlanStream:
+        """return the plan stream of course. Raise PrerequisiteCycleError if its prerequisites contain a cycle."""
+        if course not in self._streams:
+            # create the streams of the prerequisites first, so that the streams never recurse into a cycle
+            for name in self._graph.topological_order([course], skip=self._streams):
+                own = 1 if self._graph.is_year_course(name) else 0.5
+                prereq = self._graph.courses[name].prereq
+                if not prereq:
+                    self._streams[name] = ConstantStream((own, ()))
+                else:
+                    self._streams[name] = CourseStream(own, self._expression_stream(prereq))
+        return self._streams[course]
+
+    def _expression_stream(self, prereq: list | tuple) -> PlanStream:
+        """return a new stream for the expression prereq, whose courses all have a stream already."""
+        if not prereq:
+            return ConstantStream((0.0, ()))
+        # as in CourseGraph.compute_tuple, a single course required by a tuple is not part of its plans
+        children = [(self._streams[next(iter(item))], next(iter(item)) if isinstance(prereq, list) else None)
+                    if isinstance(item, dict) else (self._expression_stream(item), None) for item in prereq]
+        return AnyStream(children) if isinstance(prereq, list) else AllStream(children)
+
+    def k_cheapest(self, course: str, k: int) -> list[tuple[float, list[str]]]:
+        """return up to k plans of course, cheapest first, as (cost, plan) like CourseGraph.compute_cost."""
+        stream = self.stream(course)
+        lst = []
+        for i in range(k):
+            plan = stream.get(i)
+            if plan is None:
+                break
+            lst.append((plan[0], list(plan[1])))
+        return lst
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['heapq', 'abc', 'proj_objects'],
+        'disable': ['E9969', 'R1702', 'R1701', 'R0912']
+    })
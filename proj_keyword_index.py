@@ -0,0 +1,201 @@
+"""Inverted index over the keywords of the courses, used by CourseGraph to answer keyword searches without
+scanning every course in the graph."""
+import math
+import re
+from bisect import bisect_left
+from typing import Iterable, Optional
+
+# length of the character n-grams used for substring search
+GRAM_SIZE = 3
+find_token = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text: str) -> list[str]:
+    """return the words of text, lower-cased, in order.
+
+    >>> tokenize('Introduction to Computer Programming (II)')
+    ['introduction', 'to', 'computer', 'programming', 'ii']
+    """
+    return find_token.findall(text.lower())
+
+
+def grams(text: str) -> set[str]:
+    """return all distinct substrings of text of length GRAM_SIZE.
+
+    >>> sorted(grams('graph'))
+    ['aph', 'gra', 'rap']
+    """
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+class KeywordIndex:
+    """
+    An inverted index from keywords to courses.
+
+    Two indexes are kept for every course: one from each character n-gram of its keywords, used to answer exact
+    substring queries like CourseGraph.course_with_keywords, and one from each word of its keywords, used for
+    ranked multi-word searches. Results are ordered by the time each course was added to the index, which is the
+    order of CourseGraph.courses: changing the keywords of a course keeps its place, and a course removed and added
+    again goes last.
+
+    >>> index = KeywordIndex()
+    >>> index.set('CSC373H1', 'algorithm design, analysis & complexity')
+    >>> index.set('CSC263H1', 'data structures and analysis')
+    >>> index.set('STA130H1', 'an introduction to statistical reasoning and data science')
+    >>> index.substring('analysis')
+    ['CSC373H1', 'CSC263H1']
+    >>> index.search('data analysis')
+    ['CSC263H1']
+    >>> index.search('data analysis', match_all=False)
+    ['CSC263H1', 'CSC373H1', 'STA130H1']
+    >>> index.search('stat', prefix=True)
+    ['STA130H1']
+    >>> index.set('CSC263H1', 'data structures')
+    >>> index.substring('analysis')
+    ['CSC373H1']
+    >>> index.remove('CSC373H1')
+    >>> index.set('CSC373H1', 'algorithm design, analysis & complexity')
+    >>> index.substring('a')
+    ['CSC263H1', 'STA130H1', 'CSC373H1']
+    """
+    # course -> its keywords, and course -> order in which the course was added
+    _texts: dict[str, str]
+    _rank: dict[str, int]
+    # the rank of the next course added
+    _next_rank: int
+    # n-gram -> courses whose keywords contain it
+    _gram_postings: dict[str, set[str]]
+    # word -> {course: number of times the word appears in the keywords of the course}
+    _token_postings: dict[str, dict[str, int]]
+    # all words in self._token_postings, sorted, for prefix search. None if it needs to be rebuilt.
+    _vocabulary: Optional[list[str]]
+
+    def __init__(self) -> None:
+        self._texts = {}
+        self._rank = {}
+        self._next_rank = 0
+        self._gram_postings = {}
+        self._token_postings = {}
+        self._vocabulary = None
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def set(self, course: str, keywords: str) -> None:
+        """index course under keywords, replacing whatever keywords it was indexed under before."""
+        if course in self._texts:
+            self._unindex(course)
+        else:
+            self._rank[course] = self._next_rank
+            self._next_rank += 1
+        self._texts[course] = keywords
+        for gram in grams(keywords):
+            self._gram_postings.setdefault(gram, set()).add(course)
+        for token in tokenize(keywords):
+            postings = self._token_postings.get(token)
+            if postings is None:
+                postings = self._token_postings[token] = {}
+                self._vocabulary = None
+            postings[course] = postings.get(course, 0) + 1
+
+    def remove(self, course: str) -> None:
+        """remove course from the index. If it is added again, it comes after the courses already in the index, as
+        in CourseGraph.courses."""
+        self._unindex(course)
+        del self._rank[course]
+
+    def _unindex(self, course: str) -> None:
+        """remove the keywords of course from the postings, keeping its rank."""
+        keywords = self._texts.pop(course)
+        for gram in grams(keywords):
+            postings = self._gram_postings[gram]
+            postings.discard(course)
+            if not postings:
+                del self._gram_postings[gram]
+        for token in set(tokenize(keywords)):
+            postings = self._token_postings[token]
+            postings.pop(course, None)
+            if not postings:
+                del self._token_postings[token]
+                self._vocabulary = None
+
+    def substring(self, text: str) -> list[str]:
+        """return all courses whose keywords contain text, which is the same as testing text in keywords for every
+        course. Only the courses sharing the rarest n-gram of text are checked."""
+        if len(text) < GRAM_SIZE:
+            candidates = self._texts
+        else:
+            postings = []
+            for gram in grams(text):
+                if gram not in self._gram_postings:
+                    return []
+                postings.append(self._gram_postings[gram])
+            candidates = min(postings, key=len)
+        return self._ordered(course for course in candidates if text in self._texts[course])
+
+    def search(self, query: str, match_all: bool = True, prefix: bool = False) -> list[str]:
+        """return the courses matching the words of query, most relevant first.
+
+        match_all: if True, a course must match every word of query, otherwise matching any word is enough.
+        prefix: if True, a word of query also matches every word that starts with it.
+
+        Courses are ranked by the sum over the words of query of tf * idf of the best matching word of the course,
+        where tf is the number of times the word appears in the keywords of the course, and idf is
+        log(1 + number of courses / number of courses containing the word). Ties keep the order of the index.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        scores = {}
+        matched = None
+        for term in terms:
+            term_scores = {}
+            for token in self._matching_tokens(term, prefix):
+                postings = self._token_postings[token]
+                idf = math.log(1 + len(self._texts) / len(postings))
+                for course, count in postings.items():
+                    term_scores[course] = max(term_scores.get(course, 0.0), count * idf)
+            if match_all:
+                matched = set(term_scores) if matched is None else matched & term_scores.keys()
+                if not matched:
+                    return []
+            for course, score in term_scores.items():
+                scores[course] = scores.get(course, 0.0) + score
+        if match_all:
+            scores = {course: scores[course] for course in matched}
+        return sorted(scores, key=lambda course: (-scores[course], self._rank[course]))
+
+    def _matching_tokens(self, term: str, prefix: bool) -> list[str]:
+        """return the indexed words matching term: term itself, or every word starting with term if prefix."""
+        if not prefix:
+            return [term] if term in self._token_postings else []
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._token_postings)
+        lst = []
+        i = bisect_left(self._vocabulary, term)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(term):
+            lst.append(self._vocabulary[i])
+            i += 1
+        return lst
+
+    def _ordered(self, courses: Iterable[str]) -> list[str]:
+        """return courses sorted by the order in which they were added to the index."""
+        return sorted(courses, key=self._rank.__getitem__)
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['math', 're', 'bisect'],
+        'disable': ['E9969', 'R1702', 'R1701', 'R0912']
+    })
@@ -0,0 +1,235 @@
+"""A layered drawing of the prerequisite graph: every course is put on the layer below its deepest prerequisite, and
+the courses of each layer are ordered to keep them close to their prerequisites and to the courses requiring them,
+so that the picture reads from the introductory courses at the top to the most advanced ones at the bottom.
+
+The layout of the whole catalog is computed once and written next to the catalog file, under a digest of its
+prerequisites, so later runs only read it. Pictures of a part of the catalog reuse its coordinates instead of
+running a force directed layout, and come out the same every time."""
+import hashlib
+import json
+import os
+import tempfile
+from typing import Iterable, Optional
+
+from proj_objects import CourseGraph
+
+LAYOUT_SUFFIX = '.layout.json'
+# increased whenever the algorithm changes, so that layouts written by an older version are computed again
+LAYOUT_FORMAT = 1
+# the number of times the layers are reordered, alternately from the top and from the bottom
+SWEEPS = 4
+
+Position = tuple[float, float]
+
+
+def graph_digest(graph: CourseGraph) -> str:
+    """return a digest of the courses of graph and of the courses each one requires, which changes exactly when the
+    layered layout may change."""
+    digest = hashlib.sha1(f'{LAYOUT_FORMAT}'.encode())
+    for name in sorted(graph.courses):
+        prereqs = sorted(set(graph._prereq_names(graph.courses[name].prereq)))
+        digest.update(f'\n{name}:{",".join(prereqs)}'.encode())
+    return digest.hexdigest()
+
+
+def assign_layers(graph: CourseGraph) -> dict[str, int]:
+    """return the layer of every course: 0 for the courses without prerequisites, and one more than the deepest of
+    its prerequisites for the others. The courses on a prerequisite cycle, and those requiring them, go on the layer
+    after all the others.
+
+    >>> g = CourseGraph()
+    >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}])
+    >>> g.add_edge('CSC236H1', [({'CSC148H1': 60}, {'CSC165H1': 60})])
+    >>> assign_layers(g)
+    {'CSC148H1': 1, 'CSC108H1': 0, 'CSC236H1': 2, 'CSC165H1': 0}
+    """
+    waiting = {name: len(set(graph._prereq_names(course.prereq))) for name, course in graph.courses.items()}
+    layers = {name: 0 for name, count in waiting.items() if count == 0}
+    queue = list(layers)
+    for name in queue:
+        for higher in graph.courses[name].higher_courses:
+            waiting[higher] -= 1
+            if waiting[higher] == 0:
+                layers[higher] = 1 + max(layers[pre] for pre in graph._prereq_names(graph.courses[higher].prereq))
+                queue.append(higher)
+    last = 1 + max(layers.values(), default=-1)
+    return {name: layers.get(name, last) for name in graph.courses}
+
+
+def layered_layout(graph: CourseGraph, sweeps: int = SWEEPS) -> dict[str, Position]:
+    """return the (x, y) position of every course of graph, both between -1 and 1: y goes down one step per layer
+    (see assign_layers), and the courses of a layer are spread evenly along x in an order found by the barycenter
+    heuristic: each layer is sorted by the mean position of the neighbours of its courses in the layers already
+    placed, going down then up, sweeps times.
+
+    >>> g = CourseGraph()
+    >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}])
+    >>> g.add_edge('MAT237Y1', [{'MAT137Y1': 60}])
+    >>> g.add_edge('MAT337H1', [{'MAT237Y1': 60}])
+    >>> layered_layout(g)
+    {'CSC108H1': (-1.0, 1.0), 'MAT137Y1': (1.0, 1.0), 'CSC148H1': (-1.0, 0.0), 'MAT237Y1': (1.0, 0.0), \
+'MAT337H1': (0.0, -1.0)}
+    """
+    layers = assign_layers(graph)
+    rows = [[] for _ in range(1 + max(layers.values(), default=-1))]
+    for name in sorted(graph.courses):
+        rows[layers[name]].append(name)
+    index = {name: i for row in rows for i, name in enumerate(row)}
+    prereqs = {name: set(graph._prereq_names(course.prereq)) for name, course in graph.courses.items()}
+
+    def reorder(row: list[str], neighbours: dict[str, Iterable[str]], placed: set[int]) -> None:
+        """sort row by the mean position of the neighbours of each course in the layers of placed, keeping the
+        position of a course without such neighbours."""
+        keys = {}
+        for name in row:
+            around = [index[other] / max(1, len(rows[layers[other]]) - 1) * (len(row) - 1)
+                      for other in neighbours[name] if layers[other] in placed]
+            keys[name] = sum(around) / len(around) if around else index[name]
+        row.sort(key=lambda name: (keys[name], index[name]))
+        for i, name in enumerate(row):
+            index[name] = i
+
+    higher = {name: course.higher_courses for name, course in graph.courses.items()}
+    for sweep in range(sweeps):
+        order = range(1, len(rows)) if sweep % 2 == 0 else range(len(rows) - 2, -1, -1)
+        for layer in order:
+            done = set(range(layer)) if sweep % 2 == 0 else set(range(layer + 1, len(rows)))
+            reorder(rows[layer], prereqs if sweep % 2 == 0 else higher, done)
+    return _positions(rows)
+
+
+def _positions(rows: list[list[str]]) -> dict[str, Position]:
+    """return the positions of the courses of rows, row i holding the courses of the i-th layer from the top in
+    order, each row centred on x = 0 and spread like the widest one."""
+    width = max((len(row) for row in rows), default=1)
+    positions = {}
+    for i, row in enumerate(rows):
+        y = 1.0 - 2.0 * i / (len(rows) - 1) if len(rows) > 1 else 0.0
+        for j, name in enumerate(row):
+            x = (2.0 * j - (len(row) - 1)) / (width - 1) if width > 1 else 0.0
+            positions[name] = (x, y)
+    return positions
+
+
+def subgraph_layout(positions: dict[str, Position], nodes: Iterable[str]) -> dict[str, Position]:
+    """return positions for the courses of nodes taken from the layout positions of the whole graph: the courses
+    keep their layers and their order within each layer, and the empty layers and gaps are closed up.
+
+    >>> whole = {'A': (-1.0, 1.0), 'B': (1.0, 1.0), 'C': (0.0, 0.0), 'D': (0.5, -1.0)}
+    >>> subgraph_layout(whole, ['D', 'B', 'A'])
+    {'A': (-1.0, 1.0), 'B': (1.0, 1.0), 'D': (0.0, -1.0)}
+    """
+    by_layer = {}
+    for name in set(nodes):
+        x, y = positions[name]
+        by_layer.setdefault(y, []).append((x, name))
+    rows = [[name for _, name in sorted(by_layer[y])] for y in sorted(by_layer, reverse=True)]
+    return _positions(rows)
+
+
+class LayoutEngine:
+    """
+    The layered layout of a CourseGraph, computed when it is first needed and again only after the graph changes
+    (see CourseGraph.version). If path is given, the layout is also kept in that file, so that a later program
+    with the same prerequisites reads it instead of computing it.
+
+    >>> g = CourseGraph()
+    >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}])
+    >>> with tempfile.TemporaryDirectory() as directory:
+    ...     path = os.path.join(directory, 'catalog.csv' + LAYOUT_SUFFIX)
+    ...     first = LayoutEngine(g, path).positions()
+    ...     second = LayoutEngine(g, path)
+    ...     print(second.positions() == first, second.computed)
+    True 0
+    """
+    computed: int
+    _graph: CourseGraph
+    _path: Optional[str]
+    # (graph version, positions) of the last layout
+    _layout: Optional[tuple[int, dict[str, Position]]]
+
+    def __init__(self, graph: CourseGraph, path: Optional[str] = None) -> None:
+        """computed counts the layouts computed, rather than read from path."""
+        self._graph = graph
+        self._path = path
+        self._layout = None
+        self.computed = 0
+
+    def positions(self) -> dict[str, Position]:
+        """return the position of every course of the graph. Do not modify the returned dictionary."""
+        if self._layout is None or self._layout[0] != self._graph.version:
+            key = graph_digest(self._graph)
+            positions = self._read(key)
+            if positions is None:
+                positions = layered_layout(self._graph)
+                self.computed += 1
+                self._write(key, positions)
+            self._layout = (self._graph.version, positions)
+        return self._layout[1]
+
+    def subgraph(self, nodes: Iterable[str]) -> dict[str, Position]:
+        """return the positions of the courses of nodes, see subgraph_layout."""
+        return subgraph_layout(self.positions(), nodes)
+
+    def _read(self, key: str) -> Optional[dict[str, Position]]:
+        """return the positions stored in the file for key, or None if there is none, or if the file cannot be read
+        or is not a layout.
+
+        >>> g = CourseGraph()
+        >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}])
+        >>> with tempfile.TemporaryDirectory() as directory:
+        ...     path = os.path.join(directory, 'catalog.csv' + LAYOUT_SUFFIX)
+        ...     for text in ['[1, 2]', '{"format": 1, "key": "%s"}', '{"format": 1, "key": "%s", "positions": 3}']:
+        ...         with open(path, 'w') as file:
+        ...             _ = file.write(text.replace('%s', graph_digest(g)))
+        ...         print(LayoutEngine(g, path)._read(graph_digest(g)))
+        None
+        None
+        None
+        """
+        if self._path is None:
+            return None
+        try:
+            with open(self._path) as file:
+                data = json.load(file)
+            if data.get('format') != LAYOUT_FORMAT or data.get('key') != key:
+                return None
+            return {name: tuple(position) for name, position in data['positions'].items()}
+        except (OSError, ValueError, AttributeError, KeyError, TypeError):
+            return None
+
+    def _write(self, key: str, positions: dict[str, Position]) -> None:
+        """store positions in the file for key, replacing it atomically. A file that cannot be written only
+        costs the speed-up."""
+        if self._path is None:
+            return
+        temporary = None
+        try:
+            # a file of its own, so that two threads or processes writing at once do not mix their layouts
+            with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(self._path) or '.', delete=False,
+                                             prefix=os.path.basename(self._path) + '.', suffix='.tmp') as file:
+                temporary = file.name
+                json.dump({'format': LAYOUT_FORMAT, 'key': key, 'positions': positions}, file)
+            os.replace(temporary, self._path)
+        except OSError:
+            if temporary is not None and os.path.exists(temporary):
+                os.remove(temporary)
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['hashlib', 'json', 'os', 'tempfile', 'proj_objects'],
+        'allowed-io': ['LayoutEngine._read', 'LayoutEngine._write'],
+        'disable': ['E9969', 'R1702', 'R1701', 'R0912', 'W0212']
+    })
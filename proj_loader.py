@@ -0,0 +1,231 @@
+"""Load a CourseGraph from many catalog files at once: the csv files of this project and the .xls files written by
+csc111_proj_data. Rows are streamed from the files in chunks, the prerequisite strings of each chunk are parsed in a
+pool of worker processes, and the parsed chunks are merged into one graph in file and row order, so the result is the
+same as chaining read_csv_with_graph over the files, whatever the number of workers.
+
+There is one difference: a csv file starting with a byte order mark, like sta_course.csv, has its first course read
+correctly here (STA130H1), while read_csv_with_graph keeps the mark and reads the code ' STA130H' instead."""
+import csv
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Iterator, Optional
+
+from proj_objects import CourseGraph
+from proj_prereq_parser import PARSE_CACHE
+from proj_validation import check_graph
+
+# number of rows sent to a worker at a time
+CHUNK_SIZE = 256
+# the .xls catalogs bundled with the project
+XLS_FILES = ['cs_course.xls', 'math_course.xls']
+# (code, keywords, prerequisite string) of one course, as read from a catalog file
+Row = tuple[str, str, str]
+
+
+class FileStats:
+    """
+    How long loading one catalog file took.
+
+    path: the file.
+    rows: the number of courses read from it.
+    size: its size in bytes.
+    parse_seconds: the time the workers spent parsing its prerequisites, added over its chunks.
+    seconds: the time from reading its first row to merging its last chunk into the graph.
+    """
+    path: str
+    rows: int
+    size: int
+    parse_seconds: float
+    seconds: float
+    _start: float
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.rows = 0
+        self.size = os.path.getsize(path)
+        self.parse_seconds = 0.0
+        self.seconds = 0.0
+        self._start = time.perf_counter()
+
+    def rows_per_second(self) -> float:
+        """return the number of rows loaded per second of self.seconds."""
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __repr__(self) -> str:
+        return (f'{self.path}: {self.rows} rows, {self.size} bytes in {self.seconds * 1000:.1f} ms '
+                f'({self.rows_per_second():,.0f} rows/s, {self.parse_seconds * 1000:.1f} ms parsing)')
+
+
+def course_fields(name: str, prereq: str) -> Row:
+    """return the (code, keywords, prerequisite string) of a row whose first cell is name, like
+    ' CSC110Y1 - Foundations of Computer Science I', and whose second cell is prereq. The cell may start with a byte
+    order mark and any number of spaces: the csv files have one, the .xls files none.
+
+    >>> course_fields(' CSC110Y1 - Foundations of Computer Science I', '')
+    ('CSC110Y1', 'foundations of computer science i', '')
+    >>> course_fields('\\ufeffMAT137Y1 - Calculus with Proofs', 'MAT135H1')
+    ('MAT137Y1', 'calculus with proofs', 'MAT135H1')
+    """
+    text = name.lstrip('\ufeff')
+    start = len(text) - len(text.lstrip(' '))
+    return (text[start:start + 8], text[start + 11:].lower(), prereq)
+
+
+def iter_csv_rows(path: str) -> Iterator[Row]:
+    """yield the rows of the csv catalog at path, one at a time."""
+    with open(path, encoding='utf-8-sig') as file:
+        for line in csv.reader(file):
+            if line:
+                yield course_fields(line[0], line[1] if len(line) > 1 else '')
+
+
+def iter_xls_rows(path: str) -> Iterator[Row]:
+    """yield the rows of the .xls catalog at path, as written by csc111_proj_data.save_data: the course name in the
+    first column and the prerequisites in the second. Sheets are loaded one at a time.
+
+    >>> folder = os.path.dirname(os.path.abspath(__file__))
+    >>> next(iter_xls_rows(os.path.join(folder, 'cs_course.xls')))
+    ('CSC104H1', 'computational thinking', ' ')
+    >>> g, stats = load_catalogs([os.path.join(folder, name) for name in XLS_FILES], workers=1)
+    >>> len(g.courses), [s.rows for s in stats]
+    (171, [72, 75])
+    """
+    # xlrd is only needed for .xls catalogs
+    import xlrd
+
+    book = xlrd.open_workbook(path, on_demand=True)
+    try:
+        for index in range(book.nsheets):
+            sheet = book.sheet_by_index(index)
+            for i in range(sheet.nrows):
+                cells = sheet.row_values(i, 0, 2)
+                if cells and str(cells[0]).strip():
+                    yield course_fields(str(cells[0]), str(cells[1]) if len(cells) > 1 else '')
+            book.unload_sheet(index)
+    finally:
+        book.release_resources()
+
+
+def iter_rows(path: str) -> Iterator[Row]:
+    """yield the rows of the catalog at path, which is a .csv or a .xls file."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return iter_csv_rows(path)
+    elif extension == '.xls':
+        return iter_xls_rows(path)
+    else:
+        raise ValueError(f'unsupported catalog file {path!r}: expected a .csv or .xls file')
+
+
+def parse_chunk(rows: list[Row]) -> tuple[list[tuple[str, str, list]], float]:
+    """return the rows with their prerequisite strings parsed, and the time the parsing took. This runs in the
+    worker processes, each with its own parse cache."""
+    start = time.perf_counter()
+    parsed = [(code, keywords, PARSE_CACHE.parse(prereq)) for code, keywords, prereq in rows]
+    return (parsed, time.perf_counter() - start)
+
+
+def iter_chunks(paths: list[str], stats: list[FileStats], chunk_size: int) -> Iterator[tuple[int, list[Row]]]:
+    """yield (file index, rows) for consecutive chunks of at most chunk_size rows of each file, in order, adding a
+    FileStats for each file to stats as soon as it is opened."""
+    for index, path in enumerate(paths):
+        stats.append(FileStats(path))
+        rows = iter_rows(path)
+        chunk = list(islice(rows, chunk_size))
+        while chunk:
+            yield (index, chunk)
+            chunk = list(islice(rows, chunk_size))
+
+
+class _InlineExecutor(Executor):
+    """an Executor running each call immediately in this process, used when no worker processes are wanted."""
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+def load_catalogs(paths: list[str], graph: Optional[CourseGraph] = None, workers: Optional[int] = None,
+                  chunk_size: int = CHUNK_SIZE, validate: bool = False) -> tuple[CourseGraph, list[FileStats]]:
+    """return the graph of the catalog files at paths, added to graph if one is given, together with the loading
+    statistics of each file.
+
+    The prerequisites are parsed by a pool of workers processes (as many as the machine has cores if workers is
+    None), or in this process if workers is 0 or 1. At most twice as many chunks as there are workers are read
+    ahead of the merge, so only a few chunks of rows are in memory at a time, whatever the size of the files. Chunks
+    are merged in the order they were read, so that a course appearing in several files gets the keywords of the
+    last file and the prerequisites of all of them, as with read_csv_with_graph.
+
+    If validate is True, the merged graph is checked by proj_validation.check_graph, which raises
+    GraphValidationError if it has a prerequisite cycle or a malformed course code.
+
+    >>> import tempfile
+    >>> with tempfile.TemporaryDirectory() as directory:
+    ...     paths = [os.path.join(directory, name) for name in ['a.csv', 'b.csv']]
+    ...     with open(paths[0], 'w') as file:
+    ...         _ = file.write(' CSC148H1 - Introduction to Computer Science,CSC108H1\\n')
+    ...     with open(paths[1], 'w') as file:
+    ...         _ = file.write(' MAT237Y1 - Multivariable Calculus,60% or higher in MAT137Y1\\n')
+    ...     g, stats = load_catalogs(paths, workers=1, chunk_size=1)
+    >>> sorted(g.courses)
+    ['CSC108H1', 'CSC148H1', 'MAT137Y1', 'MAT237Y1']
+    >>> g.courses['MAT237Y1'].prereq
+    [{'MAT137Y1': 60}]
+    >>> [s.rows for s in stats]
+    [1, 1]
+    """
+    if graph is None:
+        graph = CourseGraph()
+    if workers is None:
+        workers = os.cpu_count() or 1
+    stats = []
+    executor = ProcessPoolExecutor(workers) if workers > 1 else _InlineExecutor()
+    with executor:
+        pending = deque()
+        chunks = iter_chunks(paths, stats, chunk_size)
+        for index, rows in chunks:
+            pending.append((index, len(rows), executor.submit(parse_chunk, rows)))
+            while len(pending) > 2 * max(workers, 1) or (pending and pending[0][2].done()):
+                _merge(graph, stats, *pending.popleft())
+        while pending:
+            _merge(graph, stats, *pending.popleft())
+    if validate:
+        check_graph(graph)
+    return (graph, stats)
+
+
+def _merge(graph: CourseGraph, stats: list[FileStats], index: int, n_rows: int, future: Future) -> None:
+    """add the parsed rows of future, read from the file with the given index, to graph and record them in
+    stats."""
+    parsed, parse_seconds = future.result()
+    for code, keywords, prereq in parsed:
+        graph.add_course(code, keywords)
+        graph.add_edge(code, prereq, check_cycles=False)
+    file_stats = stats[index]
+    file_stats.rows += n_rows
+    file_stats.parse_seconds += parse_seconds
+    file_stats.seconds = time.perf_counter() - file_stats._start
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['csv', 'os', 'time', 'collections', 'concurrent.futures', 'itertools', 'xlrd',
+                          'proj_objects', 'proj_prereq_parser', 'proj_validation'],
+        'allowed-io': ['iter_csv_rows'],
+        'disable': ['E9969', 'R1702', 'R1701', 'R0912', 'C0415', 'W0212']
+    })
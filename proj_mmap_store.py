@@ -0,0 +1,298 @@
+"""A read-only CourseGraph that works directly on a memory-mapped snapshot (see proj_snapshot), so that many
+processes serving the same catalog share one copy of it through the operating system's page cache, and a Course
+object only exists while somebody is using it."""
+import mmap
+import struct
+from bisect import bisect_right
+from collections.abc import Mapping
+from typing import Iterator, Optional
+
+from proj_keyword_index import KeywordIndex
+from proj_objects import Course, CourseGraph
+from proj_snapshot import HAS_COSTS, COST_IS_INT, RECORD, SnapshotHeader, decode_prereq, load_or_build, \
+    SNAPSHOT_SUFFIX
+
+
+class StringTable:
+    """
+    The string table of a snapshot, decoding a string each time it is indexed.
+    """
+    _buffer: mmap.mmap
+    _offsets: memoryview
+    _blob_start: int
+
+    def __init__(self, buffer: mmap.mmap, header: SnapshotHeader) -> None:
+        self._buffer = buffer
+        self._offsets = header.uint32s(buffer, 'string_offsets', 0, header.n_strings + 1)
+        self._blob_start = header.sections['string_blob']
+
+    def __getitem__(self, i: int) -> str:
+        start = self._blob_start + self._offsets[i]
+        return self._buffer[start:self._blob_start + self._offsets[i + 1]].decode('utf-8')
+
+    def release(self) -> None:
+        """release the view of the string offsets, so that the map can be closed."""
+        self._offsets.release()
+
+    def find_all(self, text: str, first: int, last: int) -> list[int]:
+        """return the ids, between first (inclusive) and last (exclusive), of the strings containing text, using
+        a byte search over the blob instead of decoding every string."""
+        needle = text.encode('utf-8')
+        start = self._blob_start + self._offsets[first]
+        end = self._blob_start + self._offsets[last]
+        ids = []
+        pos = self._buffer.find(needle, start, end)
+        while pos != -1:
+            i = bisect_right(self._offsets, pos - self._blob_start, first, last + 1) - 1
+            string_end = self._blob_start + self._offsets[i + 1]
+            if pos + len(needle) <= string_end:
+                # a match inside string i: continue after the end of it
+                ids.append(i)
+                pos = self._buffer.find(needle, string_end, end)
+            else:
+                # the match runs into the next string: look again from the next byte
+                pos = self._buffer.find(needle, pos + 1, end)
+        return ids
+
+
+class MappedCourse(Course):
+    """
+    A view of one course of a snapshot. Its prerequisites, higher courses and keywords are decoded from the
+    snapshot each time they are read, and cannot be changed.
+    """
+    _store: 'MappedCourses'
+    _id: int
+
+    def __init__(self, store: 'MappedCourses', course_id: int) -> None:
+        # Course.__init__ is not called: its attributes are properties decoding the snapshot
+        self._store = store
+        self._id = course_id
+        self.name = store.strings[course_id]
+
+    @property
+    def prereq(self) -> list:
+        """the prerequisites of the course, decoded from the snapshot."""
+        record = self._store.record(self._id)
+        return decode_prereq(self._store.prereq_words, record[1], self._store.strings)[0]
+
+    @property
+    def higher_courses(self) -> frozenset:
+        """the courses that have this course as a prerequisite, decoded from the snapshot."""
+        record = self._store.record(self._id)
+        ids = self._store.higher_ids[record[3]:record[3] + record[4]]
+        return frozenset(self._store.strings[i] for i in ids)
+
+    @property
+    def key_words(self) -> str:
+        """the keywords of the course, decoded from the snapshot."""
+        return self._store.strings[self._store.record(self._id)[0]]
+
+
+class MappedCourses(Mapping):
+    """
+    A read-only mapping from course code to MappedCourse over a memory-mapped snapshot. Codes are found by binary
+    search over the sorted ids of the snapshot, so no dictionary of all codes is ever built.
+    """
+    header: SnapshotHeader
+    strings: StringTable
+    prereq_words: memoryview
+    higher_ids: memoryview
+    plan_ids: memoryview
+    _buffer: mmap.mmap
+    _sorted_ids: memoryview
+
+    def __init__(self, buffer: mmap.mmap, header: SnapshotHeader) -> None:
+        self._buffer = buffer
+        self.header = header
+        self.strings = StringTable(buffer, header)
+        self.prereq_words = header.uint32s(buffer, 'prereq')
+        self.higher_ids = header.uint32s(buffer, 'higher')
+        self.plan_ids = header.uint32s(buffer, 'plans')
+        self._sorted_ids = header.uint32s(buffer, 'sorted_ids', 0, header.n_courses)
+
+    def __len__(self) -> int:
+        return self.header.n_courses
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self.header.n_courses):
+            yield self.strings[i]
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self.find(name) is not None
+
+    def __getitem__(self, name: str) -> MappedCourse:
+        course_id = self.find(name)
+        if course_id is None:
+            raise KeyError(name)
+        return MappedCourse(self, course_id)
+
+    def find(self, name: str) -> Optional[int]:
+        """return the id of the course called name, or None if there is no such course."""
+        low, high = 0, self.header.n_courses
+        while low < high:
+            mid = (low + high) // 2
+            mid_name = self.strings[self._sorted_ids[mid]]
+            if mid_name < name:
+                low = mid + 1
+            elif mid_name > name:
+                high = mid
+            else:
+                return self._sorted_ids[mid]
+        return None
+
+    def record(self, course_id: int) -> tuple:
+        """return the fields of the record of the course with id course_id, see proj_snapshot.RECORD."""
+        return RECORD.unpack_from(self._buffer, self.header.sections['records'] + course_id * RECORD.size)
+
+    def records(self) -> Iterator[tuple]:
+        """return an iterator over the records of all courses, in order."""
+        start = self.header.sections['records']
+        return struct.iter_unpack(RECORD.format, self._buffer[start:start + len(self) * RECORD.size])
+
+    def release(self) -> None:
+        """release every view of the map held by self, so that the map can be closed. Reading a course of self,
+        or a MappedCourse taken from it, raises ValueError afterwards."""
+        self.strings.release()
+        for view in (self.prereq_words, self.higher_ids, self.plan_ids, self._sorted_ids):
+            view.release()
+
+
+class MappedCourseGraph(CourseGraph):
+    """
+    A read-only CourseGraph backed by a memory-mapped snapshot file.
+
+    The query methods of CourseGraph work unchanged on the MappedCourse views of self.courses. compute_cost reads
+    the precomputed cost from the snapshot when it has one, and course_with_keywords searches the keywords in the
+    mapped file. search_keywords builds a KeywordIndex in memory the first time it is called.
+    add_course, add_edge, replace_prereq and remove_course raise TypeError.
+
+    >>> import os, tempfile
+    >>> from proj_snapshot import save_snapshot
+    >>> g = CourseGraph()
+    >>> g.add_course('CSC148H1', 'introduction to computer science')
+    >>> g.add_course('CSC108H1', 'introduction to computer programming')
+    >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}])
+    >>> with tempfile.TemporaryDirectory() as directory:
+    ...     path = os.path.join(directory, 'graph.cgsnap')
+    ...     save_snapshot(g, path)
+    ...     with MappedCourseGraph(path) as mapped:
+    ...         print(mapped.compute_cost('CSC148H1'), mapped.find_higher_courses(['CSC108H1']),
+    ...               mapped.course_with_keywords('computer'), mapped.courses['CSC148H1'].prereq)
+    (1.0, ['CSC108H1']) ['CSC148H1'] ['CSC148H1', 'CSC108H1'] [{'CSC108H1': 60}]
+    """
+    courses: MappedCourses
+    _file: object
+    _mmap: mmap.mmap
+
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.courses = MappedCourses(self._mmap, SnapshotHeader(self._mmap))
+        self.keyword_index = None
+
+    @staticmethod
+    def from_catalog(csv_path: str) -> 'MappedCourseGraph':
+        """return the graph of the csv catalog at csv_path mapped from its snapshot, writing the snapshot first if
+        it is missing or out of date."""
+        load_or_build(csv_path)
+        return MappedCourseGraph(csv_path + SNAPSHOT_SUFFIX)
+
+    def __enter__(self) -> 'MappedCourseGraph':
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """release the memory map and the file. The graph cannot be used afterwards, and reading a course view
+        still held raises ValueError.
+
+        >>> import os, tempfile
+        >>> from proj_snapshot import save_snapshot
+        >>> g = CourseGraph()
+        >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}])
+        >>> with tempfile.TemporaryDirectory() as directory:
+        ...     path = os.path.join(directory, 'graph.cgsnap')
+        ...     save_snapshot(g, path)
+        ...     mapped = MappedCourseGraph(path)
+        ...     course = mapped.courses['CSC148H1']
+        ...     mapped.close()
+        ...     print(mapped._mmap.closed, mapped._file.closed)
+        True True
+        >>> course.prereq
+        Traceback (most recent call last):
+        ...
+        ValueError: mmap closed or invalid
+        """
+        if self.courses is None:
+            return
+        # views of the map, including those reachable from course views still held, must be released before the
+        # map can be closed
+        self.courses.release()
+        self.courses = None
+        self._mmap.close()
+        self._file.close()
+
+    def add_course(self, name: str, keywords: Optional = '') -> None:
+        """a mapped graph cannot be changed."""
+        raise TypeError('a MappedCourseGraph is read-only')
+
+    def add_edge(self, course1: str, prereq: list, check_cycles: bool = True) -> None:
+        """a mapped graph cannot be changed."""
+        raise TypeError('a MappedCourseGraph is read-only')
+
+    def replace_prereq(self, course: str, prereq: list) -> None:
+        """a mapped graph cannot be changed."""
+        raise TypeError('a MappedCourseGraph is read-only')
+
+    def remove_course(self, course: str) -> None:
+        """a mapped graph cannot be changed."""
+        raise TypeError('a MappedCourseGraph is read-only')
+
+    def compute_cost(self, course: str) -> tuple[float, list[str]]:
+        """return what CourseGraph.compute_cost returns for course, read from the snapshot if it has the costs."""
+        if not self.courses.header.flags & HAS_COSTS:
+            return super().compute_cost(course)
+        course_id = self.courses.find(course)
+        if course_id is None:
+            raise KeyError(course)
+        record = self.courses.record(course_id)
+        plan = [self.courses.strings[i] for i in self.courses.plan_ids[record[5]:record[5] + record[6]]]
+        return (int(record[7]) if record[8] & COST_IS_INT else record[7], plan)
+
+    def course_with_keywords(self, keywords: str) -> list:
+        """return all courses in the graph with the input keywords, searching the keywords in the mapped file."""
+        n_courses = self.courses.header.n_courses
+        if keywords == '':
+            return list(self.courses)
+        matched = set(self.courses.strings.find_all(keywords, n_courses, self.courses.header.n_strings))
+        return [self.courses.strings[i] for i, record in enumerate(self.courses.records()) if record[0] in matched]
+
+    def search_keywords(self, query: str, match_all: bool = True, prefix: bool = False) -> list:
+        """return what CourseGraph.search_keywords returns, building the keyword index on the first call."""
+        if self.keyword_index is None:
+            self.keyword_index = KeywordIndex()
+            for name, course in self.courses.items():
+                self.keyword_index.set(name, course.key_words)
+        return super().search_keywords(query, match_all, prefix)
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['mmap', 'struct', 'bisect', 'collections.abc', 'proj_keyword_index', 'proj_objects',
+                          'proj_snapshot'],
+        'allowed-io': ['__init__'],
+        'disable': ['E9969', 'R1702', 'R1701', 'R0912', 'W0231', 'W0212', 'R1732']
+    })
@@ -1,6 +1,54 @@
 """main part of the project, including the class Course, which represents vertex in the graph, and CourseGraph,
 which represent the graph. Various methods included."""
-from typing import Optional
+import threading
+from typing import Callable, Iterable, Optional
+
+from proj_keyword_index import KeywordIndex
+
+
+# the number of sets of completed courses whose costs CourseGraph.compute_remaining_cost keeps
+REMAINING_TABLES = 64
+
+
+# kinds of GraphChange
+COURSE_ADDED = 'course added'
+KEYWORDS_CHANGED = 'keywords changed'
+PREREQ_CHANGED = 'prerequisites changed'
+COURSE_REMOVED = 'course removed'
+
+
+class PrerequisiteCycleError(Exception):
+    """Raised when the prerequisites of a course eventually require the course itself.
+
+    cycle: the courses on the cycle, in prerequisite order, with the first course repeated at the end.
+    """
+    cycle: list[str]
+
+    def __init__(self, cycle: list[str]) -> None:
+        super().__init__(f'prerequisite cycle: {" -> ".join(cycle)}')
+        self.cycle = cycle
+
+
+class GraphChange:
+    """
+    One change to a CourseGraph, as passed to the listeners of CourseGraph.subscribe.
+
+    kind: COURSE_ADDED, KEYWORDS_CHANGED, PREREQ_CHANGED or COURSE_REMOVED.
+    course: the course that was added, changed or removed.
+    old_prereq: the prerequisites of the course before a PREREQ_CHANGED or COURSE_REMOVED change, and None for the
+        other kinds.
+    """
+    kind: str
+    course: str
+    old_prereq: Optional[list]
+
+    def __init__(self, kind: str, course: str, old_prereq: Optional[list] = None) -> None:
+        self.kind = kind
+        self.course = course
+        self.old_prereq = old_prereq
+
+    def __repr__(self) -> str:
+        return f'GraphChange({self.kind!r}, {self.course!r})'
 
 
 class Course:
@@ -33,35 +81,256 @@ class Course:
 class CourseGraph:
     """
     A graph representation of the course system.
+
+    version: counter bumped by every add_course/add_edge call, used to tell whether cached results
+    computed from the graph are still up to date.
+    keyword_index: inverted index over the keywords of the courses, kept up to date by add_course.
+    frozen: whether self.freeze was called, after which the courses and prerequisites cannot change.
+
+    The cost tables of the query methods fill up as queries are made, under a lock, so a frozen graph can be queried
+    from several threads at once. Changing the graph while another thread queries it is not supported.
     """
     courses: dict[str, Course]
+    version: int
+    keyword_index: KeywordIndex
+    frozen: bool
+    # _cost_table maps a course name to its (cost, plan) as computed by self.compute_cost. add_edge removes the
+    # entries of the courses whose cost it may change, every other entry stays valid.
+    _cost_table: dict[str, tuple[float, tuple[str, ...]]]
+    # _remaining_tables maps a set of completed courses to the cost table of self.compute_remaining_cost for it, the
+    # most recently used last. Changes only remove the entries they may affect, as for _cost_table.
+    _remaining_tables: dict[frozenset, dict[str, tuple[float, tuple[str, ...]]]]
+    # held while _cost_table or _remaining_tables is read or filled; reentrant, since the cost methods call each other
+    _tables_lock: threading.RLock
+    _listeners: list[Callable[['GraphChange'], None]]
 
     def __init__(self) -> None:
         self.courses = {}
+        self.version = 0
+        self.keyword_index = KeywordIndex()
+        self._cost_table = {}
+        self._remaining_tables = {}
+        self._tables_lock = threading.RLock()
+        self._listeners = []
+        self.frozen = False
+
+    def freeze(self) -> None:
+        """make the graph read-only, so that it can be shared by several views or threads: add_course, add_edge,
+        replace_prereq and remove_course raise TypeError from now on. The cost tables of the query methods still
+        fill up as queries are made, under a lock.
+
+        >>> g = CourseGraph()
+        >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}])
+        >>> g.freeze()
+        >>> g.add_course('CSC207H1')
+        Traceback (most recent call last):
+        ...
+        TypeError: a frozen CourseGraph is read-only
+        """
+        self.frozen = True
+
+    def _check_not_frozen(self) -> None:
+        """raise TypeError if the graph is frozen."""
+        if self.frozen:
+            raise TypeError('a frozen CourseGraph is read-only')
 
     def add_course(self, name: str, keywords: Optional = '') -> None:
-        """add courses to the graph"""
+        """add courses to the graph, or replace the keywords of a course already in it"""
+        self._check_not_frozen()
         if name in self.courses:
             self.courses[name].key_words = keywords
+            kind = KEYWORDS_CHANGED
         else:
             self.courses[name] = Course(name, keywords)
+            kind = COURSE_ADDED
+        self.keyword_index.set(name, keywords)
+        self.version += 1
+        self._notify(GraphChange(kind, name))
+
+    def add_edge(self, course1: str, prereq: list, check_cycles: bool = True) -> None:
+        """add edge between a course and all of its prerequisite. The courses not in the graph yet are added first,
+        so that the listeners of self.subscribe never see a course whose prerequisites are only partly added.
+
+        Raise PrerequisiteCycleError, without changing anything, if prereq would make course1 one of its own
+        prerequisites. Loaders reading a whole catalog pass check_cycles=False, and report the cycles of the
+        finished graph with proj_validation instead.
 
-    def add_edge(self, course1: str, prereq: list) -> None:
-        """add edge between a course and all of its prerequisite"""
+        >>> g = CourseGraph()
+        >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}])
+        >>> g.add_edge('CSC108H1', [{'CSC148H1': 50}])
+        Traceback (most recent call last):
+        ...
+        proj_objects.PrerequisiteCycleError: prerequisite cycle: CSC108H1 -> CSC148H1 -> CSC108H1
+        >>> g.courses['CSC108H1'].prereq, g.courses['CSC148H1'].higher_courses
+        ([], set())
+        """
+        self._check_not_frozen()
+        if check_cycles:
+            self._check_no_cycle(course1, prereq)
         if course1 not in self.courses:
             self.add_course(course1)
+        self._add_placeholders(prereq)
         curr_course = self.courses[course1]
+        old_prereq = list(curr_course.prereq)
         for item in prereq:
             curr_course.prereq.append(item)
         self._add_edge(course1, prereq)
+        self._invalidate_costs(course1)
+        self.version += 1
+        self._notify(GraphChange(PREREQ_CHANGED, course1, old_prereq))
+
+    def replace_prereq(self, course: str, prereq: list) -> None:
+        """replace all prerequisites of course by prereq (the course is added if it is not in the graph yet). The
+        higher courses of the courses no longer mentioned are updated, and only the costs that depend on course are
+        recomputed later. Raise PrerequisiteCycleError, without changing anything, if prereq would make course
+        one of its own prerequisites.
+
+        >>> g = CourseGraph()
+        >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}])
+        >>> g.compute_cost('CSC148H1')
+        (1.0, ['CSC108H1'])
+        >>> g.replace_prereq('CSC148H1', [{'CSC110Y1': 60}])
+        >>> g.compute_cost('CSC148H1'), g.courses['CSC108H1'].higher_courses
+        ((1.5, ['CSC110Y1']), set())
+        >>> g.replace_prereq('CSC110Y1', [{'CSC148H1': 60}])
+        Traceback (most recent call last):
+        ...
+        proj_objects.PrerequisiteCycleError: prerequisite cycle: CSC110Y1 -> CSC148H1 -> CSC110Y1
+        """
+        self._check_not_frozen()
+        self._check_no_cycle(course, prereq)
+        if course not in self.courses:
+            self.add_course(course)
+        self._add_placeholders(prereq)
+        curr_course = self.courses[course]
+        old_prereq = curr_course.prereq
+        for name in set(self._prereq_names(old_prereq)) - set(self._prereq_names(prereq)):
+            self.courses[name].higher_courses.discard(course)
+        curr_course.prereq = list(prereq)
+        self._add_edge(course, prereq)
+        self._invalidate_costs(course)
+        self.version += 1
+        self._notify(GraphChange(PREREQ_CHANGED, course, old_prereq))
+
+    def _check_no_cycle(self, course: str, prereq: list) -> None:
+        """raise PrerequisiteCycleError if course is a direct or indirect prerequisite of a course in prereq."""
+        # parent maps each course reached to the course whose prerequisites mention it
+        parent = {}
+        stack = []
+        for name in self._prereq_names(prereq):
+            if name not in parent:
+                parent[name] = course
+                stack.append(name)
+        while stack:
+            name = stack.pop()
+            if name == course:
+                cycle = [course]
+                name = parent[course]
+                while name != course:
+                    cycle.append(name)
+                    name = parent[name]
+                cycle.append(course)
+                raise PrerequisiteCycleError(cycle[::-1])
+            if name in self.courses:
+                for pre in self._prereq_names(self.courses[name].prereq):
+                    if pre not in parent:
+                        parent[pre] = name
+                        stack.append(pre)
+
+    def remove_prereq(self, course: str) -> None:
+        """remove all prerequisites of course."""
+        self.replace_prereq(course, [])
+
+    def remove_course(self, course: str) -> None:
+        """remove course and its prerequisites from the graph. Raise ValueError if it is still a prerequisite of
+        another course: replace their prerequisites first.
+
+        >>> g = CourseGraph()
+        >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}])
+        >>> g.remove_course('CSC108H1')
+        Traceback (most recent call last):
+        ...
+        ValueError: CSC108H1 is still a prerequisite of CSC148H1
+        >>> g.remove_course('CSC148H1')
+        >>> list(g.courses), g.courses['CSC108H1'].higher_courses
+        (['CSC108H1'], set())
+        """
+        self._check_not_frozen()
+        curr_course = self.courses[course]
+        if curr_course.higher_courses:
+            raise ValueError(f'{course} is still a prerequisite of {", ".join(sorted(curr_course.higher_courses))}')
+        old_prereq = curr_course.prereq
+        for name in set(self._prereq_names(old_prereq)):
+            self.courses[name].higher_courses.discard(course)
+        self._invalidate_costs(course)
+        del self.courses[course]
+        self.keyword_index.remove(course)
+        self.version += 1
+        self._notify(GraphChange(COURSE_REMOVED, course, old_prereq))
+
+    def subscribe(self, listener: Callable[['GraphChange'], None]) -> None:
+        """call listener with a GraphChange after every change to the graph, so that whatever it computed from the
+        graph can be updated. See self.dependants for the courses a change of prerequisites affects.
+
+        >>> g = CourseGraph()
+        >>> changes = []
+        >>> g.subscribe(changes.append)
+        >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}])
+        >>> g.add_course('CSC148H1', 'introduction to computer science')
+        >>> [(change.kind, change.course) for change in changes]
+        [('course added', 'CSC148H1'), ('course added', 'CSC108H1'), ('prerequisites changed', 'CSC148H1'), \
+('keywords changed', 'CSC148H1')]
+        """
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[['GraphChange'], None]) -> None:
+        """stop calling listener on changes."""
+        self._listeners.remove(listener)
+
+    def _notify(self, change: 'GraphChange') -> None:
+        """call every listener with change."""
+        for listener in list(self._listeners):
+            listener(change)
+
+    def dependants(self, course: str) -> set[str]:
+        """return course and every course that has it as a direct or indirect prerequisite: the courses whose
+        costs and prerequisite closures change when the prerequisites of course change."""
+        found = {course}
+        stack = [course]
+        while stack:
+            for higher in self.courses[stack.pop()].higher_courses:
+                if higher not in found:
+                    found.add(higher)
+                    stack.append(higher)
+        return found
+
+    def _invalidate_costs(self, course: str) -> None:
+        """remove course, and every course that has it as a direct or indirect prerequisite, from the cost table
+        and the tables of self.compute_remaining_cost. A completed course keeps its cost of 0 in the table of its
+        completed courses, and the courses above it only need to go if they depend on course in another way."""
+        with self._tables_lock:
+            tables = [(self._cost_table, frozenset())] + [(table, completed)
+                                                          for completed, table in self._remaining_tables.items()]
+            for table, completed in tables:
+                stack = [course]
+                while stack:
+                    name = stack.pop()
+                    if name in table and name not in completed:
+                        del table[name]
+                        stack.extend(self.courses[name].higher_courses)
+
+    def _add_placeholders(self, prereq: tuple | list) -> None:
+        """add every course mentioned in prereq that is not in the graph yet, without keywords."""
+        for name in self._prereq_names(prereq):
+            if name not in self.courses:
+                self.add_course(name)
 
     def _add_edge(self, course: str, prereq: tuple | list) -> None:
-        """ private helper method of self._add_edge"""
+        """ private helper method of self.add_edge: record course as a higher course of every course mentioned in
+        prereq, which must all be in the graph already"""
         for item in prereq:
             if isinstance(item, dict):
                 for coursename in item:
-                    if coursename not in self.courses:
-                        self.add_course(coursename)
                     curr_course = self.courses[coursename]
                     curr_course.higher_courses.add(course)
             else:
@@ -72,6 +341,11 @@ class CourseGraph:
         for each course, if it's a year course, it's opportunity cost is 1 + total cost
         of its prerequisite. If it's a half year course, it's opportunity is 0.5 + total
         cost of its prerequisite.
+
+        The cost of every course is computed once, in topological order of the prerequisites, and cached until
+        add_edge changes one of its prerequisites, so a prerequisite shared by many courses is not recomputed for
+        each path reaching it. See also self.compute_all_costs.
+        Raise PrerequisiteCycleError if the prerequisites of course contain a cycle.
         # the following are mostly fake courses, only for testing purpose
         >>> g = CourseGraph()
         >>> g.add_course('Mat137H1')
@@ -85,25 +359,137 @@ class CourseGraph:
         >>> g.add_edge('CSC111H1', [({'MAT286H2': 70}, {'MAT179Y1':50}), {'CSC141H1':75}])
         >>> g.compute_cost('Mat137H1')
         (1.5, ['CSC111H1', 'CSC141H1'])
+        >>> g.add_edge('CSC141H1', [{'Mat137H1': 50}], check_cycles=False)
+        >>> g.compute_cost('Mat137H1')
+        Traceback (most recent call last):
+        ...
+        proj_objects.PrerequisiteCycleError: prerequisite cycle: Mat137H1 -> CSC111H1 -> CSC141H1 -> Mat137H1
         """
-        cost = 0
-        if self.is_year_course(course):
-            cost += 1
-        else:
-            cost += 0.5
-        curr_course = self.courses[course]
-        if not curr_course.prereq:
-            return (cost, [])
-        else:
-            min_courses = self.compute_list(curr_course.prereq)
-            cost += min_courses[0]
-            return (cost, min_courses[1])
+        with self._tables_lock:
+            self._fill_cost_table([course])
+            cost, plan = self._cost_table[course]
+        return (cost, list(plan))
+
+    def compute_all_costs(self) -> dict[str, tuple[float, tuple[str, ...]]]:
+        """compute the opportunity cost of every course in the graph in one pass, and return a table mapping each
+        course to its (cost, plan), where cost and plan are what self.compute_cost returns for it (with the plan as
+        a tuple). The table is kept on the graph: later calls to self.compute_cost are plain lookups, and add_edge
+        only drops the entries of the courses that depend on the changed course. Do not modify the returned table.
+
+        >>> g = CourseGraph()
+        >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}])
+        >>> g.add_course('MAT137Y1')
+        >>> g.compute_all_costs()
+        {'CSC108H1': (0.5, ()), 'CSC148H1': (1.0, ('CSC108H1',)), 'MAT137Y1': (1, ())}
+        >>> g.add_edge('CSC108H1', [{'MAT137Y1': 50}])
+        >>> sorted(g.compute_all_costs()) == sorted(g.courses)
+        True
+        >>> g.compute_cost('CSC148H1')
+        (2.0, ['CSC108H1', 'MAT137Y1'])
+        """
+        with self._tables_lock:
+            self._fill_cost_table(self.courses)
+            return self._cost_table
+
+    def compute_remaining_cost(self, course: str, completed: Iterable[str]) -> tuple[float, list[str]]:
+        """return what self.compute_cost returns for course, for a student who already completed the courses in
+        completed: those cost nothing, their own prerequisites are not looked at, and they are left out of the plan.
+
+        The costs computed for a set of completed courses are kept, for the REMAINING_TABLES sets used most
+        recently, so that asking about other courses with the same completed courses only computes what is new.
+        Raise PrerequisiteCycleError if the prerequisites still needed by course contain a cycle.
+
+        >>> g = CourseGraph()
+        >>> g.add_edge('CSC207H1', [{'CSC148H1': 60}])
+        >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}, {'CSC111H1': 60}])
+        >>> g.add_edge('CSC111H1', [{'CSC110Y1': 70}])
+        >>> g.compute_cost('CSC207H1')
+        (1.5, ['CSC148H1', 'CSC108H1'])
+        >>> g.compute_remaining_cost('CSC207H1', {'CSC108H1'})
+        (1.0, ['CSC148H1'])
+        >>> g.compute_remaining_cost('CSC207H1', {'CSC110Y1', 'CSC148H1'})
+        (0.5, [])
+        >>> g.compute_remaining_cost('CSC148H1', {'CSC148H1'})
+        (0, [])
+        >>> g = CourseGraph()
+        >>> g.add_course('CSC207H1')
+        >>> g.compute_remaining_cost('CSC207H1', {'CSC148H1'})
+        (0.5, [])
+        >>> g.add_edge('CSC207H1', [{'CSC148H1': 50}])
+        >>> g.compute_remaining_cost('CSC207H1', {'CSC148H1'})
+        (0.5, [])
+        """
+        completed = frozenset(completed)
+        with self._tables_lock:
+            table = self._remaining_tables.pop(completed, None)
+            if table is None:
+                # every completed course, even one not in the graph yet, so that adding it later keeps it free
+                table = {name: (0, ()) for name in completed}
+                if len(self._remaining_tables) >= REMAINING_TABLES:
+                    del self._remaining_tables[next(iter(self._remaining_tables))]
+            self._remaining_tables[completed] = table
+            self._fill_cost_table([course], table)
+            cost, plan = table[course]
+        return (cost, [name for name in plan if name not in completed])
+
+    def k_cheapest_plans(self, course: str, k: int) -> list[tuple[float, list[str]]]:
+        """return up to k (cost, plan) pairs for course, cheapest first, each taking a different set of courses. The
+        first one is what self.compute_cost returns, the others are the next best alternatives, for example going
+        through MAT157Y1 instead of MAT137Y1. See proj_kbest for how they are found without trying every
+        combination. Raise PrerequisiteCycleError if the prerequisites of course contain a cycle.
+
+        >>> g = CourseGraph()
+        >>> g.add_edge('MAT237Y1', [{'MAT137Y1': 60}, {'MAT157Y1': 50}, ({'MAT135H1': 60}, {'MAT136H1': 60})])
+        >>> g.k_cheapest_plans('MAT237Y1', 4)
+        [(2, ['MAT137Y1']), (2, ['MAT157Y1']), (2.0, [])]
+        """
+        # imported here because proj_kbest imports this module
+        from proj_kbest import PlanEnumerator
+
+        return PlanEnumerator(self).k_cheapest(course, k)
 
     def compute_list(self, prereq: list) -> tuple[float, list[str]]:
         """ helper method of self.compute_cost, input a list and return a tuple that first element is the opportunity
         cost of the item with the least possible opportunity cost(can be a single course as a dictionary or a
         combination of courses like a tuple) in the list, and the second element is a list of all of the prerequisite
         of this item that compose the opportunity cost"""
+        with self._tables_lock:
+            self._fill_cost_table(self._prereq_names(prereq))
+            return self._cost_of_list(prereq)
+
+    def compute_tuple(self, prereq: tuple) -> tuple[float, list[str]]:
+        """helper method of self.compute_cost, input a tuple and return a tuple that first element is the total
+        opportunity cost of the items in the input tuple, and second item is a list of all prerequisite of the items
+        in this tuple that compose the opportunity cost."""
+        with self._tables_lock:
+            self._fill_cost_table(self._prereq_names(prereq))
+            return self._cost_of_tuple(prereq)
+
+    def _fill_cost_table(self, courses: Iterable[str], table: Optional[dict] = None) -> None:
+        """make sure table (self._cost_table by default) holds an up-to-date entry for every course in courses and
+        all of their prerequisites. Each missing course is computed exactly once, after all of its prerequisites,
+        and the prerequisites of the courses already in table are not visited. The caller holds self._tables_lock."""
+        if table is None:
+            table = self._cost_table
+        for name in self.topological_order([c for c in courses if c not in table], skip=table):
+            cost = 0
+            if self.is_year_course(name):
+                cost += 1
+            else:
+                cost += 0.5
+            curr_course = self.courses[name]
+            if not curr_course.prereq:
+                table[name] = (cost, ())
+            else:
+                min_courses = self._cost_of_list(curr_course.prereq, table)
+                cost += min_courses[0]
+                table[name] = (cost, tuple(min_courses[1]))
+
+    def _cost_of_list(self, prereq: list, table: Optional[dict] = None) -> tuple[float, list[str]]:
+        """the body of self.compute_list, reading the cost of single courses from table (self._cost_table by
+        default), which must already hold all of them."""
+        if table is None:
+            table = self._cost_table
         if not prereq:
             return (0.0, [])
         else:
@@ -112,12 +498,13 @@ class CourseGraph:
                 cost = 0
                 lst = []
                 if isinstance(p, tuple):
-                    new = self.compute_tuple(p)
+                    new = self._cost_of_tuple(p, table)
                     lst.extend(new[1])
                     cost += new[0]
                 else:
-                    lst.append([key for key in p][0])
-                    new_value = self.compute_cost([key for key in p][0])
+                    name = next(iter(p))
+                    lst.append(name)
+                    new_value = table[name]
                     lst.extend(new_value[1])
                     cost += new_value[0]
                 compare_list.append((cost, lst))
@@ -129,11 +516,11 @@ class CourseGraph:
                     minlst = item[1]
             return (mincost, minlst)
 
-    def compute_tuple(self, prereq: tuple) -> tuple[float, list[str]]:
-        """helper method of self.compute_cost, input a tuple and return a tuple that first element is the total
-        opportunity cost of the items in the input tuple, and second item is a list of all prerequisite of the items
-        in this tuple that compose the opportunity cost."""
-
+    def _cost_of_tuple(self, prereq: tuple, table: Optional[dict] = None) -> tuple[float, list[str]]:
+        """the body of self.compute_tuple, reading the cost of single courses from table (self._cost_table by
+        default), which must already hold all of them."""
+        if table is None:
+            table = self._cost_table
         if prereq == ():
             return (0.0, [])
         else:
@@ -141,16 +528,64 @@ class CourseGraph:
             lst = []
             for p in prereq:
                 if isinstance(p, list):
-                    new = self.compute_list(p)
-                    lst.extend(new[1])
-                    cost += new[0]
+                    new = self._cost_of_list(p, table)
+                elif isinstance(p, tuple):
+                    new = self._cost_of_tuple(p, table)
                 else:
-                    new = self.compute_cost([key for key in p][0])
-
-                    lst.extend(new[1])
-                    cost += new[0]
+                    new = table[next(iter(p))]
+                lst.extend(new[1])
+                cost += new[0]
             return (cost, lst)
 
+    def topological_order(self, courses: Optional[Iterable[str]] = None, skip: Optional = None) -> list[str]:
+        """return the given courses (all courses if courses is None) together with all of their prerequisites,
+        ordered so that every course comes after all of its prerequisites. Courses in skip, and everything only
+        reachable through them, are left out. Raise PrerequisiteCycleError if a cycle is found.
+
+        >>> g = CourseGraph()
+        >>> g.add_edge('CSC236H1', [({'CSC148H1': 50}, {'CSC165H1': 50})])
+        >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}])
+        >>> g.topological_order(['CSC236H1'])
+        ['CSC108H1', 'CSC148H1', 'CSC165H1', 'CSC236H1']
+        """
+        if courses is None:
+            courses = self.courses
+        if skip is None:
+            skip = ()
+        order = []
+        done = set()
+        on_path = {}
+        for start in courses:
+            if start in done or start in skip:
+                continue
+            # iterative depth-first search, so that long prerequisite chains cannot overflow the stack
+            path = [start]
+            on_path[start] = 0
+            stack = [self._prereq_names(self.courses[start].prereq)]
+            while stack:
+                name = next(stack[-1], None)
+                if name is None:
+                    finished = path.pop()
+                    stack.pop()
+                    del on_path[finished]
+                    done.add(finished)
+                    order.append(finished)
+                elif name in on_path:
+                    raise PrerequisiteCycleError(path[on_path[name]:] + [name])
+                elif name not in done and name not in skip:
+                    on_path[name] = len(path)
+                    path.append(name)
+                    stack.append(self._prereq_names(self.courses[name].prereq))
+        return order
+
+    def _prereq_names(self, prereq: list | tuple) -> Iterable[str]:
+        """yield the name of every course mentioned in prereq, in order, at any depth of nesting."""
+        for item in prereq:
+            if isinstance(item, dict):
+                yield from item
+            else:
+                yield from self._prereq_names(item)
+
     def is_year_course(self, course: str) -> bool:
         """return whether a course is a year course or a half year course"""
         if course[6] == 'Y':
@@ -159,50 +594,95 @@ class CourseGraph:
             return False
 
     def course_with_keywords(self, keywords: str) -> list:
-        """return all courses in the graph with the input keywords."""
-        lst = []
-        for course in self.courses:
-            if keywords in self.courses[course].key_words:
-                lst.append(course)
-        return lst
+        """return all courses in the graph with the input keywords.
 
-    def find_all_prereq(self, course: str) -> list:
+        >>> g = CourseGraph()
+        >>> g.add_course('CSC373H1', 'algorithm design, analysis & complexity')
+        >>> g.add_course('CSC263H1', 'data structures and analysis')
+        >>> g.course_with_keywords('analysis')
+        ['CSC373H1', 'CSC263H1']
+        """
+        return self.keyword_index.substring(keywords)
+
+    def search_keywords(self, query: str, match_all: bool = True, prefix: bool = False) -> list:
+        """return the courses whose keywords contain the words of query, most relevant first. If match_all is
+        False, courses containing any of the words are returned, and if prefix is True, a word of query also
+        matches the words starting with it. See KeywordIndex.search.
+
+        >>> g = CourseGraph()
+        >>> g.add_course('CSC373H1', 'algorithm design, analysis & complexity')
+        >>> g.add_course('CSC263H1', 'data structures and analysis')
+        >>> g.search_keywords('analysis of data structure', match_all=False, prefix=True)
+        ['CSC263H1', 'CSC373H1']
+        """
+        return self.keyword_index.search(query, match_all, prefix)
+
+    def find_all_prereq(self, course: str, seen: Optional[set] = None) -> list:
         """return a list of the all prerequisite, (including the prerequisite of the prerequisite, etc.)
-        from a specific course."""
+        from a specific course. Each prerequisite appears once, at the position where it is first reached.
+
+        seen: the courses already found, which are skipped together with their prerequisites.
+
+        >>> g = CourseGraph()
+        >>> g.add_edge('CSC236H1', [({'CSC148H1': 50}, {'CSC165H1': 50})])
+        >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}])
+        >>> g.add_edge('CSC165H1', [{'CSC108H1': 50}])
+        >>> g.find_all_prereq('CSC236H1')
+        ['CSC148H1', 'CSC108H1', 'CSC165H1']
+        """
+        if seen is None:
+            seen = set()
         lst = []
         curr_course = self.courses[course]
         for pre in curr_course.prereq:
             if isinstance(pre, dict):
                 for key in pre:
-                    lst.append(key)
-                    lst.extend(self.find_all_prereq(key))
+                    if key not in seen:
+                        seen.add(key)
+                        lst.append(key)
+                        lst.extend(self.find_all_prereq(key, seen))
             else:
-                lst.extend(self.find_all_prereq_collection(pre))
+                lst.extend(self.find_all_prereq_collection(pre, seen))
         return lst
 
-    def find_all_prereq_collection(self, prerequisite: list | tuple) -> list:
+    def find_all_prereq_collection(self, prerequisite: list | tuple, seen: Optional[set] = None) -> list:
         """ helper method of self.find_all_prereq. input a collection ot courses as a list or tuple, return all
         possible prerequisite(including prerequisite of prerequisite courses, etc., of the courses in this
-        collection."""
+        collection, skipping the courses in seen."""
+        if seen is None:
+            seen = set()
         if len(prerequisite) < 1:
             return []
         else:
             lst1 = []
             for item in prerequisite:
                 if isinstance(item, dict):
-                    lst1.append([key for key in item][0])
-                    lst1.extend(self.find_all_prereq([key for key in item][0]))
+                    key = next(iter(item))
+                    if key not in seen:
+                        seen.add(key)
+                        lst1.append(key)
+                        lst1.extend(self.find_all_prereq(key, seen))
                 else:
-                    lst1.extend(self.find_all_prereq_collection(item))
+                    lst1.extend(self.find_all_prereq_collection(item, seen))
             return lst1
 
     def find_higher_courses(self, courses: list) -> list:
-        """input a list of courses the user took, and return the possible courses he/she can take in the future"""
+        """input a list of courses the user took, and return the possible courses he/she can take in the future.
+        Each course appears once, and the order only depends on the input. See proj_eligibility for the courses whose
+        prerequisites are actually satisfied.
+
+        >>> g = CourseGraph()
+        >>> g.add_edge('CSC207H1', [({'CSC148H1': 60}, {'CSC108H1': 50})])
+        >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}])
+        >>> g.find_higher_courses(['CSC108H1', 'CSC148H1'])
+        ['CSC148H1', 'CSC207H1']
+        """
         lst = []
+        seen = set()
         for course in courses:
-            curr = self.courses[course]
-            if curr.higher_courses:
-                for higher in curr.higher_courses:
+            for higher in sorted(self.courses[course].higher_courses):
+                if higher not in seen:
+                    seen.add(higher)
                     lst.append(higher)
         return lst
 
@@ -220,7 +700,7 @@ if __name__ == '__main__':
 
     python_ta.check_all(config={
         'max-line-length': 120,
-        'extra-imports': ['csv', 'proj_objects'],
+        'extra-imports': ['csv', 'threading', 'proj_objects', 'proj_keyword_index'],
         'allowed-io': ['read_csv_with_graph', 'read_csv', 'extract_columns'],
         'disable': ['E9969', 'R1702', 'R1701', 'R0912', 'R1721']
     })
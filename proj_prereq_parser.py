@@ -0,0 +1,389 @@
+"""Tokenizer and recursive-descent parser for the prerequisite strings of the course calendar, producing the
+list/tuple/dict structure stored in Course.prereq (see the docstring of Course and compute_prereq).
+
+The grammar, where '/' separates alternatives and binds weaker than ',', which separates required courses, except
+that a '/' with no space on either side (written '/'' below) binds stronger than ',':
+
+    expression  := requirement ('/' requirement)*
+    requirement := item (',' item)*
+    item        := [NN% or higher in] primary ('/'' primary)*
+    primary     := (CODE | '(' expression ')' | '[' expression ']') [(NN%)]
+
+A grade in front of an item applies to every course in it that has no grade of its own, and courses without any
+grade get DEFAULT_GRADE. The whole string is read in a single left-to-right pass.
+"""
+import re
+
+DEFAULT_GRADE = 50
+# the deepest nesting of brackets parsed, which keeps the recursion of PrereqParser bounded
+MAX_DEPTH = 100
+
+# every token may be preceded by white space, which is skipped
+find_token = re.compile(r"""\s*(?:
+    (?P<grade>(?P<grade_value>\d+)\s*%\s*or\s+higher\s+in\b)
+  | (?P<suffix>\(\s*(?P<suffix_value>\d+)\s*%\s*\))
+  | (?P<code>[A-Z]{3}\d{3}[A-Z]\d)
+  | (?P<open>[(\[])
+  | (?P<close>[)\]])
+  | (?P<or>/)
+  | (?P<and>,)
+  | (?P<word>[^\s()\[\]/,]+)
+)""", re.VERBOSE)
+
+
+class PrerequisiteParseError(ValueError):
+    """Raised when a prerequisite string does not follow the grammar of proj_prereq_parser.
+
+    text: the prerequisite string.
+    position: the index in text where the problem was found.
+    """
+    text: str
+    position: int
+
+    def __init__(self, message: str, text: str, position: int) -> None:
+        super().__init__(f'{message} at position {position}:\n{text}\n{" " * position}^')
+        self.text = text
+        self.position = position
+
+
+def tokenize(text: str) -> list[tuple[str, str, int]]:
+    """return the tokens of text as (kind, value, position), leaving out white space. The value of a grade token
+    is the grade alone, and a '/' with no space on either side has kind 'tight_or' instead of 'or'.
+
+    >>> tokenize('60% or higher in (CSC165H1/ CSC240H1)')
+    [('grade', '60', 0), ('open', '(', 17), ('code', 'CSC165H1', 18), ('or', '/', 26), ('code', 'CSC240H1', 28), \
+('close', ')', 36)]
+    >>> tokenize('MAT135H1/MAT136H1')
+    [('code', 'MAT135H1', 0), ('tight_or', '/', 8), ('code', 'MAT136H1', 9)]
+    """
+    return list(zip(*_scan(text)))
+
+
+def _scan(text: str) -> tuple[list[str], list[str], list[int]]:
+    """return the kinds, values and positions of the tokens of text, as described in tokenize."""
+    kinds = []
+    values = []
+    positions = []
+    for match in find_token.finditer(text):
+        kind = match.lastgroup
+        if kind is None:
+            # only trailing white space is left
+            break
+        start = match.start(kind)
+        if kind == 'code':
+            values.append(match.group(kind))
+        elif kind == 'grade' or kind == 'suffix':
+            values.append(match.group(kind + '_value'))
+        elif kind == 'or' and start == match.start() and 0 < start < len(text) - 1 and not text[start + 1].isspace():
+            kind = 'tight_or'
+            values.append('/')
+        else:
+            values.append(match.group(kind))
+        kinds.append(kind)
+        positions.append(start)
+    return kinds, values, positions
+
+
+class PrereqParser:
+    """
+    A recursive-descent parser over the tokens of one prerequisite string.
+
+    strict: if True, every deviation from the grammar raises PrerequisiteParseError. Otherwise the parser
+    recovers the way the calendar data needs: an unclosed bracket is closed at the end of the string, and
+    unmatched closing brackets, unknown words and empty alternatives are skipped, as are opening brackets nested
+    deeper than MAX_DEPTH.
+
+    >>> PrereqParser(')' * 5000 + 'CSC108H1').parse()
+    [{'CSC108H1': 50}]
+    >>> PrereqParser('(' * 5000 + 'CSC108H1' + ')' * 5000).parse()
+    [{'CSC108H1': 50}]
+    >>> try:
+    ...     PrereqParser('(' * 5000 + 'CSC108H1', strict=True).parse()
+    ... except PrerequisiteParseError as error:
+    ...     print(str(error).splitlines()[0])
+    brackets nested deeper than 100 at position 100:
+    """
+    text: str
+    strict: bool
+    # the kind, value and position of each token, followed by an 'end' token
+    _kinds: list[str]
+    _values: list[str]
+    _positions: list[int]
+    _pos: int
+
+    def __init__(self, text: str, strict: bool = False) -> None:
+        self.text = text
+        self.strict = strict
+        kinds, values, positions = _scan(text)
+        if 'word' in kinds:
+            words = [i for i, kind in enumerate(kinds) if kind == 'word']
+            self._reject(values[words[0]], positions[words[0]])
+            kinds, values, positions = ([lst[i] for i in range(len(kinds)) if kinds[i] != 'word']
+                                        for lst in (kinds, values, positions))
+        self._kinds = kinds + ['end']
+        self._values = values + ['']
+        self._positions = positions + [len(text)]
+        self._pos = 0
+
+    def parse(self) -> list:
+        """parse the whole string and return its prerequisite structure."""
+        alternatives = []
+        while self._kinds[self._pos] != 'end':
+            start = self._pos
+            if start:
+                # the previous expression stopped at a token that cannot continue it
+                self._reject(self._values[start], self._positions[start])
+            alternatives.extend(self._expression(DEFAULT_GRADE, 0))
+            if self._pos == start:
+                self._pos += 1
+        return alternatives
+
+    def _expression(self, grade: int, depth: int) -> list:
+        """parse alternatives separated by '/', and return them as a list of dicts and tuples."""
+        alternatives = []
+        kinds = self._kinds
+        while True:
+            items = self._requirement(grade, depth)
+            if len(items) != 1:
+                if items:
+                    alternatives.append(tuple(items))
+            elif isinstance(items[0], list):
+                alternatives.extend(items[0])
+            else:
+                alternatives.append(items[0])
+            if kinds[self._pos] != 'or':
+                return alternatives
+            self._pos += 1
+
+    def _requirement(self, grade: int, depth: int) -> list:
+        """parse items separated by ',', and return them as a list of dicts and lists (of alternatives)."""
+        items = []
+        kinds = self._kinds
+        while True:
+            alternatives = self._item(grade, depth)
+            if len(alternatives) != 1:
+                if alternatives:
+                    items.append(alternatives)
+            elif isinstance(alternatives[0], tuple):
+                items.extend(alternatives[0])
+            else:
+                items.append(alternatives[0])
+            if kinds[self._pos] != 'and':
+                return items
+            self._pos += 1
+
+    def _item(self, grade: int, depth: int) -> list:
+        """parse primaries joined by tight '/', with an optional grade in front of them, and return their
+        alternatives."""
+        kinds = self._kinds
+        if kinds[self._pos] == 'grade':
+            grade = int(self._values[self._pos])
+            self._pos += 1
+        alternatives = self._primary(grade, depth)
+        while kinds[self._pos] == 'tight_or':
+            self._pos += 1
+            alternatives.extend(self._primary(grade, depth))
+        return alternatives
+
+    def _primary(self, grade: int, depth: int) -> list:
+        """parse a single course or a bracketed expression, with an optional grade after it, and return its
+        alternatives."""
+        kinds = self._kinds
+        # skipped in a loop rather than by recursion, so that a long run of them cannot overflow the stack
+        while not self.strict and (kinds[self._pos] == 'close' and depth == 0
+                                   or kinds[self._pos] == 'open' and depth >= MAX_DEPTH):
+            self._pos += 1
+        kind = kinds[self._pos]
+        if kind == 'code':
+            code = self._values[self._pos]
+            self._pos += 1
+            if self._kinds[self._pos] == 'suffix':
+                grade = int(self._values[self._pos])
+                self._pos += 1
+            return [{code: grade}]
+        elif kind == 'open':
+            if depth >= MAX_DEPTH:
+                raise PrerequisiteParseError(f'brackets nested deeper than {MAX_DEPTH}', self.text,
+                                             self._positions[self._pos])
+            opening = self._pos
+            self._pos += 1
+            alternatives = self._expression(grade, depth + 1)
+            if self._kinds[self._pos] == 'close':
+                self._pos += 1
+            elif self.strict:
+                raise PrerequisiteParseError(f"unclosed '{self._values[opening]}'", self.text, self._positions[opening])
+            if not alternatives and self.strict:
+                raise PrerequisiteParseError('empty brackets', self.text, self._positions[opening])
+            if self._kinds[self._pos] == 'suffix':
+                alternatives = _with_grade(alternatives, int(self._values[self._pos]))
+                self._pos += 1
+            return alternatives
+        elif self.strict:
+            raise PrerequisiteParseError('expected a course code', self.text, self._positions[self._pos])
+        return []
+
+    def _reject(self, value: str, position: int) -> None:
+        """raise PrerequisiteParseError for an unexpected token in strict mode, and do nothing otherwise."""
+        if self.strict:
+            raise PrerequisiteParseError(f'unexpected {value!r}', self.text, position)
+
+
+def _with_grade(prereq: list | tuple, grade: int) -> list | tuple:
+    """return a copy of prereq with every course requiring grade."""
+    lst = []
+    for item in prereq:
+        if isinstance(item, dict):
+            lst.append({course: grade for course in item})
+        else:
+            lst.append(_with_grade(item, grade))
+    return type(prereq)(lst)
+
+
+def parse_prereq(prereq_str: str, strict: bool = False) -> list:
+    """return the prerequisite structure of prereq_str. See PrereqParser for what strict does.
+
+    >>> parse_prereq('MAT257Y1/ (85% or higher in MAT247H1)')
+    [{'MAT257Y1': 50}, {'MAT247H1': 85}]
+    >>> parse_prereq('CSC236H1, 70% or higher in (MAT137Y1/ (MAT135H1, MAT136H1))')
+    [({'CSC236H1': 50}, [{'MAT137Y1': 70}, ({'MAT135H1': 70}, {'MAT136H1': 70})])]
+    >>> parse_prereq('STA247H1(70%)/ STA257H1, MAT223H1')
+    [{'STA247H1': 70}, ({'STA257H1': 50}, {'MAT223H1': 50})]
+    >>> parse_prereq('STA220H1/STA221H1, MAT133Y1 (70%)/(MAT135H1, MAT136H1)/MAT137Y1')
+    [([{'STA220H1': 50}, {'STA221H1': 50}], [{'MAT133Y1': 70}, ({'MAT135H1': 50}, {'MAT136H1': 50}), \
+{'MAT137Y1': 50}])]
+    >>> parse_prereq('(CSC263H1/ CSC265H1', strict=True)
+    Traceback (most recent call last):
+    ...
+    proj_prereq_parser.PrerequisiteParseError: unclosed '(' at position 0:
+    (CSC263H1/ CSC265H1
+    ^
+    """
+    if not prereq_str or prereq_str.isspace():
+        return []
+    return PrereqParser(prereq_str, strict).parse()
+
+
+def _read_only(self, *args: object, **kwargs: object) -> None:
+    """the mutating methods of FrozenLeaf and FrozenAlternatives."""
+    raise TypeError(f'a cached {type(self).__name__} is read-only')
+
+
+class FrozenLeaf(dict):
+    """A {course: grade} dict of a prerequisite structure returned by ParseCache, which cannot be changed."""
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self) -> tuple:
+        return (FrozenLeaf, (dict(self),))
+
+
+class FrozenAlternatives(list):
+    """A list of alternatives of a prerequisite structure returned by ParseCache, which cannot be changed."""
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = append = clear = extend = insert = pop = remove = reverse = \
+        sort = _read_only
+
+    def __reduce__(self) -> tuple:
+        return (FrozenAlternatives, (list(self),))
+
+
+class ParseCache:
+    """
+    A cache of parsed prerequisite strings, keyed by the string with its white space normalized.
+
+    The structures returned by self.parse are shared between every caller asking for an equal string, and every
+    {course: grade} dict is shared between all structures requiring that grade in that course. They are made of
+    FrozenAlternatives, tuples and FrozenLeaf, which compare equal to the lists and dicts of parse_prereq but raise
+    TypeError when changed, so that changing the prerequisites of one course cannot change another one.
+    CourseGraph.add_edge copies the outer list into the course, where it can be changed.
+
+    hits: number of calls to self.parse answered from the cache.
+    misses: number of calls to self.parse that had to parse their string.
+
+    >>> cache = ParseCache()
+    >>> first = cache.parse('CSC148H1/ CSC111H1')
+    >>> cache.parse('  CSC148H1/  CSC111H1 ') is first
+    True
+    >>> cache.parse('CSC148H1, MAT137Y1')[0][0] is first[0]
+    True
+    >>> cache.hits, cache.misses, len(cache)
+    (1, 2, 2)
+    >>> first[0]['CSC148H1'] = 70
+    Traceback (most recent call last):
+    ...
+    TypeError: a cached FrozenLeaf is read-only
+    >>> first.append({'CSC110Y1': 50})
+    Traceback (most recent call last):
+    ...
+    TypeError: a cached FrozenAlternatives is read-only
+    """
+    hits: int
+    misses: int
+    _results: dict[str, FrozenAlternatives]
+    _leaves: dict[tuple[str, int], FrozenLeaf]
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self._results = {}
+        self._leaves = {}
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def parse(self, prereq_str: str) -> FrozenAlternatives:
+        """return parse_prereq(prereq_str), parsing prereq_str only if an equal string was not parsed before."""
+        key = ' '.join(prereq_str.split())
+        result = self._results.get(key)
+        if result is None:
+            self.misses += 1
+            result = self._results[key] = self._intern(parse_prereq(key))
+        else:
+            self.hits += 1
+        return result
+
+    def hit_rate(self) -> float:
+        """return the fraction of calls to self.parse answered from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self) -> None:
+        """empty the cache and reset its counters."""
+        self.hits = 0
+        self.misses = 0
+        self._results = {}
+        self._leaves = {}
+
+    def _intern(self, prereq: list | tuple) -> FrozenAlternatives | tuple:
+        """return a read-only copy of prereq, with every {course: grade} dict replaced by the shared FrozenLeaf for
+        that course and grade."""
+        lst = []
+        for item in prereq:
+            if isinstance(item, dict):
+                key = next(iter(item.items()))
+                if key not in self._leaves:
+                    self._leaves[key] = FrozenLeaf(item)
+                lst.append(self._leaves[key])
+            else:
+                lst.append(self._intern(item))
+        return FrozenAlternatives(lst) if isinstance(prereq, list) else tuple(lst)
+
+
+# the cache used when loading catalog files
+PARSE_CACHE = ParseCache()
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['re'],
+        'disable': ['E9969', 'R1702', 'R1701', 'R0912']
+    })
@@ -0,0 +1,203 @@
+"""A bounded cache of the results of the query methods of a CourseGraph, for programs answering the same popular
+queries over and over (the cost of MAT237Y1, all the prerequisites of CSC373H1, ...).
+
+Results are keyed by the method, its arguments and CourseGraph.version, which every change to the graph increases,
+so a result computed before a change is never returned after it. The least recently used results are evicted once
+the cache holds max_entries of them, and a result older than ttl seconds is computed again. The cache counts its
+hits, misses, evictions and expirations and estimates its memory use, to help choosing max_entries.
+
+A QueryCache can be shared by several threads querying a graph that does not change meanwhile, such as a frozen one:
+the cache holds its own lock, and the query methods of CourseGraph lock the cost tables they fill. Changing the graph
+while another thread queries it is not supported, with or without the cache."""
+import sys
+import threading
+import time
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+from proj_objects import CourseGraph
+
+# the default number of results kept by a QueryCache
+MAX_ENTRIES = 4096
+
+
+def deep_sizeof(value: object) -> int:
+    """return an estimate of the memory used by value, in bytes: its own size plus the sizes of the items of the
+    lists, tuples, sets, frozensets and dictionaries it contains.
+
+    >>> deep_sizeof(['CSC108H1']) == sys.getsizeof(['CSC108H1']) + sys.getsizeof('CSC108H1')
+    True
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_sizeof(key) + deep_sizeof(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item) for item in value)
+    return size
+
+
+def _copy(value: Any) -> Any:
+    """return a copy of value in which the lists are new, so that a caller changing a result does not change the
+    cached one."""
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(_copy(item) for item in value)
+    return value
+
+
+class QueryCache:
+    """
+    The results of the query methods of one CourseGraph, the least recently used evicted first.
+
+    hits, misses: the number of queries answered from the cache, and computed by the graph.
+    evictions: the number of results removed to make room for a new one.
+    expirations: the number of results found older than ttl, and computed again.
+    invalidations: the number of results dropped because the graph changed after they were computed.
+
+    >>> g = CourseGraph()
+    >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}])
+    >>> g.add_edge('CSC207H1', [{'CSC148H1': 60}])
+    >>> cache = QueryCache(g, max_entries=2)
+    >>> cache.find_all_prereq('CSC207H1'), cache.find_all_prereq('CSC207H1'), cache.compute_cost('CSC207H1')
+    (['CSC148H1', 'CSC108H1'], ['CSC148H1', 'CSC108H1'], (1.5, ['CSC148H1', 'CSC108H1']))
+    >>> cache.find_all_prereq('CSC148H1')
+    ['CSC108H1']
+    >>> g.add_edge('CSC108H1', [{'CSC104H1': 50}])
+    >>> cache.find_all_prereq('CSC148H1')
+    ['CSC108H1', 'CSC104H1']
+    >>> cache.stats()['hits'], cache.stats()['misses'], cache.stats()['evictions'], cache.stats()['invalidations']
+    (1, 4, 1, 2)
+    >>> now = [0.0]
+    >>> timed = QueryCache(g, ttl=60, clock=lambda: now[0])
+    >>> _ = timed.compute_cost('CSC207H1')
+    >>> now[0] = 61.0
+    >>> _ = timed.compute_cost('CSC207H1')
+    >>> timed.hits, timed.expirations
+    (0, 1)
+    """
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    invalidations: int
+    _graph: CourseGraph
+    _max_entries: int
+    _ttl: Optional[float]
+    _clock: Callable[[], float]
+    # (method, arguments, graph version) of a query mapped to (result, time it expires, estimated size), the most
+    # recently used last
+    _entries: dict[tuple, tuple[Any, float, int]]
+    _size: int
+    # the graph version of the entries: they are all dropped when the graph changes
+    _version: int
+    _lock: threading.Lock
+
+    def __init__(self, graph: CourseGraph, max_entries: int = MAX_ENTRIES, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """ttl is the number of seconds a result stays valid (forever if it is None), measured by clock."""
+        self._graph = graph
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._clock = clock
+        self._entries = {}
+        self._size = 0
+        self._version = graph.version
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def query(self, method: str, *args: Hashable) -> Any:
+        """return graph.method(*args), from the cache if it was computed since the last change of the graph, less
+        than ttl seconds ago. The arguments must be hashable, and equal arguments must give equal results."""
+        with self._lock:
+            if self._graph.version != self._version:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+                self._size = 0
+                self._version = self._graph.version
+            key = (method, args, self._version)
+            entry = self._entries.pop(key, None)
+            if entry is not None and self._ttl is not None and entry[1] <= self._clock():
+                self.expirations += 1
+                self._size -= entry[2]
+                entry = None
+            if entry is not None:
+                self.hits += 1
+                self._entries[key] = entry
+                return _copy(entry[0])
+            self.misses += 1
+        # computed outside of the lock, so that a slow query does not hold up the others; the graph locks the
+        # tables it fills itself (see CourseGraph._tables_lock)
+        result = getattr(self._graph, method)(*args)
+        with self._lock:
+            if key[2] == self._graph.version and key not in self._entries:
+                while self._entries and len(self._entries) >= self._max_entries:
+                    oldest = next(iter(self._entries))
+                    self._size -= self._entries.pop(oldest)[2]
+                    self.evictions += 1
+                expires = self._clock() + self._ttl if self._ttl is not None else float('inf')
+                size = deep_sizeof(key) + deep_sizeof(result)
+                self._entries[key] = (_copy(result), expires, size)
+                self._size += size
+        return result
+
+    def compute_cost(self, course: str) -> tuple[float, list[str]]:
+        """return graph.compute_cost(course)."""
+        return self.query('compute_cost', course)
+
+    def compute_remaining_cost(self, course: str, completed: Iterable[str]) -> tuple[float, list[str]]:
+        """return graph.compute_remaining_cost(course, completed)."""
+        return self.query('compute_remaining_cost', course, frozenset(completed))
+
+    def find_all_prereq(self, course: str) -> list:
+        """return graph.find_all_prereq(course)."""
+        return self.query('find_all_prereq', course)
+
+    def find_higher_courses(self, courses: Iterable[str]) -> list:
+        """return graph.find_higher_courses(courses)."""
+        return self.query('find_higher_courses', tuple(courses))
+
+    def search_keywords(self, query: str, match_all: bool = True, prefix: bool = False) -> list:
+        """return graph.search_keywords(query, match_all, prefix)."""
+        return self.query('search_keywords', query, match_all, prefix)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def hit_rate(self) -> float:
+        """return the fraction of the queries answered from the cache, 0.0 before the first query."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def memory_size(self) -> int:
+        """return an estimate of the memory used by the cached keys and results, in bytes, see deep_sizeof."""
+        return self._size
+
+    def clear(self) -> None:
+        """remove every result, keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict[str, float]:
+        """return the counters, the number of entries, the hit rate and the memory size of the cache."""
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses, 'hit rate': self.hit_rate(),
+                'evictions': self.evictions, 'expirations': self.expirations, 'invalidations': self.invalidations,
+                'memory (bytes)': self._size}
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['sys', 'threading', 'time', 'proj_objects'],
+        'disable': ['E9969', 'R1702', 'R1701', 'R0912', 'R0902']
+    })
@@ -0,0 +1,148 @@
+"""Turn a set of courses, like the plan returned by CourseGraph.compute_cost, into a term by term schedule that takes
+every course after its prerequisites, stays under a credit limit per term, and only puts a course in a term in which
+it is offered."""
+import heapq
+from typing import Iterable, Optional
+
+from proj_objects import CourseGraph
+
+# the default credit limit of a term: five half year courses
+MAX_CREDITS = 2.5
+TERM_NAMES = ('Fall', 'Winter')
+
+
+def course_credits(graph: CourseGraph, course: str) -> float:
+    """return the credits of course: 1.0 for a year course and 0.5 for a half year course."""
+    return 1.0 if graph.is_year_course(course) else 0.5
+
+
+def schedule_courses(graph: CourseGraph, courses: Iterable[str], max_credits: float = MAX_CREDITS,
+                     offerings: Optional[dict[str, Iterable[str]]] = None,
+                     term_names: tuple[str, ...] = TERM_NAMES) -> list[list[str]]:
+    """return courses split into consecutive terms, as a list of the courses of each term.
+
+    A course is only scheduled after every course of courses mentioned in its prerequisites; prerequisites that are
+    not in courses are assumed to be done already. The credits of each term are at most max_credits, except for a
+    term holding a single course heavier than that. Term i is called term_names[i % len(term_names)], and a course
+    listed in offerings is only scheduled in the terms named in offerings[course]; other courses are offered every
+    term.
+
+    The courses are placed by list scheduling on the critical path: each term, the available courses are taken in
+    order of the longest chain of courses that depend on them, so that long prerequisite chains start as early as
+    possible. Raise ValueError if a course is never offered.
+
+    >>> g = CourseGraph()
+    >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}])
+    >>> g.add_edge('CSC207H1', [{'CSC148H1': 60}])
+    >>> g.add_edge('CSC236H1', [({'CSC148H1': 60}, {'CSC165H1': 60})])
+    >>> g.add_course('MAT137Y1')
+    >>> schedule_courses(g, ['CSC236H1', 'CSC207H1', 'CSC165H1', 'CSC148H1', 'CSC108H1', 'MAT137Y1'], 1.5)
+    [['CSC108H1', 'CSC165H1'], ['CSC148H1', 'MAT137Y1'], ['CSC236H1', 'CSC207H1']]
+    >>> schedule_courses(g, ['CSC148H1', 'CSC108H1', 'CSC207H1'], offerings={'CSC148H1': ['Winter']})
+    [['CSC108H1'], ['CSC148H1'], ['CSC207H1']]
+    >>> schedule_courses(g, ['CSC148H1', 'CSC108H1'], offerings={'CSC108H1': ['Fall']}, term_names=('Winter',))
+    Traceback (most recent call last):
+    ...
+    ValueError: CSC108H1 is not offered in any term
+    """
+    order = list(dict.fromkeys(courses))
+    index = {course: i for i, course in enumerate(order)}
+    offered = {}
+    for course, terms in (offerings or {}).items():
+        if course in index:
+            terms = set(terms)
+            offered[course] = {i for i, name in enumerate(term_names) if name in terms}
+            if not offered[course]:
+                raise ValueError(f'{course} is not offered in any term')
+
+    # prerequisites and dependants of each course within courses
+    dependants = {course: [] for course in order}
+    waiting = {}
+    for course in order:
+        prereqs = {name for name in graph._prereq_names(graph.courses[course].prereq) if name in index}
+        waiting[course] = len(prereqs)
+        for name in prereqs:
+            dependants[name].append(course)
+
+    # order the courses after their prerequisites, then find the number of courses on the longest chain of
+    # dependants starting at each course, the critical path
+    sorted_courses = [course for course in order if waiting[course] == 0]
+    count = dict(waiting)
+    for course in sorted_courses:
+        for dependant in dependants[course]:
+            count[dependant] -= 1
+            if count[dependant] == 0:
+                sorted_courses.append(dependant)
+    if len(sorted_courses) < len(order):
+        # raises PrerequisiteCycleError for the cycle blocking the remaining courses
+        graph.topological_order([course for course in order if count[course] > 0])
+    chain = {}
+    for course in reversed(sorted_courses):
+        chain[course] = 1 + max((chain[d] for d in dependants[course]), default=0)
+
+    def priority(course: str) -> tuple:
+        """the key of course in the heap of available courses: longest chain, then heaviest, then input order."""
+        return (-chain[course], -course_credits(graph, course), index[course])
+
+    available = [priority(course) for course in order if waiting[course] == 0]
+    heapq.heapify(available)
+    terms = []
+    scheduled = 0
+    while scheduled < len(order):
+        term, credits, deferred = [], 0.0, []
+        while available:
+            key = heapq.heappop(available)
+            course = order[key[2]]
+            weight = course_credits(graph, course)
+            if (course in offered and len(terms) % len(term_names) not in offered[course]) \
+                    or (term and credits + weight > max_credits):
+                deferred.append(key)
+            else:
+                term.append(course)
+                credits += weight
+        for course in term:
+            for dependant in dependants[course]:
+                waiting[dependant] -= 1
+                if waiting[dependant] == 0:
+                    deferred.append(priority(dependant))
+        for key in deferred:
+            heapq.heappush(available, key)
+        terms.append(term)
+        scheduled += len(term)
+    while terms and not terms[-1]:
+        terms.pop()
+    return terms
+
+
+def schedule_course(graph: CourseGraph, course: str, max_credits: float = MAX_CREDITS,
+                    offerings: Optional[dict[str, Iterable[str]]] = None,
+                    term_names: tuple[str, ...] = TERM_NAMES) -> list[list[str]]:
+    """return the schedule, as in schedule_courses, of course and of the cheapest prerequisites found by
+    CourseGraph.compute_cost.
+
+    >>> g = CourseGraph()
+    >>> g.add_edge('CSC207H1', [{'CSC148H1': 60}])
+    >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}, {'CSC111H1': 60}])
+    >>> schedule_course(g, 'CSC207H1')
+    [['CSC108H1'], ['CSC148H1'], ['CSC207H1']]
+    """
+    plan = graph.compute_cost(course)[1]
+    return schedule_courses(graph, plan + [course], max_credits, offerings, term_names)
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['heapq', 'proj_objects'],
+        'disable': ['E9969', 'R1702', 'R1701', 'R0912', 'W0212', 'R0914']
+    })
@@ -0,0 +1,466 @@
+"""A headless JSON API over the catalog, for programs that cannot use the Tkinter windows: keyword search, cost and
+plan, all the prerequisites of a course and eligibility, each a GET request answered with a JSON object.
+
+The server is a single asyncio event loop serving the CatalogView of a GraphProvider, loaded once at startup and
+reloaded when the catalog file changes. Queries that walk the graph run in a pool of worker threads so that a slow
+query does not hold up the other connections, and the encoded responses of the most recent distinct queries are
+cached until the catalog is reloaded.
+
+    python proj_server.py [port]    serve the default catalog on port (DEFAULT_PORT by default)
+    python proj_server.py loadtest  start a local server and print its latency and throughput
+"""
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+from urllib.parse import parse_qsl, quote, urlsplit
+
+from proj_eligibility import eligible_courses
+from proj_graph_provider import PROVIDER, CatalogView, GraphProvider
+from proj_objects import PrerequisiteCycleError
+
+DEFAULT_PORT = 8080
+# the number of encoded responses kept by a CourseServer
+RESPONSE_CACHE_SIZE = 1024
+# reasons of the status codes the server answers with
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class QueryError(Exception):
+    """Raised by a query of CourseService that cannot be answered.
+
+    status: the HTTP status code of the response.
+    """
+    status: int
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class CourseService:
+    """
+    The queries of the API on one CatalogView, as plain functions from the query parameters of a request to the
+    JSON object of its response. They only read the view, so several threads can run them at the same time.
+
+    routes: for each path, the query answering it, whether it is slow enough to run in a worker thread, and whether
+        its response may be cached for the whole generation of the view.
+
+    >>> from proj_objects import CourseGraph
+    >>> g = CourseGraph()
+    >>> g.add_course('CSC148H1', 'introduction to computer science')
+    >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}, {'CSC111H1': 60}])
+    >>> g.add_edge('CSC207H1', [{'CSC148H1': 60}])
+    >>> service = CourseService(CatalogView(g, (0, 0), 1))
+    >>> service.cost({'course': 'csc207h1'})
+    {'course': 'CSC207H1', 'cost': 1.5, 'plan': ['CSC148H1', 'CSC108H1']}
+    >>> service.cost({'course': 'CSC207H1', 'completed': 'CSC111H1'})
+    {'course': 'CSC207H1', 'cost': 1.0, 'plan': ['CSC148H1']}
+    >>> service.eligible({'taken': 'CSC108H1:55'})
+    {'taken': {'CSC108H1': 55.0}, 'eligible': []}
+    >>> service.eligible({'taken': 'CSC108H1:nan'})
+    Traceback (most recent call last):
+    ...
+    proj_server.QueryError: invalid grade 'nan'
+    >>> service.prereqs({'course': 'CSC999H1'})
+    Traceback (most recent call last):
+    ...
+    proj_server.QueryError: unknown course CSC999H1
+    """
+    view: CatalogView
+    routes: dict[str, tuple[Callable[[dict[str, str]], dict], bool, bool]]
+
+    def __init__(self, view: CatalogView) -> None:
+        self.view = view
+        # /health reports counters that change with every query, so it is never cached
+        self.routes = {'/health': (self.health, False, False), '/search': (self.search, False, True),
+                       '/cost': (self.cost, True, True), '/prereqs': (self.prereqs, True, True),
+                       '/eligible': (self.eligible, True, True)}
+
+    def _course(self, params: dict[str, str]) -> str:
+        """return the course parameter, in upper case, raising QueryError if it is missing or unknown."""
+        if 'course' not in params:
+            raise QueryError(400, 'missing parameter: course')
+        course = params['course'].strip().upper()
+        if course not in self.view.graph.courses:
+            raise QueryError(404, f'unknown course {course}')
+        return course
+
+    def health(self, params: dict[str, str]) -> dict:
+        """/health: the number of courses and the generation of the catalog being served, and the statistics of
+        its QueryCache."""
+        return {'courses': len(self.view.graph.courses), 'generation': self.view.generation,
+                'valid': self.view.report.is_valid(), 'query cache': self.view.queries.stats()}
+
+    def search(self, params: dict[str, str]) -> dict:
+        """/search?q=words[&any=1][&prefix=1]: the courses whose keywords contain all (or any) of the words, most
+        relevant first, see CourseGraph.search_keywords."""
+        query = params.get('q', '')
+        if not query.strip():
+            raise QueryError(400, 'missing parameter: q')
+        courses = self.view.queries.search_keywords(query, match_all=params.get('any') != '1',
+                                                    prefix=params.get('prefix') == '1')
+        return {'query': query, 'courses': courses}
+
+    def cost(self, params: dict[str, str]) -> dict:
+        """/cost?course=code[&completed=code,code]: the opportunity cost and plan of a course, see
+        CourseGraph.compute_cost, or CourseGraph.compute_remaining_cost for the courses already completed."""
+        course = self._course(params)
+        completed = {name.strip().upper() for name in params.get('completed', '').split(',') if name.strip()}
+        try:
+            if completed:
+                cost, plan = self.view.queries.compute_remaining_cost(course, completed)
+            else:
+                cost, plan = self.view.queries.compute_cost(course)
+        except PrerequisiteCycleError as error:
+            raise QueryError(400, str(error)) from error
+        return {'course': course, 'cost': cost, 'plan': plan}
+
+    def prereqs(self, params: dict[str, str]) -> dict:
+        """/prereqs?course=code: every direct and indirect prerequisite of a course, see
+        CourseGraph.find_all_prereq."""
+        course = self._course(params)
+        return {'course': course, 'prereqs': self.view.queries.find_all_prereq(course)}
+
+    def eligible(self, params: dict[str, str]) -> dict:
+        """/eligible?taken=code[:grade],...: the courses a student can take next, see
+        proj_eligibility.eligible_courses. A course without a grade counts as passed with any grade required."""
+        transcript = {}
+        for item in params.get('taken', '').split(','):
+            name, _, grade = item.partition(':')
+            if name.strip():
+                try:
+                    transcript[name.strip().upper()] = float(grade) if grade.strip() else 100.0
+                except ValueError as error:
+                    raise QueryError(400, f'invalid grade {grade!r}') from error
+                if not math.isfinite(transcript[name.strip().upper()]):
+                    raise QueryError(400, f'invalid grade {grade!r}')
+        if not transcript:
+            raise QueryError(400, 'missing parameter: taken')
+        return {'taken': transcript, 'eligible': eligible_courses(self.view.graph, transcript)}
+
+
+class CourseServer:
+    """
+    An HTTP/1.1 server answering the queries of CourseService for the current view of a GraphProvider, with
+    keep-alive connections.
+
+    port: the port the server listens on, once self.start returned.
+    hits, misses: the number of responses found and not found in the cache, which /health does not go through.
+
+    >>> import os, tempfile, shutil
+    >>> directory = tempfile.mkdtemp()
+    >>> path = os.path.join(directory, 'catalog.csv')
+    >>> with open(path, 'w') as file:
+    ...     _ = file.write(' CSC148H1 - Introduction to Computer Science,60% or higher in CSC108H1\\n')
+    >>> async def example() -> list:
+    ...     server = CourseServer(GraphProvider(path), workers=2)
+    ...     await server.start('127.0.0.1', 0)
+    ...     answers = [await fetch('127.0.0.1', server.port, target)
+    ...                for target in ['/cost?course=CSC148H1', '/cost?course=CSC148H1', '/search?q=computer', '/x']]
+    ...     reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+    ...     writer.write(b'GET /health HTTP/1.1\\r\\nContent-Length: -1\\r\\n\\r\\n')
+    ...     invalid = (await reader.read()).split(b'\\r\\n')[0]
+    ...     writer.close()
+    ...     await server.close()
+    ...     return answers + [invalid, (server.hits, server.misses)]
+    >>> for answer in asyncio.run(example()):
+    ...     print(answer)
+    (200, {'course': 'CSC148H1', 'cost': 1.0, 'plan': ['CSC108H1']})
+    (200, {'course': 'CSC148H1', 'cost': 1.0, 'plan': ['CSC108H1']})
+    (200, {'query': 'computer', 'courses': ['CSC148H1']})
+    (404, {'error': 'no such path: /x'})
+    b'HTTP/1.1 400 Bad Request'
+    (1, 2)
+    >>> async def health() -> list:
+    ...     server = CourseServer(GraphProvider(path), workers=2)
+    ...     await server.start('127.0.0.1', 0)
+    ...     answers = [await fetch('127.0.0.1', server.port, target)
+    ...                for target in ['/health', '/cost?course=CSC148H1', '/health']]
+    ...     await server.close()
+    ...     return [answers[0][1]['query cache']['misses'], answers[2][1]['query cache']['misses']]
+    >>> asyncio.run(health())
+    [0, 1]
+    >>> shutil.rmtree(directory)
+    """
+    port: Optional[int]
+    hits: int
+    misses: int
+    _provider: GraphProvider
+    _service: Optional[CourseService]
+    _executor: ThreadPoolExecutor
+    _server: Optional[asyncio.AbstractServer]
+    # the task serving each open connection, with the writer of the connection
+    _connections: dict[asyncio.Task, asyncio.StreamWriter]
+    # (generation, path, sorted parameters) of a query mapped to its (status, body), the most recently used last
+    _cache: dict[tuple, tuple[int, bytes]]
+    _cache_size: int
+
+    def __init__(self, provider: GraphProvider = PROVIDER, workers: Optional[int] = None,
+                 cache_size: int = RESPONSE_CACHE_SIZE) -> None:
+        self.port = None
+        self.hits = 0
+        self.misses = 0
+        self._provider = provider
+        self._service = None
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='query')
+        self._server = None
+        self._connections = {}
+        self._cache = {}
+        self._cache_size = cache_size
+
+    async def start(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT) -> None:
+        """load the catalog, if the provider did not already, and start listening on host and port (any free port
+        if port is 0)."""
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._provider.get)
+        self._server = await asyncio.start_server(self._serve_connection, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        """answer requests until cancelled."""
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """stop listening, close the open connections and the worker threads."""
+        self._server.close()
+        # a closed connection ends its task at its next read
+        for writer in self._connections.values():
+            writer.close()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        await self._server.wait_closed()
+        self._executor.shutdown(wait=False)
+
+    def _current_service(self) -> CourseService:
+        """return the service of the current view of the provider, creating it after a reload."""
+        view = self._provider.get()
+        if self._service is None or self._service.view is not view:
+            self._service = CourseService(view)
+        return self._service
+
+    async def respond(self, method: str, target: str) -> tuple[int, bytes]:
+        """return the status and the JSON body of the response to a request for target."""
+        if method != 'GET':
+            return _error(405, f'method not allowed: {method}')
+        parts = urlsplit(target)
+        service = self._current_service()
+        if parts.path not in service.routes:
+            return _error(404, f'no such path: {parts.path}')
+        params = dict(parse_qsl(parts.query))
+        query, offload, cacheable = service.routes[parts.path]
+        key = (service.view.generation, parts.path, tuple(sorted(params.items())))
+        if cacheable:
+            cached = self._cache.pop(key, None)
+            if cached is not None:
+                self.hits += 1
+                self._cache[key] = cached
+                return cached
+            self.misses += 1
+        try:
+            if offload:
+                result = await asyncio.get_running_loop().run_in_executor(self._executor, query, params)
+            else:
+                result = query(params)
+        except QueryError as error:
+            return _error(error.status, str(error))
+        response = (200, json.dumps(result, allow_nan=False).encode())
+        if not cacheable:
+            return response
+        if len(self._cache) >= self._cache_size:
+            del self._cache[next(iter(self._cache))]
+        self._cache[key] = response
+        return response
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """answer the requests of one connection until the client closes it or asks to."""
+        self._connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                request = lines[0].split()
+                try:
+                    length = int(headers.get('content-length', 0))
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    length = None
+                if length:
+                    try:
+                        await reader.readexactly(length)
+                    except asyncio.IncompleteReadError:
+                        break
+                if length is None:
+                    # the end of the request is unknown, so the connection is closed after the answer
+                    request = []
+                    status, body = _error(400, f'invalid Content-Length: {headers["content-length"]}')
+                elif len(request) != 3:
+                    status, body = _error(400, 'malformed request line')
+                else:
+                    try:
+                        status, body = await self.respond(request[0], request[1])
+                    except Exception as error:  # answer, rather than drop the connection without a response
+                        status, body = _error(500, f'{type(error).__name__}: {error}')
+                keep_alive = len(request) == 3 and request[2] == 'HTTP/1.1' \
+                    and headers.get('connection', '').lower() != 'close'
+                writer.write(f'HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n'
+                             f'Content-Length: {len(body)}\r\nConnection: {"keep-alive" if keep_alive else "close"}'
+                             f'\r\n\r\n'.encode() + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            del self._connections[asyncio.current_task()]
+            writer.close()
+
+
+def _error(status: int, message: str) -> tuple[int, bytes]:
+    """return the response of an error."""
+    return (status, json.dumps({'error': message}).encode())
+
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, target: str) -> tuple[int, bytes]:
+    """send a GET request for target on an open connection and return the status and the body of the response."""
+    writer.write(f'GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+    await writer.drain()
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+    length = next(int(line.partition(':')[2]) for line in head if line.lower().startswith('content-length:'))
+    return (int(head[0].split()[1]), await reader.readexactly(length))
+
+
+async def fetch(host: str, port: int, target: str) -> tuple[int, dict]:
+    """return the status and the decoded JSON body of the response to a GET request for target."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        status, body = await _request(reader, writer, target)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return (status, json.loads(body))
+
+
+def sample_targets(view: CatalogView, count: int, seed: int = 0) -> list[str]:
+    """return count request targets for the load test: a random mix of the queries of the API on the courses and
+    keywords of view."""
+    rng = random.Random(seed)
+    courses = sorted(view.graph.courses)
+    words = sorted({word for course in view.graph.courses.values() for word in str(course.key_words).split()
+                    if word.isalpha() and len(word) > 3}) or ['course']
+    makers = [lambda: f'/search?q={quote(rng.choice(words))}',
+              lambda: f'/cost?course={rng.choice(courses)}',
+              lambda: f'/cost?course={rng.choice(courses)}&completed={",".join(rng.sample(courses, 5))}',
+              lambda: f'/prereqs?course={rng.choice(courses)}',
+              lambda: f'/eligible?taken={",".join(rng.sample(courses, 8))}']
+    return [rng.choice(makers)() for _ in range(count)]
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """return the value below which fraction of the sorted list values falls (nearest rank).
+
+    >>> percentile([1.0, 2.0, 3.0, 4.0], 0.5), percentile([1.0, 2.0, 3.0, 4.0], 0.99)
+    (2.0, 4.0)
+    """
+    return values[max(0, min(len(values), math.ceil(fraction * len(values))) - 1)]
+
+
+async def load_test(host: str, port: int, targets: list[str], concurrency: int = 16) -> dict[str, float]:
+    """send every request of targets to the server at host and port, over concurrency keep-alive connections each
+    sending its next request once the previous one is answered. Return the number of requests and of errors (status
+    500 or failed connections), the requests per second and the 50th and 99th percentiles of the latency."""
+    queue = list(reversed(targets))
+    latencies = []
+    errors = 0
+
+    async def client() -> None:
+        """send requests from the queue until it is empty."""
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while queue:
+                target = queue.pop()
+                start = time.perf_counter()
+                try:
+                    status, _ = await _request(reader, writer, target)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    errors += 1
+                    return
+                latencies.append(time.perf_counter() - start)
+                errors += status >= 500
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {'requests': len(latencies), 'errors': errors, 'requests/s': len(latencies) / elapsed,
+            'p50 (ms)': percentile(latencies, 0.5) * 1000, 'p99 (ms)': percentile(latencies, 0.99) * 1000}
+
+
+def run_load_test(provider: GraphProvider = PROVIDER, requests: int = 5000, concurrency: int = 16,
+                  distinct: int = 1000, workers: Optional[int] = None) -> dict[str, float]:
+    """start a CourseServer for provider on a free local port and return the result of load_test for requests
+    requests, drawn from distinct different targets so that the response cache is exercised too."""
+
+    async def run() -> dict[str, float]:
+        """serve and load the server in the same event loop."""
+        server = CourseServer(provider, workers)
+        await server.start('127.0.0.1', 0)
+        targets = sample_targets(provider.get(), distinct)
+        rng = random.Random(1)
+        result = await load_test('127.0.0.1', server.port, [rng.choice(targets) for _ in range(requests)],
+                                 concurrency)
+        result['cache hit rate'] = server.hits / max(1, server.hits + server.misses)
+        await server.close()
+        return result
+
+    return asyncio.run(run())
+
+
+async def serve(port: int = DEFAULT_PORT, host: str = '127.0.0.1') -> None:
+    """serve the default catalog until interrupted, reloading it when its file changes."""
+    server = CourseServer(PROVIDER)
+    await server.start(host, port)
+    PROVIDER.watch()
+    print(f'serving {PROVIDER.path} on http://{host}:{server.port}')
+    await server.serve_forever()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'loadtest':
+        for name, value in run_load_test().items():
+            print(f'{name:>15}: {value:.6g}')
+        sys.exit()
+    if len(sys.argv) > 1:
+        asyncio.run(serve(int(sys.argv[1])))
+        sys.exit()
+
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['asyncio', 'json', 'math', 'random', 'sys', 'time', 'concurrent.futures',
+                          'urllib.parse', 'proj_eligibility', 'proj_graph_provider', 'proj_objects'],
+        'allowed-io': ['serve'],
+        'disable': ['E9969', 'R1702', 'R1701', 'R0912', 'W0718', 'R0914', 'R0902', 'W0613']
+    })
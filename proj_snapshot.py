@@ -0,0 +1,312 @@
+"""Binary snapshots of a fully built CourseGraph, so that the interactive programs can start by reading one file
+instead of parsing the csv catalog again.
+
+A snapshot is a single little-endian file made of the following sections, located through the header:
+
+    header          magic, format version, flags, size/mtime/sha1 of the source csv file, section offsets
+    string table    (number of strings + 1) uint32 offsets into a utf-8 blob holding every course code (string i
+                    is the code of course i) followed by every distinct keywords string
+    course records  one RECORD per course, in the order of CourseGraph.courses
+    prerequisites   uint32 words encoding every Course.prereq as a tree: [LIST, n, children...] for a list,
+                    [TUPLE, n, children...] for a tuple and [LEAF, course id, grade] for a {course: grade} dict
+    higher courses  uint32 course ids, the higher_courses of each course
+    plans           uint32 course ids, the precomputed plan of each course (see CourseGraph.compute_all_costs)
+    sorted ids      uint32 course ids sorted by course code, for binary search without decoding all the codes
+
+Every record and section can be read independently, which lets proj_mmap_store use a snapshot in place.
+"""
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Optional
+
+from proj_generate_graph import read_csv
+from proj_objects import Course, CourseGraph, PrerequisiteCycleError
+
+MAGIC = b'CGSNAP\x00\x00'
+FORMAT_VERSION = 1
+SNAPSHOT_SUFFIX = '.cgsnap'
+
+# header flags
+HAS_COSTS = 1
+# course record flags
+COST_IS_INT = 1
+
+# node kinds of the prerequisite encoding
+LIST, TUPLE, LEAF = 1, 2, 3
+
+HEADER = struct.Struct('<8sIIQq20sII11I')
+# keywords string id, prereq start, prereq length, higher start, higher count, plan start, plan count, cost, flags
+RECORD = struct.Struct('<7IdI')
+
+
+class SnapshotError(ValueError):
+    """Raised when a file is not a snapshot this version of the program can read."""
+
+
+class SnapshotHeader:
+    """
+    The decoded header of a snapshot.
+
+    source: (size, mtime in nanoseconds, sha1 digest) of the csv file the graph was built from.
+    sections: the offset (in bytes) or length (in items) of each section, by name.
+    """
+    flags: int
+    source: tuple[int, int, bytes]
+    n_courses: int
+    n_strings: int
+    sections: dict[str, int]
+
+    SECTION_NAMES = ('string_offsets', 'string_blob', 'string_blob_len', 'records', 'prereq', 'prereq_len',
+                     'higher', 'higher_len', 'plans', 'plans_len', 'sorted_ids')
+
+    def __init__(self, buffer: bytes | memoryview) -> None:
+        if len(buffer) < HEADER.size:
+            raise SnapshotError('file too short to be a snapshot')
+        fields = HEADER.unpack_from(buffer, 0)
+        if fields[0] != MAGIC:
+            raise SnapshotError('not a course graph snapshot')
+        if fields[1] != FORMAT_VERSION:
+            raise SnapshotError(f'snapshot format version {fields[1]} is not supported')
+        self.flags = fields[2]
+        self.source = (fields[3], fields[4], fields[5])
+        self.n_courses = fields[6]
+        self.n_strings = fields[7]
+        self.sections = dict(zip(self.SECTION_NAMES, fields[8:]))
+
+    def uint32s(self, buffer: bytes | memoryview, name: str, start: int = 0, count: Optional[int] = None) \
+            -> memoryview:
+        """return count uint32 values of section name of buffer starting at index start (all of them from start
+        if count is None)."""
+        if count is None:
+            count = self.sections[name + '_len'] - start
+        offset = self.sections[name] + 4 * start
+        return memoryview(buffer)[offset:offset + 4 * count].cast('I')
+
+
+def source_fingerprint(path: str) -> tuple[int, int, bytes]:
+    """return the size, the modification time in nanoseconds, and the sha1 digest of the file at path."""
+    stat = os.stat(path)
+    with open(path, 'rb') as file:
+        digest = hashlib.sha1(file.read()).digest()
+    return (stat.st_size, stat.st_mtime_ns, digest)
+
+
+def encode_graph(graph: CourseGraph, source: tuple[int, int, bytes] = (0, 0, b''),
+                 include_costs: bool = True) -> bytes:
+    """return the snapshot of graph, recording source as the fingerprint of the file it was built from. If
+    include_costs, the opportunity cost and plan of every course are computed and stored too, unless the graph has
+    a prerequisite cycle."""
+    names = list(graph.courses)
+    ids = {name: i for i, name in enumerate(names)}
+    keyword_ids = {}
+    for course in graph.courses.values():
+        keyword_ids.setdefault(course.key_words, len(names) + len(keyword_ids))
+    costs = {}
+    if include_costs:
+        try:
+            costs = graph.compute_all_costs()
+        except PrerequisiteCycleError:
+            costs = {}
+
+    blob = bytearray()
+    string_offsets = array('I', [0])
+    for string in names + list(keyword_ids):
+        blob += string.encode('utf-8')
+        string_offsets.append(len(blob))
+
+    records = bytearray()
+    prereq, higher, plans = array('I'), array('I'), array('I')
+    for name in names:
+        course = graph.courses[name]
+        prereq_start, higher_start, plan_start = len(prereq), len(higher), len(plans)
+        _encode_prereq(course.prereq, ids, prereq)
+        higher.extend(sorted(ids[h] for h in course.higher_courses))
+        cost, flags = 0.0, 0
+        if name in costs:
+            cost, plan = costs[name]
+            plans.extend(ids[p] for p in plan)
+            flags = COST_IS_INT if isinstance(cost, int) else 0
+        records += RECORD.pack(keyword_ids[course.key_words], prereq_start, len(prereq) - prereq_start,
+                               higher_start, len(higher) - higher_start, plan_start, len(plans) - plan_start,
+                               cost, flags)
+    sorted_ids = array('I', sorted(range(len(names)), key=names.__getitem__))
+
+    sections = {}
+    body = bytearray()
+    for name, data in [('string_offsets', _to_bytes(string_offsets)), ('string_blob', bytes(blob)),
+                       ('records', bytes(records)), ('prereq', _to_bytes(prereq)), ('higher', _to_bytes(higher)),
+                       ('plans', _to_bytes(plans)), ('sorted_ids', _to_bytes(sorted_ids))]:
+        # keep every section 4-byte aligned so that it can be viewed as uint32 in place
+        body += bytes(-len(body) % 4)
+        sections[name] = HEADER.size + len(body)
+        body += data
+    sections.update(string_blob_len=len(blob), prereq_len=len(prereq), higher_len=len(higher), plans_len=len(plans))
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, HAS_COSTS if costs else 0, *source, len(names),
+                         len(string_offsets) - 1, *(sections[name] for name in SnapshotHeader.SECTION_NAMES))
+    return header + bytes(body)
+
+
+def _encode_prereq(prereq: list | tuple, ids: dict[str, int], out: array) -> None:
+    """append the encoding of prereq to out."""
+    out.append(LIST if isinstance(prereq, list) else TUPLE)
+    out.append(len(prereq))
+    for item in prereq:
+        if isinstance(item, dict):
+            name, grade = next(iter(item.items()))
+            out.extend((LEAF, ids[name], grade))
+        else:
+            _encode_prereq(item, ids, out)
+
+
+def decode_prereq(words: memoryview | array, pos: int, names: list[str] | object) -> tuple[list | tuple, int]:
+    """decode the prerequisite tree starting at index pos of words, where names maps a course id to its code. Return
+    the tree and the index just after it."""
+    kind, count = words[pos], words[pos + 1]
+    pos += 2
+    lst = []
+    for _ in range(count):
+        if words[pos] == LEAF:
+            lst.append({names[words[pos + 1]]: words[pos + 2]})
+            pos += 3
+        else:
+            item, pos = decode_prereq(words, pos, names)
+            lst.append(item)
+    return (lst if kind == LIST else tuple(lst)), pos
+
+
+def _to_bytes(values: array) -> bytes:
+    """return the little-endian bytes of an array of uint32."""
+    if sys.byteorder == 'big':
+        values = array('I', values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def read_strings(buffer: bytes | memoryview, header: SnapshotHeader) -> list[str]:
+    """return every string of the string table of buffer."""
+    offsets = header.uint32s(buffer, 'string_offsets', 0, header.n_strings + 1)
+    start = header.sections['string_blob']
+    blob = bytes(memoryview(buffer)[start:start + header.sections['string_blob_len']])
+    return [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(header.n_strings)]
+
+
+def decode_graph(buffer: bytes | memoryview) -> CourseGraph:
+    """return the CourseGraph stored in the snapshot buffer, with its cost table if the snapshot has one.
+
+    >>> g = CourseGraph()
+    >>> g.add_course('CSC148H1', 'introduction to computer science')
+    >>> g.add_edge('CSC148H1', [({'CSC108H1': 60}, [{'MAT137Y1': 50}, {'MAT157Y1': 50}])])
+    >>> copy = decode_graph(encode_graph(g))
+    >>> copy.courses['CSC148H1'].prereq == g.courses['CSC148H1'].prereq
+    True
+    >>> copy.courses['MAT137Y1'].higher_courses, copy.course_with_keywords('computer')
+    ({'CSC148H1'}, ['CSC148H1'])
+    >>> copy.compute_all_costs() == g.compute_all_costs()
+    True
+    """
+    if sys.byteorder == 'big':
+        raise SnapshotError('snapshots can only be read in place on little-endian machines')
+    header = SnapshotHeader(buffer)
+    strings = read_strings(buffer, header)
+    names = strings[:header.n_courses]
+    prereq = header.uint32s(buffer, 'prereq')
+    higher = header.uint32s(buffer, 'higher')
+    plans = header.uint32s(buffer, 'plans')
+    graph = CourseGraph()
+    table = {}
+    for i, name in enumerate(names):
+        keywords_id, prereq_start, _, higher_start, higher_count, plan_start, plan_count, cost, flags = \
+            RECORD.unpack_from(buffer, header.sections['records'] + i * RECORD.size)
+        course = Course(name, strings[keywords_id])
+        course.prereq = decode_prereq(prereq, prereq_start, names)[0]
+        course.higher_courses = {names[j] for j in higher[higher_start:higher_start + higher_count]}
+        graph.courses[name] = course
+        graph.keyword_index.set(name, course.key_words)
+        if header.flags & HAS_COSTS:
+            plan = tuple(names[j] for j in plans[plan_start:plan_start + plan_count])
+            table[name] = (int(cost) if flags & COST_IS_INT else cost, plan)
+    graph._cost_table = table
+    graph.version = 1
+    return graph
+
+
+def save_snapshot(graph: CourseGraph, path: str, source_path: Optional[str] = None,
+                  include_costs: bool = True) -> None:
+    """write the snapshot of graph to path, recording the fingerprint of source_path if it is given. The file is
+    replaced atomically, so a reader never sees half a snapshot."""
+    source = source_fingerprint(source_path) if source_path is not None else (0, 0, b'')
+    data = encode_graph(graph, source, include_costs)
+    # a file of its own, so that two threads or processes writing at once do not mix their snapshots
+    temporary = None
+    try:
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path) or '.', delete=False,
+                                         prefix=os.path.basename(path) + '.', suffix='.tmp') as file:
+            temporary = file.name
+            file.write(data)
+        os.replace(temporary, path)
+    except BaseException:
+        # the error is for the caller, the half written file is not
+        if temporary is not None and os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def load_snapshot(path: str) -> CourseGraph:
+    """return the CourseGraph stored in the snapshot file at path, reading the file with a single read."""
+    with open(path, 'rb') as file:
+        return decode_graph(file.read())
+
+
+def snapshot_is_current(path: str, source_path: str) -> bool:
+    """return whether the snapshot at path exists, can be read by this program, and was built from the current
+    content of source_path: same size, modification time and sha1 digest."""
+    try:
+        with open(path, 'rb') as file:
+            header = SnapshotHeader(file.read(HEADER.size))
+    except (OSError, SnapshotError):
+        return False
+    return header.source == source_fingerprint(source_path)
+
+
+def load_or_build(csv_path: str, snapshot_path: Optional[str] = None) -> CourseGraph:
+    """return the CourseGraph of the csv catalog at csv_path, from its snapshot if the snapshot is current, and
+    otherwise by reading the csv file and writing a new snapshot (with precomputed costs) for the next time.
+    snapshot_path defaults to csv_path followed by SNAPSHOT_SUFFIX."""
+    if snapshot_path is None:
+        snapshot_path = csv_path + SNAPSHOT_SUFFIX
+    if snapshot_is_current(snapshot_path, csv_path):
+        try:
+            return load_snapshot(snapshot_path)
+        except (OSError, SnapshotError):
+            pass
+    graph = read_csv(csv_path)
+    try:
+        save_snapshot(graph, snapshot_path, csv_path)
+    except OSError:
+        # a read-only directory only costs the speed-up
+        pass
+    return graph
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['hashlib', 'os', 'struct', 'sys', 'tempfile', 'array', 'proj_generate_graph',
+                          'proj_objects'],
+        'allowed-io': ['source_fingerprint', 'save_snapshot', 'load_snapshot', 'snapshot_is_current'],
+        'disable': ['E9969', 'R1702', 'R1701', 'R0912', 'R0914', 'W0212']
+    })
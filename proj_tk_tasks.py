@@ -0,0 +1,156 @@
+"""Run slow computations of the Tkinter windows (costs, schedules, graph layouts) in a worker thread, so that the
+windows keep answering the user meanwhile. A TaskRunner shows a small progress window with a Cancel button for each
+task, and calls back into Tkinter with the result through after(), since only the thread running the Tk event loop
+may touch the widgets.
+
+Threads are used rather than processes: the CourseGraph of the windows is shared, frozen, and would have to be copied
+into every process."""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+if TYPE_CHECKING:
+    from tkinter import Misc
+
+# milliseconds between two checks of a running task by a TaskRunner
+POLL_MS = 50
+
+
+class TaskCancelled(Exception):
+    """Raised by BackgroundTask.check in a task that was cancelled, to stop it."""
+
+
+class BackgroundTask:
+    """
+    One computation running in a worker thread, as seen by the computation itself and by the window that started it.
+    The computation should call self.check often enough to stop soon after being cancelled, and may call
+    self.report to tell how far it is.
+
+    description: what the task does, shown while it runs.
+    progress: the fraction of the work done, or None if it is not known.
+    message: what the task is doing now.
+    future: the result of the computation, set by TaskRunner.submit.
+
+    >>> task = BackgroundTask('laying out courses')
+    >>> task.report(0.5, 'half way')
+    >>> task.progress, task.message
+    (0.5, 'half way')
+    >>> task.cancel()
+    >>> task.check()
+    Traceback (most recent call last):
+    ...
+    proj_tk_tasks.TaskCancelled: laying out courses
+    """
+    description: str
+    progress: Optional[float]
+    message: str
+    future: Optional[Future]
+    _cancelled: threading.Event
+
+    def __init__(self, description: str) -> None:
+        self.description = description
+        self.progress = None
+        self.message = description
+        self.future = None
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """ask the computation to stop, at its next call to self.check."""
+        self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        """return whether self.cancel was called."""
+        return self._cancelled.is_set()
+
+    def check(self) -> None:
+        """raise TaskCancelled if the task was cancelled."""
+        if self._cancelled.is_set():
+            raise TaskCancelled(self.description)
+
+    def report(self, progress: Optional[float], message: Optional[str] = None) -> None:
+        """record the fraction of the work done, and what the task is doing if message is given."""
+        self.progress = progress
+        if message is not None:
+            self.message = message
+
+
+class TaskRunner:
+    """
+    Runs the computations of the windows of one Tk root in a worker thread, one progress window per task.
+    """
+    _root: 'Misc'
+    _executor: ThreadPoolExecutor
+
+    def __init__(self, root: 'Misc', workers: int = 1) -> None:
+        self._root = root
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='tk task')
+
+    def submit(self, description: str, compute: Callable[[BackgroundTask], Any],
+               on_done: Callable[[Any], None]) -> BackgroundTask:
+        """start compute(task) in the worker thread, where task is the returned BackgroundTask, and call
+        on_done(result) in the Tk thread once it returns. Nothing is called if the task is cancelled, and an error
+        of compute is shown in a message box."""
+        from tkinter import Toplevel, messagebox, ttk
+
+        task = BackgroundTask(description)
+        task.future = self._executor.submit(compute, task)
+        window = Toplevel(self._root)
+        window.title('Working')
+        window.resizable(False, False)
+        label = ttk.Label(window, text=description, width=50)
+        label.pack(padx=10, pady=5)
+        bar = ttk.Progressbar(window, length=300, mode='indeterminate', maximum=100)
+        bar.pack(padx=10, pady=5)
+        bar.start()
+        ttk.Button(window, text='Cancel', command=task.cancel).pack(pady=5)
+        window.protocol('WM_DELETE_WINDOW', task.cancel)
+
+        def poll() -> None:
+            """update the progress window, and finish the task once it is done."""
+            if not window.winfo_exists():
+                return
+            if task.is_cancelled() or not task.future.done():
+                label.config(text=task.message if not task.is_cancelled() else 'cancelling...')
+                if task.progress is not None:
+                    # the bar moves back and forth until the task reports how far it is
+                    bar.stop()
+                    bar.config(mode='determinate', value=task.progress * 100)
+                if not task.future.done():
+                    self._root.after(POLL_MS, poll)
+                    return
+            window.destroy()
+            if task.is_cancelled():
+                return
+            try:
+                result = task.future.result()
+            except TaskCancelled:
+                return
+            except Exception as error:  # shown to the user instead of being lost in the worker thread
+                messagebox.showerror(title='Error', message=f'{description} failed: {error}')
+                return
+            on_done(result)
+
+        self._root.after(POLL_MS, poll)
+        return task
+
+    def shutdown(self) -> None:
+        """stop accepting tasks. A running task finishes in the background unless it is cancelled."""
+        self._executor.shutdown(wait=False)
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['threading', 'concurrent.futures', 'tkinter'],
+        'disable': ['E9969', 'R1702', 'R1701', 'R0912', 'W0718']
+    })
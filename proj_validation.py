@@ -0,0 +1,211 @@
+"""Checks of a loaded CourseGraph: prerequisite cycles, course codes that are only mentioned as prerequisites,
+malformed course codes and courses whose prerequisites can never be completed. The faster algorithms of the project
+(compute_cost, topological_order, proj_closure, ...) assume the graph has no cycle; run validate_graph after loading
+a catalog to find out before they do.
+
+Run this file with catalog files as arguments to print their report as JSON."""
+import json
+import re
+import sys
+from typing import Iterator
+
+from proj_eligibility import is_satisfied
+from proj_objects import CourseGraph
+
+# a well formed course code: department, number, H (half year) or Y (year), campus, as is_year_course expects
+COURSE_CODE = re.compile(r'[A-Z]{3}\d{3}[HY]\d')
+
+
+class GraphValidationError(ValueError):
+    """Raised by check_graph when a graph has a prerequisite cycle or a malformed course code.
+
+    report: the ValidationReport of the graph.
+    """
+    report: 'ValidationReport'
+
+    def __init__(self, report: 'ValidationReport') -> None:
+        super().__init__(f'invalid course graph: {report.summary()}')
+        self.report = report
+
+
+class ValidationReport:
+    """
+    The problems found in a CourseGraph.
+
+    courses: the number of courses in the graph.
+    cycles: the strongly connected components of the prerequisite graph that contain a cycle, each as a sorted list
+        of course codes, sorted by their first code.
+    dangling: each course that is mentioned as a prerequisite but was never loaded itself (it has no keywords and no
+        prerequisites), mapped to the sorted courses mentioning it.
+    malformed: the course codes that do not match COURSE_CODE, sorted.
+    unreachable: the courses whose prerequisites can never be completed, because every way to complete them goes
+        through a cycle, sorted.
+    """
+    courses: int
+    cycles: list[list[str]]
+    dangling: dict[str, list[str]]
+    malformed: list[str]
+    unreachable: list[str]
+
+    def __init__(self, courses: int, cycles: list[list[str]], dangling: dict[str, list[str]], malformed: list[str],
+                 unreachable: list[str]) -> None:
+        self.courses = courses
+        self.cycles = cycles
+        self.dangling = dangling
+        self.malformed = malformed
+        self.unreachable = unreachable
+
+    def is_dag(self) -> bool:
+        """return whether the prerequisite graph has no cycle."""
+        return not self.cycles
+
+    def is_valid(self) -> bool:
+        """return whether the graph can be used by every algorithm of the project: it has no cycle and no malformed
+        course code. Dangling codes are reported but allowed, since catalogs routinely mention courses of other
+        departments."""
+        return not self.cycles and not self.malformed
+
+    def summary(self) -> str:
+        """return a one line description of the report."""
+        return (f'{self.courses} courses, {len(self.cycles)} cycles, {len(self.dangling)} dangling codes, '
+                f'{len(self.malformed)} malformed codes, {len(self.unreachable)} unreachable courses')
+
+    def to_dict(self) -> dict:
+        """return the report as a dictionary of JSON types."""
+        return {'valid': self.is_valid(), 'courses': self.courses, 'cycles': self.cycles, 'dangling': self.dangling,
+                'malformed': self.malformed, 'unreachable': self.unreachable}
+
+    def to_json(self) -> str:
+        """return the report as a JSON document."""
+        return json.dumps(self.to_dict(), indent=2)
+
+
+def _prereq_codes(graph: CourseGraph, course: str) -> Iterator[str]:
+    """yield the courses mentioned by the prerequisites of course, which may repeat."""
+    return graph._prereq_names(graph.courses[course].prereq)
+
+
+def find_cycles(graph: CourseGraph) -> list[list[str]]:
+    """return the strongly connected components of the prerequisite graph that contain a cycle, as described in
+    ValidationReport.cycles. This is Tarjan's algorithm, without recursion so that long chains of prerequisites
+    cannot overflow the stack.
+
+    >>> g = CourseGraph()
+    >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}])
+    >>> g.add_edge('CSC108H1', [{'CSC207H1': 60}])
+    >>> g.add_edge('CSC207H1', [{'CSC148H1': 60}], check_cycles=False)
+    >>> g.add_edge('MAT137Y1', [{'MAT137Y1': 60}], check_cycles=False)
+    >>> find_cycles(g)
+    [['CSC108H1', 'CSC148H1', 'CSC207H1'], ['MAT137Y1']]
+    """
+    index = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    cycles = []
+    for start in graph.courses:
+        if start in index:
+            continue
+        index[start] = low[start] = len(index)
+        stack.append(start)
+        on_stack.add(start)
+        path = [(start, _prereq_codes(graph, start))]
+        while path:
+            course, pending = path[-1]
+            pre = next(pending, None)
+            if pre is None:
+                path.pop()
+                if path:
+                    low[path[-1][0]] = min(low[path[-1][0]], low[course])
+                if low[course] == index[course]:
+                    component = []
+                    while True:
+                        name = stack.pop()
+                        on_stack.discard(name)
+                        component.append(name)
+                        if name == course:
+                            break
+                    if len(component) > 1 or course in _prereq_codes(graph, course):
+                        cycles.append(sorted(component))
+            elif pre not in index:
+                index[pre] = low[pre] = len(index)
+                stack.append(pre)
+                on_stack.add(pre)
+                path.append((pre, _prereq_codes(graph, pre)))
+            elif pre in on_stack:
+                low[course] = min(low[course], index[pre])
+    return sorted(cycles)
+
+
+def find_unreachable(graph: CourseGraph) -> list[str]:
+    """return the courses whose prerequisites can never be completed, sorted. Starting from the courses without
+    prerequisites, a course is completable once its prerequisite expression is satisfied by the completable courses,
+    and only the higher courses of a newly completable course are checked again.
+
+    >>> g = CourseGraph()
+    >>> g.add_edge('CSC148H1', [{'CSC207H1': 60}, {'CSC108H1': 60}])
+    >>> g.add_edge('CSC207H1', [{'CSC148H1': 60}], check_cycles=False)
+    >>> g.add_edge('CSC236H1', [({'CSC207H1': 60}, {'CSC240H1': 60})])
+    >>> g.add_edge('CSC240H1', [{'CSC240H1': 60}], check_cycles=False)
+    >>> find_unreachable(g)
+    ['CSC236H1', 'CSC240H1']
+    """
+    # a grade of 100 meets every grade requirement: only the structure of the expressions matters here
+    done = {name: 100 for name, course in graph.courses.items() if not course.prereq}
+    queue = list(done)
+    for name in queue:
+        for higher in graph.courses[name].higher_courses:
+            if higher not in done and is_satisfied(graph.courses[higher].prereq, done):
+                done[higher] = 100
+                queue.append(higher)
+    return sorted(name for name in graph.courses if name not in done)
+
+
+def validate_graph(graph: CourseGraph) -> ValidationReport:
+    """return the ValidationReport of graph.
+
+    >>> g = CourseGraph()
+    >>> g.add_course('CSC148H1', 'introduction to computer science')
+    >>> g.add_edge('CSC148H1', [{'CSC108H1': 60}, {'CSC11H1': 60}])
+    >>> validate_graph(g).to_dict()
+    {'valid': False, 'courses': 3, 'cycles': [], 'dangling': {'CSC108H1': ['CSC148H1'], \
+'CSC11H1': ['CSC148H1']}, 'malformed': ['CSC11H1'], 'unreachable': []}
+    """
+    dangling = {name: sorted(course.higher_courses) for name, course in graph.courses.items()
+                if not course.key_words and not course.prereq and course.higher_courses}
+    malformed = sorted(name for name in graph.courses if not COURSE_CODE.fullmatch(name))
+    return ValidationReport(len(graph.courses), find_cycles(graph), dict(sorted(dangling.items())), malformed,
+                            find_unreachable(graph))
+
+
+def check_graph(graph: CourseGraph) -> ValidationReport:
+    """return the ValidationReport of graph, or raise GraphValidationError if it is not valid."""
+    report = validate_graph(graph)
+    if not report.is_valid():
+        raise GraphValidationError(report)
+    return report
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        from proj_loader import load_catalogs
+
+        print(validate_graph(load_catalogs(sys.argv[1:], workers=1)[0]).to_json())
+        sys.exit()
+
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'extra-imports': ['json', 're', 'sys', 'proj_eligibility', 'proj_objects', 'proj_loader'],
+        'allowed-io': [],
+        'disable': ['E9969', 'R1702', 'R1701', 'R0912', 'W0212', 'R0913']
+    })